@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Offline cohort analytics for MindEase
+Exports the messages, mood_entries, wellness_activities and analytics tables
+to compressed columnar files, then computes population metrics from those
+files with NumPy - without querying the production database again.
+
+    python analytics_job.py export --out ./analytics_export
+    python analytics_job.py report --data ./analytics_export
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def export(args):
+    """Stream the OLTP tables into the columnar export directory"""
+    from app.database import engine
+    from app.services.columnar_export import ColumnarExporter
+
+    print(f"📦 Exporting to {args.out} (chunks of {args.chunk_size} rows)...")
+    started = time.time()
+    exporter = ColumnarExporter(engine, args.out, chunk_size=args.chunk_size)
+    counts = exporter.export(
+        tables=args.tables,
+        progress=lambda table, rows: print(f"   ... {table}: {rows} rows")
+    )
+
+    for table, rows in counts.items():
+        print(f"   - {table}: {rows} rows")
+    print(f"✅ Export finished in {time.time() - started:.1f}s")
+
+def report(args):
+    """Compute cohort metrics from an export"""
+    from app.services.cohort_analytics import CohortDataset, CohortEngine
+
+    started = time.time()
+    cohort = CohortEngine(CohortDataset.load(args.data))
+    loaded = time.time()
+
+    results = {
+        "crisis_rate_by_week": cohort.crisis_rate_by_week(),
+        "mood_after_activities": cohort.mood_after_activities(
+            activity_type=args.activity_type,
+            sessions=args.sessions
+        ),
+        "emotion_mix": cohort.emotion_mix()
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Report written to {args.output}")
+    else:
+        print(output)
+    print(f"⏱️  Loaded in {loaded - started:.2f}s, computed in {time.time() - loaded:.2f}s", file=sys.stderr)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="MindEase offline cohort analytics")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subcommands.add_parser("export", help="Export tables to columnar files")
+    export_parser.add_argument("--out", default="analytics_export", help="Output directory")
+    export_parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk")
+    export_parser.add_argument("--tables", nargs="*", help="Subset of tables to export")
+    export_parser.set_defaults(handler=export)
+
+    report_parser = subcommands.add_parser("report", help="Compute cohort metrics from an export")
+    report_parser.add_argument("--data", default="analytics_export", help="Export directory")
+    report_parser.add_argument("--activity-type", default="breathing", help="Activity for the mood trajectory")
+    report_parser.add_argument("--sessions", type=int, default=5, help="Completed activities before the trajectory starts")
+    report_parser.add_argument("--output", help="Write the JSON report to a file")
+    report_parser.set_defaults(handler=report)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
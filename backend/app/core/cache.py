@@ -0,0 +1,160 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import cache_requests
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """LRU cache and version counters held in this process.
+
+    Versions come from one process-wide counter and are bounded like the
+    entries. A user whose version was evicted gets the counter's value at
+    that time, which is newer than any version their cached bodies used.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._counter = 0
+        self._floor = 0  # version of users without an entry
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, user_id: str) -> int:
+        with self._lock:
+            version = self._versions.get(user_id)
+            if version is None:
+                return self._floor
+            self._versions.move_to_end(user_id)
+            return version
+
+    def bump_version(self, user_id: str):
+        with self._lock:
+            self._counter += 1
+            self._versions[user_id] = self._counter
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_entries:
+                self._versions.popitem(last=False)
+                self._floor = self._counter
+
+class RedisCacheBackend:
+    """Cache entries and version counters shared across workers through Redis"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(f"cache:{key}")
+        except Exception as e:
+            logger.warning("⚠️  Redis cache read failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int):
+        try:
+            self.client.set(f"cache:{key}", json.dumps(value, default=str), ex=ttl)
+        except Exception as e:
+            logger.warning("⚠️  Redis cache write failed: %s", e)
+
+    def get_version(self, user_id: str) -> Optional[int]:
+        try:
+            return int(self.client.get(f"cache:version:{user_id}") or 0)
+        except Exception as e:
+            logger.warning("⚠️  Redis cache version read failed: %s", e)
+            return None
+
+    def bump_version(self, user_id: str):
+        try:
+            self.client.incr(f"cache:version:{user_id}")
+        except Exception as e:
+            logger.warning("⚠️  Redis cache invalidation failed: %s", e)
+
+class ResponseCache:
+    """Per-user response cache tagged with a data version.
+
+    Every write that can change a user's aggregates bumps their version, so
+    keys built before the write are never read again and simply age out.
+    The current UTC date is part of each key because the cached windows
+    ("last 7 days") move at midnight even without new writes.
+    """
+
+    def __init__(self):
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            client = get_redis() if settings.RESPONSE_CACHE_BACKEND == "redis" else None
+            if client is not None:
+                self._backend = RedisCacheBackend(client)
+            else:
+                self._backend = MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+                if settings.RESPONSE_CACHE_ENABLED and settings.SERVER_WORKERS > 1:
+                    logger.warning(
+                        "⚠️  Response cache disabled: %d workers can't share an in-process cache; "
+                        "set RESPONSE_CACHE_BACKEND=redis", settings.SERVER_WORKERS
+                    )
+        return self._backend
+
+    @property
+    def enabled(self) -> bool:
+        """Off when configured so, or when other workers could not see this one's invalidations"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return False
+        return not (isinstance(self.backend, MemoryCacheBackend) and settings.SERVER_WORKERS > 1)
+
+    def key(self, user_id: str, endpoint: str, **params) -> Optional[str]:
+        """Cache key for a user's endpoint call, or None when caching is off"""
+        if not self.enabled:
+            return None
+        version = self.backend.get_version(user_id)
+        if version is None:
+            return None
+        param_part = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{user_id}:v{version}:{endpoint}?{param_part}@{datetime.utcnow().date()}"
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+        value = self.backend.get(key)
+        cache_requests.inc("response", "miss" if value is None else "hit")
+        return value
+
+    def set(self, key: Optional[str], value: Any):
+        if key is not None:
+            self.backend.set(key, value, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+    def invalidate_user(self, user_id: str):
+        """Bump the user's data version after a write"""
+        if self.enabled:
+            self.backend.bump_version(user_id)
+
+response_cache = ResponseCache()
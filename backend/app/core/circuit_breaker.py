@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Stops calling a dependency that keeps failing.
+
+    Closed: calls go through, and ``failure_threshold`` consecutive failures
+    open the circuit. Open: calls are refused for ``reset_seconds``, then a
+    single trial call is let through (half-open); its success closes the
+    circuit and its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("🔌 Circuit %s closed", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("🔌 Circuit %s opened after %d failures", self.name, self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give up an allowed call that ended without a verdict (e.g. it was cancelled)"""
+        with self._lock:
+            # A half-open circuit lets the next caller make the trial instead
+            self._trial_running = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at)), 1)
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_in_seconds": retry_in}
@@ -5,6 +5,9 @@ import os
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./mindease.db")
+    # Create missing tables and search indexes on startup; off when the
+    # build step (create_tables.py) owns the schema
+    DB_CREATE_ON_STARTUP: bool = os.getenv("DB_CREATE_ON_STARTUP", "True").lower() == "true"
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -15,10 +18,100 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     ANTHROPIC_API_KEY: Optional[str] = os.getenv("ANTHROPIC_API_KEY")
     AI_PROVIDER: str = os.getenv("AI_PROVIDER", "openai")  # openai or anthropic
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures that open it
+    AI_CIRCUIT_RESET_SECONDS: float = float(os.getenv("AI_CIRCUIT_RESET_SECONDS", "30"))  # open this long before a trial call
+    AI_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("AI_REQUEST_TIMEOUT_SECONDS", "25"))  # per attempt
+    AI_REQUEST_MAX_RETRIES: int = int(os.getenv("AI_REQUEST_MAX_RETRIES", "1"))  # SDK retries after the first attempt
     
     # Redis (for session management)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # Rate Limiting (token buckets, refilled continuously)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or redis
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "False").lower() == "true"
+    RATE_LIMIT_TRUSTED_PROXIES: str = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")  # comma-separated IPs/CIDRs of proxies before the last one
+    RATE_LIMIT_USER_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "20"))
+    RATE_LIMIT_USER_BURST: int = int(os.getenv("RATE_LIMIT_USER_BURST", "10"))
+    RATE_LIMIT_IP_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "60"))
+    RATE_LIMIT_IP_BURST: int = int(os.getenv("RATE_LIMIT_IP_BURST", "30"))
+    LLM_BUDGET_PER_HOUR: float = float(os.getenv("LLM_BUDGET_PER_HOUR", "120"))
+    LLM_BUDGET_BURST: int = int(os.getenv("LLM_BUDGET_BURST", "20"))
+    
+    # Response Cache (per-user, invalidated by a data version on writes)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory or redis
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Response Compression (whole bodies only; streams pass through)
+    RESPONSE_COMPRESSION_ENABLED: bool = os.getenv("RESPONSE_COMPRESSION_ENABLED", "True").lower() == "true"
+    RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))  # used when brotli is installed
+    
+    # Mood Statistics
+    MOOD_EWMA_ALPHA: float = float(os.getenv("MOOD_EWMA_ALPHA", "0.3"))  # weight of the newest entry
+    
+    # Topics
+    TOPIC_CATALOG_TTL_SECONDS: int = int(os.getenv("TOPIC_CATALOG_TTL_SECONDS", "300"))  # reload from the database
+    DAILY_TOPIC_COUNT: int = int(os.getenv("DAILY_TOPIC_COUNT", "5"))
+    RECOMMENDATION_WINDOW_DAYS: int = int(os.getenv("RECOMMENDATION_WINDOW_DAYS", "30"))  # mood history scored
+    RECOMMENDATION_TOP_K: int = int(os.getenv("RECOMMENDATION_TOP_K", "10"))
+    
+    # Offline Sync
+    WELLNESS_SYNC_MAX_ITEMS: int = int(os.getenv("WELLNESS_SYNC_MAX_ITEMS", "500"))  # per request
+    
+    # Logging (JSON lines via a background queue listener)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json or text
+    LOG_FILE: str = os.getenv("LOG_FILE", "logs/mindease.log")  # empty for console only
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # share of successful requests logged
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")  # per path prefix, e.g. "/health=0,/api/v1/topics=0.1"
+    LOG_SLOW_REQUEST_MS: int = int(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))  # always logged
+    
+    # Metrics (Prometheus text format at /metrics)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_DIR: str = os.getenv("METRICS_DIR", "")  # shared by workers to aggregate; empty for this process only
+    METRICS_FLUSH_SECONDS: float = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")  # bearer token for /metrics; unset keeps it closed
+    
+    # Tracing (per-request spans, kept in memory; /debug/traces)
+    TRACE_ENABLED: bool = os.getenv("TRACE_ENABLED", "True").lower() == "true"
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+    TRACE_BUFFER_SIZE: int = int(os.getenv("TRACE_BUFFER_SIZE", "200"))  # recent traces kept per worker
+    TRACE_MAX_SPANS: int = int(os.getenv("TRACE_MAX_SPANS", "500"))  # per trace
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "")  # also append traces here as JSON lines
+    TRACE_DEBUG_TOKEN: str = os.getenv("TRACE_DEBUG_TOKEN", "")  # X-Debug-Token for /debug/traces; unset keeps them closed
+    
+    # Query Profiler (per-request statement counts, slow-query log, N+1 warnings)
+    PROFILER_ENABLED: bool = os.getenv("PROFILER_ENABLED", "True").lower() == "true"
+    PROFILER_SLOW_QUERY_MS: float = float(os.getenv("PROFILER_SLOW_QUERY_MS", "100"))
+    PROFILER_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("PROFILER_N_PLUS_ONE_THRESHOLD", "5"))  # repeats of one SELECT
+    
+    # Health Checks (/health/live, /health/ready, /health/deep)
+    WARMUP_DB_CONNECTIONS: int = int(os.getenv("WARMUP_DB_CONNECTIONS", "2"))  # pool connections opened before ready
+    WARMUP_RETRY_SECONDS: float = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+    HEALTH_POOL_SATURATION_WARN: float = float(os.getenv("HEALTH_POOL_SATURATION_WARN", "0.9"))  # deep check reports degraded
+    
+    # Graceful Shutdown (drain in-flight generations, retry unfinished ones)
+    SHUTDOWN_DRAIN_SECONDS: float = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))  # below the platform's kill timeout
+    PENDING_GENERATION_STALE_SECONDS: int = int(os.getenv("PENDING_GENERATION_STALE_SECONDS", "120"))  # retry when older
+    PENDING_GENERATION_RETRY_SECONDS: float = float(os.getenv("PENDING_GENERATION_RETRY_SECONDS", "60"))
+    PENDING_GENERATION_MAX_ATTEMPTS: int = int(os.getenv("PENDING_GENERATION_MAX_ATTEMPTS", "3"))
+    
+    # Production Server (start.py --production)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))  # workers; 0 sizes from available CPUs
+    SERVER_MAX_WORKERS: int = int(os.getenv("SERVER_MAX_WORKERS", "8"))  # cap on the CPU-sized count
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "1"))  # set by start.py for the workers it runs
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))  # recycle a worker after this many; 0 never
+    SERVER_MAX_REQUESTS_JITTER: int = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))  # so workers don't recycle together
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    
     # App Settings
     APP_NAME: str = "MindEase"
     DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DRAIN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+class GenerationDrain:
+    """Tracks in-flight LLM generations so a shutting-down worker can finish them.
+
+    Once SIGTERM (or SIGINT) arrives the worker is draining: new generations
+    are refused with 503 and readiness fails, while the server stops
+    accepting connections and waits for requests already running.
+    """
+
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+
+    def install_signal_handlers(self):
+        """Chain onto the server's SIGTERM/SIGINT handlers (call from lifespan startup)"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in DRAIN_SIGNALS:
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                # Nobody is handling it gracefully; leave the default
+                continue
+
+            def handler(signum, frame, previous=previous):
+                self.start_draining()
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    def start_draining(self):
+        if not self.draining:
+            self.draining = True
+            logger.warning("🚰 Draining: refusing new generations, %d in flight", self.in_flight)
+
+    @asynccontextmanager
+    async def generation(self):
+        """Hold for the duration of one generation; 503 while draining"""
+        if self.draining:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is restarting, please retry",
+                headers={"Retry-After": "5"}
+            )
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def wait(self, timeout: float) -> int:
+        """Wait up to ``timeout`` seconds for in-flight generations; returns how many are left"""
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        return self.in_flight
+
+generation_drain = GenerationDrain()
+
+async def track_generation():
+    """Route dependency holding a generation slot for the whole request"""
+    async with generation_drain.generation():
+        yield
+
+metrics.gauge_callback(
+    "mindease_llm_generations_in_flight", "Chat generations currently running", (),
+    lambda: [((), generation_drain.in_flight)]
+)
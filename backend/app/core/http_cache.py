@@ -0,0 +1,74 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.middleware import decoded_etag
+from app.services.analytics_rollup import analytics_rollups
+
+# Cache-Control policies
+PUBLIC_SHORT = "public, max-age=300, stale-while-revalidate=60"
+PUBLIC_LONG = "public, max-age=3600, stale-while-revalidate=300"
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """Weak ETag from the version parts a response is derived from"""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def user_etag(db: Session, user_id: str, endpoint: str, **params) -> str:
+    """ETag for a per-user response, tied to the user's data in the database.
+
+    The current UTC date is part of it because the windows ("last 7 days")
+    move at midnight even without new writes.
+    """
+    version = analytics_rollups.data_version(db, user_id)
+    return make_etag(
+        user_id, version, datetime.utcnow().date(), endpoint,
+        *(f"{name}={params[name]}" for name in sorted(params))
+    )
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes on both sides, and the content
+    # coding suffix CompressionMiddleware adds to compressed responses
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = decoded_etag(candidate.strip())
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    etag: Optional[str],
+    cache_control: str,
+    vary: Optional[str] = None
+) -> Optional[Response]:
+    """Return a 304 if the client's copy is current; otherwise tag ``response``.
+
+    Call before doing any work so a revalidation costs neither queries nor
+    serialization.
+    """
+    headers = {"Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    if etag is None:
+        response.headers.update(headers)
+        return None
+
+    headers["ETag"] = etag
+    if _matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
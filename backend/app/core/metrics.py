@@ -0,0 +1,384 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshots of exited workers are kept as they are
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+# Counters and histograms of exited workers, merged into one file in METRICS_DIR
+RETIRED_SNAPSHOT = "retired.json"
+
+class _Shard:
+    """One thread's counters; only that thread writes to it"""
+
+    def __init__(self):
+        self.values: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, list] = {}
+
+class _Metric:
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labels: Iterable[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        values = self.registry._shard().values
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+class Gauge(Counter):
+    """Up/down value summed over threads; inc and dec from the same thread"""
+
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, registry, name, help, labels, buckets):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        histograms = self.registry._shard().histograms
+        key = (self.name, labels)
+        # Per-bucket counts, then sum and count; made cumulative when rendered
+        data = histograms.get(key)
+        if data is None:
+            data = histograms[key] = [0] * (len(self.buckets) + 3)
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-2] += value
+        data[-1] += 1
+
+class MetricsRegistry:
+    """Prometheus-style metrics without locks on the hot path.
+
+    Each thread (event loop, threadpool workers) increments its own shard;
+    a scrape sums the shards. With ``METRICS_DIR`` set, every worker also
+    writes its totals there periodically and a scrape of any worker adds up
+    all of them, so one worker's /metrics covers the whole server. Snapshots
+    of exited workers are folded into one retired snapshot, so recycling
+    workers does not grow the directory and counters never go backwards.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._callbacks: List[Tuple[_Metric, Callable[[], Iterable[Tuple[tuple, float]]]]] = []
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+        self._flusher: Optional[threading.Thread] = None
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help, labels, buckets))
+
+    def gauge_callback(self, name: str, help: str, labels: Iterable[str], collect):
+        """Gauge read at scrape time; ``collect`` returns (label values, value) pairs"""
+        metric = self._metrics.get(name) or self._register(Gauge(self, name, help, labels))
+        self._callbacks.append((metric, collect))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def snapshot(self) -> dict:
+        """This process's totals, summed over threads"""
+        values: Dict[tuple, float] = {}
+        histograms: Dict[tuple, list] = {}
+        for shard in list(self._shards):
+            for key, value in shard.values.copy().items():
+                values[key] = values.get(key, 0) + value
+            for key, data in shard.histograms.copy().items():
+                total = histograms.setdefault(key, [0] * len(data))
+                for index, count in enumerate(list(data)):
+                    total[index] += count
+        for metric, collect in self._callbacks:
+            try:
+                for labels, value in collect():
+                    key = (metric.name, tuple(labels))
+                    values[key] = values.get(key, 0) + value
+            except Exception as e:
+                logger.warning("⚠️  Metrics callback for %s failed: %s", metric.name, e)
+        return {
+            "pid": os.getpid(),
+            "time": time.time(),
+            "values": [[name, list(labels), value] for (name, labels), value in values.items()],
+            "histograms": [[name, list(labels), data] for (name, labels), data in histograms.items()]
+        }
+
+    def render(self) -> str:
+        """Prometheus text exposition of all workers' metrics"""
+        values: Dict[tuple, float] = {}
+        histograms: Dict[tuple, list] = {}
+        for snapshot in self._all_snapshots():
+            # Gauges of workers that have gone away no longer describe anything
+            live = snapshot["pid"] == os.getpid() or (snapshot["pid"] is not None and _alive(snapshot))
+            for name, labels, value in snapshot["values"]:
+                metric = self._metrics.get(name)
+                if metric is None or (metric.type == "gauge" and not live):
+                    continue
+                key = (name, tuple(labels))
+                values[key] = values.get(key, 0) + value
+            for name, labels, data in snapshot["histograms"]:
+                total = histograms.setdefault((name, tuple(labels)), [0] * len(data))
+                for index, count in enumerate(data):
+                    total[index] += count
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            if isinstance(metric, Histogram):
+                for (name, labels), data in sorted(histograms.items()):
+                    if name != metric.name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), data):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_labels(metric.labels + ('le',), labels + (le,))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(metric.labels, labels)} {data[-2]}")
+                    lines.append(f"{name}_count{_labels(metric.labels, labels)} {data[-1]}")
+            else:
+                for (name, labels), value in sorted(values.items()):
+                    if name == metric.name:
+                        lines.append(f"{name}{_labels(metric.labels, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _all_snapshots(self) -> List[dict]:
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS_DIR
+        if not directory or not os.path.isdir(directory):
+            return snapshots
+        own = f"{os.getpid()}.json"
+        with open(os.path.join(directory, "retired.lock"), "a") as lock:
+            if fcntl is not None:
+                # Not while a snapshot is moving into the retired one: it would count twice
+                fcntl.flock(lock, fcntl.LOCK_SH)
+            for filename in os.listdir(directory):
+                if not filename.endswith(".json") or filename == own:
+                    continue
+                try:
+                    with open(os.path.join(directory, filename)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    # Being replaced right now, or left half-written by a crash
+                    continue
+        return snapshots
+
+    def flush(self):
+        """Write this worker's totals to METRICS_DIR"""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(f"{path}.tmp", path)
+        self._retire_exited(directory)
+
+    def _retire_exited(self, directory: str):
+        """Fold snapshots of exited workers into RETIRED_SNAPSHOT, dropping their gauges"""
+        if fcntl is None:
+            return
+        own = f"{os.getpid()}.json"
+        exited = []
+        for filename in os.listdir(directory):
+            pid = filename[:-len(".json")]
+            if filename.endswith(".json") and filename != own and pid.isdigit() and _exited(int(pid)):
+                exited.append(os.path.join(directory, filename))
+        if not exited:
+            return
+
+        # Workers flush on their own schedules; one at a time merges, and a
+        # snapshot is deleted in the same locked step that counted it
+        with open(os.path.join(directory, "retired.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+            try:
+                with open(retired_path) as f:
+                    retired = json.load(f)
+            except (OSError, ValueError):
+                retired = {"pid": None, "time": 0, "values": [], "histograms": []}
+            values = {(name, tuple(labels)): value for name, labels, value in retired["values"]}
+            histograms = {(name, tuple(labels)): data for name, labels, data in retired["histograms"]}
+
+            merged = []
+            for path in exited:
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    # Already merged by another worker, or left half-written
+                    continue
+                for name, labels, value in snapshot["values"]:
+                    metric = self._metrics.get(name)
+                    if metric is None or metric.type == "gauge":
+                        continue
+                    key = (name, tuple(labels))
+                    values[key] = values.get(key, 0) + value
+                for name, labels, data in snapshot["histograms"]:
+                    total = histograms.setdefault((name, tuple(labels)), [0] * len(data))
+                    for index, count in enumerate(data):
+                        total[index] += count
+                merged.append(path)
+            if not merged:
+                return
+
+            retired = {
+                "pid": None,
+                "time": time.time(),
+                "values": [[name, list(labels), value] for (name, labels), value in values.items()],
+                "histograms": [[name, list(labels), data] for (name, labels), data in histograms.items()]
+            }
+            with open(f"{retired_path}.tmp", "w") as f:
+                json.dump(retired, f)
+            os.replace(f"{retired_path}.tmp", retired_path)
+            for path in merged:
+                os.remove(path)
+        logger.info("🧹 Merged metrics of %d exited workers", len(merged))
+
+    def start_flusher(self):
+        """Flush every METRICS_FLUSH_SECONDS from a daemon thread (no-op without METRICS_DIR)"""
+        if not settings.METRICS_DIR or self._flusher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(settings.METRICS_FLUSH_SECONDS)
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning("⚠️  Metrics flush failed: %s", e)
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+def _alive(snapshot: dict) -> bool:
+    if time.time() - snapshot.get("time", 0) > 3 * settings.METRICS_FLUSH_SECONDS:
+        return False
+    try:
+        os.kill(snapshot["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _exited(pid: int) -> bool:
+    """Whether no process has this pid (a stalled worker is not exited: it may flush again)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "mindease_http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+http_request_duration = metrics.histogram(
+    "mindease_http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"]
+)
+http_requests_in_flight = metrics.gauge("mindease_http_requests_in_flight", "HTTP requests being handled")
+db_pool_checkouts = metrics.counter("mindease_db_pool_checkouts_total", "Connections checked out of the pool")
+db_pool_wait = metrics.histogram(
+    "mindease_db_pool_wait_seconds", "Time spent waiting for a pooled connection", buckets=POOL_WAIT_BUCKETS
+)
+cache_requests = metrics.counter(
+    "mindease_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"]
+)
+crisis_detections = metrics.counter("mindease_crisis_detections_total", "Chat messages flagged by crisis detection")
+
+def route_template(scope: dict) -> str:
+    """The matched route's path template (e.g. /api/v1/topics/{topic_id}), or unmatched"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Newer FastAPI keeps included routes relative and records the router's prefix
+    included = (scope.get("fastapi") or {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "")
+    return prefix + getattr(route, "path", "")
+
+def instrument_engine(engine: Engine):
+    """Count pool checkouts and time the wait for a connection"""
+    pool = engine.pool
+    if getattr(pool, "_mindease_instrumented", False):
+        return
+    pool._mindease_instrumented = True
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc()
+
+    # No pool event fires before the wait, so time the pool's own getter
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+    metrics.gauge_callback(
+        "mindease_db_pool_checked_out", "Connections currently checked out", (),
+        lambda: [((), pool.checkedout())] if hasattr(pool, "checkedout") else []
+    )
+    metrics.gauge_callback(
+        "mindease_db_pool_size", "Configured pool size", (),
+        lambda: [((), pool.size())] if hasattr(pool, "size") else []
+    )
@@ -0,0 +1,278 @@
+import gzip
+import logging
+import re
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import http_requests, http_request_duration, http_requests_in_flight, route_template
+from app.core.query_profiler import query_profiler
+from app.core.request_context import request_id, request_sampled, request_sampler
+from app.core.tracing import tracer
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+SENSITIVE_HEADERS = {b"authorization", b"cookie"}
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"application/xml")
+CONTENT_CODINGS = ("br", "gzip")
+
+class RequestObservabilityMiddleware:
+    """Request ids, timing, access logs, metrics, traces and query profiles.
+
+    Plain ASGI: the app's ``send`` is wrapped only to read the status and
+    add headers to ``http.response.start``, so bodies stream through
+    untouched and timing covers the whole body. Websocket and lifespan
+    traffic is passed straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+
+        current_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        request_id.set(current_id)
+        # Unsampled requests keep only warnings and errors; the decision covers
+        # everything logged while handling the request
+        sampled = request_sampler.sample(path)
+        request_sampled.set(sampled)
+        trace = tracer.start_trace(f"{method} {path}", method=method, path=path)
+        profile = query_profiler.start(f"{method} {path}")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # Request headers (excluding sensitive ones)
+            safe_headers = {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in scope["headers"] if name not in SENSITIVE_HEADERS
+            }
+            logger.debug("📋 Headers: %s", safe_headers)
+
+        status_code = 500
+
+        async def send_with_headers(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", current_id.encode()))
+                if trace is not None:
+                    headers.append((b"x-trace-id", trace.trace_id.encode()))
+                if profile is not None:
+                    headers.append((
+                        b"server-timing",
+                        f'db;dur={profile.total_ms:.1f};desc="{profile.count} queries"'.encode()
+                    ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception:
+            status_code = 500
+            logger.exception("💥 %s %s - Unhandled error", method, path)
+            raise
+        finally:
+            http_requests_in_flight.dec()
+            self._finish(scope, status_code, time.perf_counter() - start_time, sampled, trace, profile)
+
+    def _finish(self, scope: Scope, status_code: int, process_time: float, sampled: bool, trace, profile):
+        method = scope["method"]
+        # Label by route template, not the raw path, to keep series bounded
+        route_path = route_template(scope)
+        http_requests.inc(method, route_path, str(status_code))
+        http_request_duration.observe(process_time, method, route_path)
+        if trace is not None:
+            tracer.finish_trace(trace, f"{method} {route_path}", status=status_code)
+        if profile is not None:
+            query_profiler.finish(profile, f"{method} {route_path}")
+
+        # One line per request: always for errors and slow requests, otherwise if sampled
+        process_time_ms = process_time * 1000
+        if status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400 or process_time_ms >= settings.LOG_SLOW_REQUEST_MS:
+            level = logging.WARNING
+        else:
+            level = logging.INFO if sampled else None
+        if level is None or not logger.isEnabledFor(level):
+            return
+        client = scope.get("client")
+        logger.log(
+            level,
+            "📤 %s %s - Status: %s - Time: %.1fms",
+            method, scope["path"], status_code, process_time_ms,
+            extra={
+                "method": method,
+                "path": scope["path"],
+                "route": route_path,
+                "status": status_code,
+                "duration_ms": round(process_time_ms, 1),
+                "client": client[0] if client else None,
+                "db_queries": profile.count if profile else None,
+                "db_ms": round(profile.total_ms, 1) if profile else None
+            }
+        )
+
+def _incoming_request_id(scope: Scope):
+    """A well-formed X-Request-ID from the client or proxy, if any"""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            value = value.decode("latin-1")
+            return value if REQUEST_ID_RE.match(value) else None
+    return None
+
+class CompressionMiddleware:
+    """Brotli or gzip for response bodies of RESPONSE_COMPRESSION_MIN_BYTES or more.
+
+    Only bodies sent in one piece are compressed. Streamed responses (chat
+    exports, event streams) pass through as they are, so nothing is
+    buffered. Brotli is used when the ``brotli`` package is installed and
+    the client accepts it. A compressed body is a different representation,
+    so its ETag gets the coding as a suffix (``W/"…-br"``); ``If-None-Match``
+    checks strip it again (see ``decoded_etag``).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.RESPONSE_COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = _preferred_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held until the first body part shows whether it is worth compressing
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if start["status"] == 304:
+                # Confirms the copy the client holds, which may be the compressed one
+                await send({**start, "headers": _revalidated_headers(start, scope, encoding)})
+                await send(message)
+                return
+            if message.get("more_body", False) or not _should_compress(start, body):
+                await send(start)
+                await send(message)
+                return
+
+            if encoding == "br":
+                body = brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+            headers, vary = [], []
+            for name, value in start.get("headers", ()):
+                if name == b"content-length":
+                    continue
+                if name == b"vary":
+                    vary.append(value)
+                    continue
+                if name == b"etag":
+                    value = encoded_etag(value.decode("latin-1"), encoding).encode("latin-1")
+                headers.append((name, value))
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", _merge_vary(vary))
+            ]
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the ``encoding``-compressed body: the coding goes inside the quotes"""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def decoded_etag(etag: str) -> str:
+    """The identity body's ETag for one a compressed response carried"""
+    for encoding in CONTENT_CODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def _merge_vary(values: list) -> bytes:
+    """One Vary header listing the app's fields plus Accept-Encoding"""
+    fields = [field.strip() for value in values for field in value.decode("latin-1").split(",") if field.strip()]
+    if not any(field == "*" or field.lower() == "accept-encoding" for field in fields):
+        fields.append("Accept-Encoding")
+    return ", ".join(fields).encode("latin-1")
+
+def _revalidated_headers(start: Message, scope: Scope, encoding: str) -> list:
+    """304 headers, with the compressed ETag if that is what the client sent"""
+    sent = b",".join(value for name, value in scope["headers"] if name == b"if-none-match").decode("latin-1")
+    sent_tags = {tag.strip() for tag in sent.split(",")}
+    headers, vary = [], []
+    for name, value in start.get("headers", ()):
+        if name == b"vary":
+            vary.append(value)
+            continue
+        if name == b"etag":
+            compressed = encoded_etag(value.decode("latin-1"), encoding)
+            if compressed in sent_tags:
+                value = compressed.encode("latin-1")
+        headers.append((name, value))
+    headers.append((b"vary", _merge_vary(vary)))
+    return headers
+
+def _preferred_encoding(scope: Scope):
+    """"br" or "gzip" if the client accepts it, else None"""
+    accepted = set()
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            for part in value.decode("latin-1").split(","):
+                coding, _, params = part.partition(";")
+                quality = params.strip()
+                try:
+                    refused = quality.startswith("q=") and float(quality[2:]) == 0
+                except ValueError:
+                    refused = False
+                if not refused:
+                    accepted.add(coding.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def _should_compress(start: Message, body: bytes) -> bool:
+    if len(body) < settings.RESPONSE_COMPRESSION_MIN_BYTES or start["status"] in (204, 304):
+        return False
+    content_type = b""
+    for name, value in start.get("headers", ()):
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(b"text/event-stream")
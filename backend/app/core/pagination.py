@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import String, and_, or_, literal
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(timestamp: datetime, row_id: str, direction: str) -> str:
+    """Opaque cursor pointing just past (timestamp, id) in the given direction"""
+    raw = json.dumps([timestamp.isoformat(), row_id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(timestamp), str(row_id), direction
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _keyset_filter(query: Query, timestamp_column, id_column, timestamp: datetime, row_id: str, before: bool):
+    """Rows strictly before (or after) (timestamp, id) in keyset order"""
+    if timestamp.microsecond == 0 and query.session.get_bind().dialect.name == "sqlite":
+        # SQLite keeps timestamps as text: server defaults (CURRENT_TIMESTAMP)
+        # have no fractional part while SQLAlchemy writes ".000000", so a
+        # whole-second cursor has to match both spellings
+        whole = literal(timestamp.strftime("%Y-%m-%d %H:%M:%S"), String)
+        fractional = literal(timestamp.strftime("%Y-%m-%d %H:%M:%S.000000"), String)
+        equal = timestamp_column.in_([whole, fractional])
+        if before:
+            return or_(timestamp_column < whole, and_(equal, id_column < row_id))
+        return or_(timestamp_column > fractional, and_(equal, id_column > row_id))
+
+    if before:
+        return or_(timestamp_column < timestamp, and_(timestamp_column == timestamp, id_column < row_id))
+    return or_(timestamp_column > timestamp, and_(timestamp_column == timestamp, id_column > row_id))
+
+class KeysetPage:
+    def __init__(self, items: List[Any], next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def apply_headers(self, response: Response):
+        """Expose the cursors as X-Next-Cursor / X-Prev-Cursor headers"""
+        if self.next_cursor:
+            response.headers["X-Next-Cursor"] = self.next_cursor
+        if self.prev_cursor:
+            response.headers["X-Prev-Cursor"] = self.prev_cursor
+
+def paginate(
+    query: Query,
+    timestamp_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+    timestamp_attr: str = "created_at",
+    from_end: bool = False
+) -> KeysetPage:
+    """Keyset pagination on (timestamp, id).
+
+    Each page is one indexed range scan of at most ``limit + 1`` rows, however
+    deep into the history it is. ``descending`` is the natural order of the
+    listing; "prev" cursors walk against it and the page is flipped back.
+    With ``from_end`` and no cursor, the first page is the end of the listing
+    and earlier pages are reached through its prev cursor.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    direction = "prev" if from_end and not cursor else "next"
+
+    if cursor:
+        cursor_timestamp, cursor_id, direction = decode_cursor(cursor)
+        # Rows strictly before the cursor when walking down, after it when walking up
+        walk_down = descending == (direction == "next")
+        query = query.filter(
+            _keyset_filter(query, timestamp_column, id_column, cursor_timestamp, cursor_id, before=walk_down)
+        )
+
+    scan_descending = descending == (direction == "next")
+    if scan_descending:
+        query = query.order_by(timestamp_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(timestamp_column, id_column)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    def cursor_for(row, cursor_direction: str) -> str:
+        return encode_cursor(getattr(row, timestamp_attr), str(row.id), cursor_direction)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == "next":
+            next_cursor = cursor_for(rows[-1], "next") if has_more else None
+            prev_cursor = cursor_for(rows[0], "prev") if cursor else None
+        else:
+            # Nothing follows the end of the listing (yet)
+            next_cursor = cursor_for(rows[-1], "next") if cursor else None
+            prev_cursor = cursor_for(rows[0], "prev") if has_more else None
+
+    return KeysetPage(rows, next_cursor, prev_cursor)
@@ -0,0 +1,181 @@
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_KEPT = 5
+SHAPE_CHARS = 300
+
+db_slow_queries = metrics.counter("mindease_db_slow_queries_total", "Statements slower than PROFILER_SLOW_QUERY_MS")
+db_n_plus_one = metrics.counter(
+    "mindease_db_n_plus_one_total", "Requests that repeated one SELECT shape past the N+1 threshold", ["route"]
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*\s*\)")
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals and expanded IN lists collapsed, for grouping repeats"""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _LITERAL_RE.sub("?", shape)
+    return _PARAM_LIST_RE.sub("(?...)", shape)[:SHAPE_CHARS]
+
+class QueryProfile:
+    """Statements executed in one request (or one ``assert_query_budget`` block)"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Dict[str, List[float]] = {}  # shape -> [count, total ms]
+        self.slowest: List[tuple] = []  # (ms, statement), slowest first
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        stats = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed_ms
+        if len(self.slowest) < SLOWEST_KEPT or elapsed_ms > self.slowest[-1][0]:
+            self.slowest.append((elapsed_ms, _WHITESPACE_RE.sub(" ", statement)[:SHAPE_CHARS]))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """SELECT shapes run at least ``threshold`` times: (shape, count, total ms), most frequent first"""
+        return sorted(
+            ((shape, int(count), total) for shape, (count, total) in self.shapes.items()
+             if count >= threshold and shape.upper().startswith("SELECT")),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+    def report(self) -> str:
+        lines = [f"{self.name or 'block'}: {self.count} queries, {self.total_ms:.1f}ms"]
+        for shape, (count, total) in sorted(self.shapes.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append(f"  {int(count):4d}x {total:8.1f}ms  {shape}")
+        return "\n".join(lines)
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+
+class QueryProfiler:
+    """Counts and times SQL statements per request.
+
+    Statements slower than PROFILER_SLOW_QUERY_MS are logged wherever they
+    run. At the end of a request, any SELECT shape repeated at least
+    PROFILER_N_PLUS_ONE_THRESHOLD times is logged as a likely N+1.
+    """
+
+    def __init__(self):
+        self._collectors: List[List[QueryProfile]] = []
+        self._lock = threading.Lock()
+
+    def instrument(self, engine: Engine):
+        if getattr(engine, "_mindease_profiled", False):
+            return
+        engine._mindease_profiled = True
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.get("query_started")
+            if not started:
+                return
+            elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+            profile = current_profile.get()
+            if profile is not None:
+                profile.record(statement, elapsed_ms)
+            if elapsed_ms >= settings.PROFILER_SLOW_QUERY_MS:
+                db_slow_queries.inc()
+                logger.warning(
+                    "🐢 Slow query (%.1fms): %s", elapsed_ms, _WHITESPACE_RE.sub(" ", statement)[:SHAPE_CHARS],
+                    extra={"duration_ms": round(elapsed_ms, 1)}
+                )
+
+        @event.listens_for(engine, "handle_error")
+        def on_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("query_started"):
+                connection.info["query_started"].pop()
+
+    def start(self, name: str = "") -> Optional[QueryProfile]:
+        """Begin profiling the current context (None when the profiler is off)"""
+        if not settings.PROFILER_ENABLED:
+            return None
+        profile = QueryProfile(name)
+        current_profile.set(profile)
+        return profile
+
+    def finish(self, profile: QueryProfile, name: Optional[str] = None):
+        if name:
+            profile.name = name
+        repeated = profile.repeated(settings.PROFILER_N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            # The most repeated shape is the one worth looking at
+            shape, count, total_ms = repeated[0]
+            db_n_plus_one.inc(profile.name)
+            logger.warning(
+                "🔁 Possible N+1 in %s: %d x %s (%.1fms)", profile.name, count, shape, total_ms,
+                extra={"route": profile.name, "repeats": count}
+            )
+        if self._collectors:
+            with self._lock:
+                for collected in self._collectors:
+                    collected.append(profile)
+
+    @contextmanager
+    def collect(self):
+        """Profiles of every request finished while the block runs, in any thread"""
+        collected: List[QueryProfile] = []
+        with self._lock:
+            self._collectors.append(collected)
+        try:
+            yield collected
+        finally:
+            with self._lock:
+                self._collectors.remove(collected)
+
+query_profiler = QueryProfiler()
+
+@contextmanager
+def assert_query_budget(max_queries: int, max_repeats: Optional[int] = None):
+    """Fail if the block, or any request it makes, runs more statements than allowed.
+
+    Covers statements run directly in the block and requests served while it
+    runs, e.g. through ``TestClient``::
+
+        with assert_query_budget(6, max_repeats=2):
+            client.post("/api/v1/chat/message", json=payload, headers=headers)
+
+    ``max_repeats`` caps how often one statement shape may repeat (N+1).
+    """
+    token = current_profile.set(QueryProfile("block"))
+    try:
+        with query_profiler.collect() as requests:
+            yield requests
+        profiles = [current_profile.get()] + requests
+    finally:
+        current_profile.reset(token)
+
+    for profile in profiles:
+        if profile.count > max_queries:
+            raise AssertionError(f"Query budget of {max_queries} exceeded\n{profile.report()}")
+        if max_repeats is not None and profile.shapes:
+            worst = max(int(count) for count, _ in profile.shapes.values())
+            if worst > max_repeats:
+                raise AssertionError(f"Statement repeated {worst} times (max {max_repeats})\n{profile.report()}")
@@ -0,0 +1,207 @@
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.database import User
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.core.security import get_current_user_optional
+
+logger = logging.getLogger(__name__)
+
+# Token bucket refill in Redis; runs atomically so every worker shares one bucket per key.
+# Returns the number of seconds to wait (0 when the tokens were granted).
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+class MemoryBucketStore:
+    """Token buckets held in this process, at most ``max_keys`` of them"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill, time at which the bucket is full again], least recently used first
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Take tokens from a bucket; return 0 on success or the seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+
+            self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+            return wait
+
+    def _evict(self, now: float):
+        """Make room for one bucket, least recently used first"""
+        # Buckets that have refilled completely carry no state
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[2] > now:
+                break
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            # Keys spread so widely that none has refilled: the oldest goes anyway
+            # and starts full if it comes back
+            self._buckets.popitem(last=False)
+
+class RedisBucketStore:
+    """Token buckets shared across workers through Redis"""
+
+    def __init__(self, client, fallback: MemoryBucketStore):
+        self.client = client
+        self.fallback = fallback
+        self._script = client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        try:
+            return float(self._script(keys=[f"ratelimit:{key}"], args=[rate, capacity, cost]))
+        except Exception as e:
+            # Fail open onto local buckets rather than rejecting traffic
+            logger.warning("⚠️  Redis rate limit check failed (%s) - using local buckets", e)
+            return self.fallback.consume(key, rate, capacity, cost)
+
+class RateLimiter:
+    """Admission control for chat requests and LLM generations"""
+
+    def __init__(self):
+        self._store = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            memory_store = MemoryBucketStore()
+            client = get_redis() if settings.RATE_LIMIT_BACKEND == "redis" else None
+            self._store = RedisBucketStore(client, memory_store) if client is not None else memory_store
+        return self._store
+
+    def check(self, key: str, per_minute: float, burst: int, cost: float = 1.0):
+        """Consume from the bucket for ``key`` or raise a 429"""
+        wait = self.store.consume(key, per_minute / 60.0, float(burst), cost)
+        if wait > 0:
+            retry_after = max(1, math.ceil(wait))
+            logger.warning("🚦 Rate limit exceeded for %s - retry after %ss", key, retry_after)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+rate_limiter = RateLimiter()
+
+def get_client_ip(request: Request) -> str:
+    """Best-effort client address, honouring X-Forwarded-For behind a trusted proxy.
+
+    Each proxy appends the address it received the request from, so only
+    the right-hand end of the header can be trusted; the client can write
+    anything to its left. The right-most hop that is not one of
+    RATE_LIMIT_TRUSTED_PROXIES is the client.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()] if forwarded else []
+        for hop in reversed(hops):
+            if not _is_trusted_proxy(hop):
+                return hop
+        if hops:
+            return hops[0]
+    return request.client.host if request.client else "unknown"
+
+@lru_cache(maxsize=8)
+def _trusted_networks(proxies: str) -> tuple:
+    networks = []
+    for entry in proxies.split(","):
+        if entry.strip():
+            try:
+                networks.append(ipaddress.ip_network(entry.strip(), strict=False))
+            except ValueError:
+                logger.warning("⚠️  Ignoring invalid RATE_LIMIT_TRUSTED_PROXIES entry: %s", entry)
+    return tuple(networks)
+
+def _is_trusted_proxy(hop: str) -> bool:
+    networks = _trusted_networks(settings.RATE_LIMIT_TRUSTED_PROXIES)
+    if not networks:
+        return False
+    try:
+        address = ipaddress.ip_address(hop)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+def get_user_key(user: User) -> str:
+    """Bucket key for a user: anonymous users are keyed by their anonymous id"""
+    if user.anonymous_id is not None:
+        return f"anon:{user.anonymous_id}"
+    return f"user:{user.id}"
+
+def enforce_chat_rate_limit(
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user_optional)
+) -> None:
+    """Per-IP and per-user request buckets for chat endpoints"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    rate_limiter.check(
+        f"ip:{get_client_ip(request)}",
+        settings.RATE_LIMIT_IP_PER_MINUTE,
+        settings.RATE_LIMIT_IP_BURST
+    )
+    if current_user is not None:
+        rate_limiter.check(
+            get_user_key(current_user),
+            settings.RATE_LIMIT_USER_PER_MINUTE,
+            settings.RATE_LIMIT_USER_BURST
+        )
+
+def consume_llm_budget(user: User) -> None:
+    """Separate, slower bucket for provider calls made on behalf of a user"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    rate_limiter.check(
+        f"llm:{get_user_key(user)}",
+        settings.LLM_BUDGET_PER_HOUR / 60.0,
+        settings.LLM_BUDGET_BURST
+    )
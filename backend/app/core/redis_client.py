@@ -0,0 +1,33 @@
+import logging
+from typing import Optional, Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[Any] = None
+_unavailable = False
+
+def get_redis() -> Optional[Any]:
+    """Return a shared Redis client, or None if Redis can't be used"""
+    global _client, _unavailable
+
+    if _client is not None or _unavailable:
+        return _client
+
+    try:
+        import redis
+
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5
+        )
+        client.ping()
+        _client = client
+        logger.info("✅ Connected to Redis at %s", settings.REDIS_URL)
+    except Exception as e:
+        _unavailable = True
+        logger.warning("⚠️  Redis unavailable (%s) - falling back to in-process state", e)
+
+    return _client
@@ -0,0 +1,41 @@
+import random
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core.config import settings
+
+# Set by the request middleware for the duration of one request
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# False while handling a request that was not sampled: its success-path
+# (below WARNING) log records are dropped before they are queued
+request_sampled: ContextVar[bool] = ContextVar("request_sampled", default=True)
+
+class RequestSampler:
+    """Per-route sampling rates for success-path request logs.
+
+    ``LOG_SAMPLE_RATES`` maps path prefixes to rates, e.g.
+    ``/health=0,/api/v1/topics=0.1``; the longest matching prefix wins and
+    other paths use ``LOG_SAMPLE_RATE``.
+    """
+
+    def __init__(self, default_rate: float, rates: str = ""):
+        self.default_rate = default_rate
+        self.rates = []
+        for rule in rates.split(","):
+            prefix, _, rate = rule.strip().partition("=")
+            if prefix and rate:
+                self.rates.append((prefix.strip(), float(rate)))
+        self.rates.sort(key=lambda rule: len(rule[0]), reverse=True)
+
+    def rate(self, path: str) -> float:
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_rate
+
+    def sample(self, path: str) -> bool:
+        rate = self.rate(path)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+request_sampler = RequestSampler(settings.LOG_SAMPLE_RATE, settings.LOG_SAMPLE_RATES)
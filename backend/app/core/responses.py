@@ -0,0 +1,49 @@
+from typing import Any, Iterable, Sequence
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # falls back to pydantic's encoder
+    orjson = None
+
+# Same datetime format as the response models ("Z" for UTC, no micros when zero)
+ORJSON_OPTIONS = orjson.OPT_UTC_Z if orjson else 0
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    return to_json(content)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed.
+
+    Return it from an endpoint to skip the response model: FastAPI neither
+    validates nor re-encodes the content, so use it only for data the app
+    built itself. Keep ``response_model`` on the route for the OpenAPI docs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def rows_response(rows: Iterable[Any], fields: Sequence[str], response: Response = None) -> FastJSONResponse:
+    """Encode ORM objects, Core rows or dicts as a JSON list of ``fields``.
+
+    Headers already set on the endpoint's injected ``response`` (cursors,
+    caching) are carried over, since FastAPI drops them when a response
+    object is returned.
+    """
+    items = []
+    for row in rows:
+        if isinstance(row, dict):
+            items.append({field: row.get(field) for field in fields})
+        else:
+            items.append({field: getattr(row, field) for field in fields})
+    result = FastJSONResponse(items)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+        if response.status_code:
+            result.status_code = response.status_code
+    return result
@@ -5,10 +5,12 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+import hmac
 import uuid
 
 from app.database import get_db, User
 from app.core.config import settings
+from app.core.tracing import traced
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -62,6 +64,7 @@ def get_current_user(
     
     return user
 
+@traced("auth.current_user")
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
@@ -74,6 +77,20 @@ def get_current_user_optional(
     except HTTPException:
         return None
 
+def _token_matches(token: Optional[str], expected: str) -> bool:
+    """Constant-time comparison; an unset expected token matches nothing"""
+    return bool(expected and token and hmac.compare_digest(token.encode(), expected.encode()))
+
+def has_debug_access(token: Optional[str]) -> bool:
+    """Whether an X-Debug-Token value matches TRACE_DEBUG_TOKEN (never when it is unset)"""
+    return _token_matches(token, settings.TRACE_DEBUG_TOKEN)
+
+def has_metrics_access(authorization: Optional[str]) -> bool:
+    """Whether an Authorization header carries METRICS_TOKEN as a bearer token (never when it is unset)"""
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and _token_matches(token.strip(), settings.METRICS_TOKEN)
+
+@traced("auth.create_anonymous_user")
 def create_anonymous_user(db: Session) -> User:
     """Create an anonymous user for first-time visitors"""
     anonymous_id = f"anon_{uuid.uuid4().hex[:8]}"
@@ -0,0 +1,246 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_CHARS = 200
+
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+class Trace:
+    """One request's spans; the first span is the request itself"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(8).hex()
+        self.started_at = time.time()
+        self.root = Span(name, None, attributes)
+        self.spans: List[Span] = [self.root]
+        self.dropped = 0
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.root.end or time.perf_counter()
+        return (end - self.root.start) * 1000
+
+    def add(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Optional[Span]:
+        if len(self.spans) >= settings.TRACE_MAX_SPANS:
+            self.dropped += 1
+            return None
+        span = Span(name, (parent or self.root).span_id, attributes)
+        self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        depths = {self.root.span_id: 0}
+        spans = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            depth = depths.get(span.parent_id, -1) + 1
+            depths[span.span_id] = depth
+            end = span.end or self.root.end or span.start
+            spans.append({
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "depth": depth,
+                "offset_ms": round((span.start - self.root.start) * 1000, 3),
+                "duration_ms": round((end - span.start) * 1000, 3),
+                "attributes": span.attributes
+            })
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "dropped_spans": self.dropped,
+            "spans": spans
+        }
+
+def render_waterfall(trace: Dict[str, Any], width: int = 50) -> str:
+    """Text waterfall of a trace dict: offset, duration and a bar per span"""
+    total = trace["duration_ms"] or 1
+    lines = [f"{trace['name']}  {trace['duration_ms']:.1f}ms  trace={trace['trace_id']}  at {trace['started_at']}"]
+    for span in trace["spans"]:
+        start = min(width - 1, int(span["offset_ms"] / total * width))
+        length = max(1, min(width - start, round(span["duration_ms"] / total * width)))
+        bar = " " * start + "█" * length + " " * (width - start - length)
+        label = "  " * span["depth"] + span["name"]
+        detail = span["attributes"].get("statement")
+        lines.append(
+            f"{span['offset_ms']:9.1f}ms {span['duration_ms']:9.1f}ms |{bar}| {label}"
+            + (f"  {detail[:80]}" if detail else "")
+        )
+    if trace["dropped_spans"]:
+        lines.append(f"... {trace['dropped_spans']} more spans not recorded")
+    return "\n".join(lines)
+
+class Tracer:
+    """Per-request traces kept in a ring buffer, optionally appended to a file.
+
+    Spans are only recorded while a sampled request is being handled, so
+    instrumented code costs one context variable lookup otherwise. The file
+    exporter writes from a background thread.
+    """
+
+    def __init__(self):
+        self._buffer: deque = deque(maxlen=settings.TRACE_BUFFER_SIZE)
+        self._file_queue: Optional[queue.SimpleQueue] = None
+        self._lock = threading.Lock()
+
+    def start_trace(self, name: str, **attributes) -> Optional[Trace]:
+        """Begin a trace for the current context (None if tracing is off or not sampled)"""
+        if not settings.TRACE_ENABLED or random.random() >= settings.TRACE_SAMPLE_RATE:
+            return None
+        trace = Trace(name, attributes)
+        current_trace.set(trace)
+        current_span.set(trace.root)
+        return trace
+
+    def finish_trace(self, trace: Trace, name: Optional[str] = None, **attributes):
+        trace.root.end = time.perf_counter()
+        if name:
+            trace.root.name = name
+        trace.root.attributes.update(attributes)
+        self._buffer.append(trace)
+        if settings.TRACE_FILE:
+            self._export(trace)
+
+    def recent(self, limit: int = 10, min_ms: float = 0) -> List[Trace]:
+        """Slowest traces in the buffer, slowest first"""
+        traces = [trace for trace in list(self._buffer) if trace.duration_ms >= min_ms]
+        return sorted(traces, key=lambda trace: trace.duration_ms, reverse=True)[:limit]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return next((trace for trace in list(self._buffer) if trace.trace_id == trace_id), None)
+
+    def _export(self, trace: Trace):
+        if self._file_queue is None:
+            with self._lock:
+                if self._file_queue is None:
+                    self._file_queue = queue.SimpleQueue()
+                    threading.Thread(target=self._write_file, name="trace-export", daemon=True).start()
+        self._file_queue.put(trace)
+
+    def _write_file(self):
+        os.makedirs(os.path.dirname(settings.TRACE_FILE) or ".", exist_ok=True)
+        while True:
+            trace = self._file_queue.get()
+            try:
+                with open(settings.TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+            except OSError as e:
+                logger.warning("⚠️  Trace export failed: %s", e)
+
+    def instrument(self, engine: Engine):
+        """Record a span for every statement executed while a trace is active"""
+        if getattr(engine, "_mindease_traced", False):
+            return
+        engine._mindease_traced = True
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            trace = current_trace.get()
+            if trace is None:
+                return
+            span = trace.add("db.query", current_span.get(), {
+                "statement": " ".join(statement.split())[:STATEMENT_CHARS],
+                "executemany": executemany
+            })
+            conn.info.setdefault("trace_spans", []).append(span)
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            if current_trace.get() is not None:
+                _end_statement_span(conn)
+
+        @event.listens_for(engine, "handle_error")
+        def on_error(exception_context):
+            if exception_context.connection is not None:
+                span = _end_statement_span(exception_context.connection)
+                if span is not None:
+                    span.attributes["error"] = type(exception_context.original_exception).__name__
+
+def _end_statement_span(conn) -> Optional[Span]:
+    spans = conn.info.get("trace_spans")
+    if not spans:
+        return None
+    span = spans.pop()
+    if span is not None:
+        span.end = time.perf_counter()
+    return span
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span (no-op outside a trace)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    child = trace.add(name, current_span.get(), attributes)
+    if child is None:
+        yield None
+        return
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        current_span.reset(token)
+
+def traced(name: str):
+    """Decorator form of ``span`` for sync and async functions"""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TracedSession(Session):
+    """ORM session whose commits (including the flush) show up as spans"""
+
+    def commit(self):
+        with span("db.commit"):
+            super().commit()
+
+tracer = Tracer()
@@ -1,13 +1,15 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date, Boolean, ForeignKey, Float, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
 from app.core.config import settings
+from app.core.tracing import TracedSession
 import uuid
+from datetime import datetime
 
 # Database setup
 engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=TracedSession)
 Base = declarative_base()
 
 def get_db():
@@ -52,12 +54,18 @@ class Session(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_session_timestamp", "session_id", "timestamp", "id"),  # keyset pagination
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     session_id = Column(String, ForeignKey("sessions.id"))
     content = Column(Text)
     role = Column(String)  # "user" or "assistant"
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Set by the app to the microsecond: a turn and its reply often land in the
+    # same second, which is all CURRENT_TIMESTAMP resolves on SQLite, and ties
+    # would fall back to the random id order
+    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
     crisis_detected = Column(Boolean, default=False)
     
     # Relationships
@@ -79,6 +87,9 @@ class Topic(Base):
 
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
+    __table_args__ = (
+        Index("ix_mood_entries_user_created", "user_id", "created_at", "id"),  # keyset pagination
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"))
@@ -92,6 +103,9 @@ class MoodEntry(Base):
 
 class WellnessActivity(Base):
     __tablename__ = "wellness_activities"
+    __table_args__ = (
+        Index("ix_wellness_activities_user_created", "user_id", "created_at", "id"),  # keyset pagination
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"))
@@ -114,4 +128,90 @@ class Analytics(Base):
     date = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    user = relationship("User") 
\ No newline at end of file
+    user = relationship("User")
+
+class UserDailyRollup(Base):
+    __tablename__ = "user_daily_rollups"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC calendar day
+    session_count = Column(Integer, default=0, nullable=False)
+    message_count = Column(Integer, default=0, nullable=False)
+    crisis_count = Column(Integer, default=0, nullable=False)
+    mood_count = Column(Integer, default=0, nullable=False)
+    mood_intensity_sum = Column(Integer, default=0, nullable=False)
+    activity_count = Column(Integer, default=0, nullable=False)
+    activity_completed = Column(Integer, default=0, nullable=False)
+
+class UserDailyEmotionRollup(Base):
+    __tablename__ = "user_daily_emotion_rollups"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    emotion = Column(String, primary_key=True)
+    mood_count = Column(Integer, default=0, nullable=False)
+    mood_intensity_sum = Column(Integer, default=0, nullable=False)
+
+class UserDailyActivityRollup(Base):
+    __tablename__ = "user_daily_activity_rollups"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    activity_type = Column(String, primary_key=True)
+    activity_count = Column(Integer, default=0, nullable=False)
+    activity_completed = Column(Integer, default=0, nullable=False)
+
+class UserMoodStats(Base):
+    __tablename__ = "user_mood_stats"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    entry_count = Column(Integer, default=0, nullable=False)
+    ewma_intensity = Column(Float, nullable=True)  # exponentially weighted mean
+    mean_intensity = Column(Float, default=0.0, nullable=False)
+    m2 = Column(Float, default=0.0, nullable=False)  # Welford sum of squared deviations
+    last_logged_day = Column(Date, nullable=True)
+    current_streak = Column(Integer, default=0, nullable=False)  # consecutive days ending at last_logged_day
+    longest_streak = Column(Integer, default=0, nullable=False)
+    emotion_histograms = Column(Text, default="{}", nullable=False)  # JSON {emotion: counts for intensity 1-10}
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class SyncReceipt(Base):
+    __tablename__ = "sync_receipts"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    idempotency_key = Column(String, primary_key=True)  # generated by the client
+    kind = Column(String, nullable=False)  # "mood", "activity", "completion"
+    record_id = Column(String, nullable=False)  # row the item created or updated
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class UserActivityCalendar(Base):
+    __tablename__ = "user_activity_calendars"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    kind = Column(String, primary_key=True)  # "chatted", "mood_logged", "breathing_completed", ...
+    bits = Column(LargeBinary, nullable=False)  # bit n set = active on day n of the year (Jan 1 = 0)
+
+class UserTopicRecommendation(Base):
+    __tablename__ = "user_topic_recommendations"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    topic_ids = Column(Text, nullable=False)  # JSON list, best first
+    catalog_version = Column(String)  # topic catalog the scores were computed against
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class PendingGeneration(Base):
+    __tablename__ = "pending_generations"
+    
+    # Saved with the user's message and deleted with the assistant reply, so a
+    # row that outlives its request marks a turn that still needs a reply
+    user_message_id = Column(String, ForeignKey("messages.id"), primary_key=True)
+    session_id = Column(String, ForeignKey("sessions.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    session_type = Column(String, default="free_form")
+    emotion_context = Column(String, nullable=True)
+    topic_id = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # set by the worker retrying it
+    last_error = Column(Text, nullable=True)
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
+import logging
 
 from app.database import get_db, User, Session as DBSession, Message, MoodEntry, WellnessActivity, Analytics
 from app.core.security import get_current_user_optional
+from app.core.cache import response_cache
+from app.core.http_cache import conditional_get, user_etag, PRIVATE_REVALIDATE
+from app.services.analytics_rollup import analytics_rollups
+from app.services.mood_stats import mood_stats
+from app.services.activity_calendar import activity_calendar, CALENDAR_KINDS
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Pydantic models
 class AnalyticsResponse(BaseModel):
@@ -28,6 +35,8 @@ class UserInsights(BaseModel):
 
 @router.get("/insights", response_model=UserInsights)
 def get_user_insights(
+    request: Request,
+    response: Response,
     days: int = 30,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
@@ -39,77 +48,53 @@ def get_user_insights(
             detail="Authentication required"
         )
     
-    start_date = datetime.utcnow() - timedelta(days=days)
+    etag = user_etag(db, current_user.id, "analytics.insights", days=days)
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
     
-    # Get sessions
-    sessions = db.query(DBSession).filter(
-        and_(
-            DBSession.user_id == current_user.id,
-            DBSession.created_at >= start_date
-        )
-    ).all()
+    cache_key = response_cache.key(current_user.id, "analytics.insights", days=days)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Get messages
-    messages = db.query(Message).join(DBSession).filter(
-        and_(
-            DBSession.user_id == current_user.id,
-            Message.timestamp >= start_date
-        )
-    ).all()
+    today = datetime.utcnow().date()
+    start_day = today - timedelta(days=days)
     
-    # Get mood entries
-    mood_entries = db.query(MoodEntry).filter(
-        and_(
-            MoodEntry.user_id == current_user.id,
-            MoodEntry.created_at >= start_date
-        )
-    ).order_by(MoodEntry.created_at).all()
-    
-    # Get wellness activities
-    wellness_activities = db.query(WellnessActivity).filter(
-        and_(
-            WellnessActivity.user_id == current_user.id,
-            WellnessActivity.created_at >= start_date
-        )
-    ).all()
+    # Aggregates over the daily rollups; each query returns scalars only
+    totals = analytics_rollups.get_totals(db, current_user.id, start_day)
     
     # Calculate insights
-    total_sessions = len(sessions)
-    total_messages = len(messages)
+    total_sessions = totals["session_count"]
+    total_messages = totals["message_count"]
     
     # Average session length (messages per session)
     avg_session_length = total_messages / total_sessions if total_sessions > 0 else 0
     
     # Most active day
-    day_counts = {}
-    for session in sessions:
-        day = session.created_at.strftime("%A")
-        day_counts[day] = day_counts.get(day, 0) + 1
-    
-    most_active_day = max(day_counts.items(), key=lambda x: x[1])[0] if day_counts else "No activity"
+    most_active_day = analytics_rollups.get_most_active_weekday(db, current_user.id, start_day) or "No activity"
     
     # Mood trend (last 7 days)
-    mood_trend = []
-    for i in range(7):
-        date = datetime.utcnow() - timedelta(days=i)
-        day_entries = [entry for entry in mood_entries if entry.created_at.date() == date.date()]
-        if day_entries:
-            avg_intensity = sum(entry.intensity for entry in day_entries) / len(day_entries)
-            mood_trend.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "average_intensity": round(avg_intensity, 1),
-                "entries_count": len(day_entries)
-            })
+    mood_trend = [
+        {
+            "date": day.strftime("%Y-%m-%d"),
+            "average_intensity": round(intensity_sum / count, 1),
+            "entries_count": count
+        }
+        for day, count, intensity_sum in analytics_rollups.get_daily_mood(
+            db, current_user.id, max(start_day, today - timedelta(days=6))
+        )
+    ]
     
     # Wellness completion rate
-    total_wellness = len(wellness_activities)
-    completed_wellness = len([a for a in wellness_activities if a.completed])
+    total_wellness = totals["activity_count"]
+    completed_wellness = totals["activity_completed"]
     wellness_completion_rate = (completed_wellness / total_wellness * 100) if total_wellness > 0 else 0
     
     # Crisis detections
-    crisis_detections = len([msg for msg in messages if msg.crisis_detected])
+    crisis_detections = totals["crisis_count"]
     
-    return UserInsights(
+    insights = UserInsights(
         total_sessions=total_sessions,
         total_messages=total_messages,
         average_session_length=round(avg_session_length, 1),
@@ -118,9 +103,14 @@ def get_user_insights(
         wellness_completion_rate=round(wellness_completion_rate, 1),
         crisis_detections=crisis_detections
     )
+    
+    response_cache.set(cache_key, insights.model_dump())
+    return insights
 
 @router.get("/mood/trend")
 def get_mood_trend(
+    request: Request,
+    response: Response,
     days: int = 7,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
@@ -132,6 +122,16 @@ def get_mood_trend(
             detail="Authentication required"
         )
     
+    etag = user_etag(db, current_user.id, "analytics.mood_trend", days=days)
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    cache_key = response_cache.key(current_user.id, "analytics.mood_trend", days=days)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     start_date = datetime.utcnow() - timedelta(days=days)
     
     # Get mood entries grouped by date
@@ -146,7 +146,7 @@ def get_mood_trend(
         )
     ).group_by(func.date(MoodEntry.created_at)).order_by(func.date(MoodEntry.created_at)).all()
     
-    return [
+    trend = [
         {
             "date": str(entry.date),
             "average_intensity": round(float(entry.avg_intensity), 1),
@@ -154,9 +154,67 @@ def get_mood_trend(
         }
         for entry in mood_data
     ]
+    
+    response_cache.set(cache_key, trend)
+    return trend
+
+@router.get("/mood/stats")
+def get_mood_stats(
+    request: Request,
+    response: Response,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Get all-time running mood statistics: EWMA, variance, streaks and quantiles"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    
+    etag = user_etag(db, current_user.id, "analytics.mood_stats")
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    # A single pre-aggregated row, updated as mood entries are written
+    return mood_stats.summarize(mood_stats.get_stats(db, current_user.id))
+
+@router.get("/calendar")
+def get_activity_calendar(
+    request: Request,
+    response: Response,
+    kind: Optional[str] = None,
+    days: int = 365,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Get current and longest streaks and a daily activity heatmap"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    
+    if kind and kind not in CALENDAR_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Kind must be one of: {CALENDAR_KINDS}"
+        )
+    days = max(1, min(days, 366))
+    
+    etag = user_etag(db, current_user.id, "analytics.calendar", kind=kind, days=days)
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    # Served from the per-year bitsets; no history scan
+    return activity_calendar.get_summary(db, current_user.id, kind=kind, days=days)
 
 @router.get("/sessions/activity")
 def get_session_activity(
+    request: Request,
+    response: Response,
     days: int = 30,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
@@ -168,6 +226,16 @@ def get_session_activity(
             detail="Authentication required"
         )
     
+    etag = user_etag(db, current_user.id, "analytics.session_activity", days=days)
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    cache_key = response_cache.key(current_user.id, "analytics.session_activity", days=days)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     start_date = datetime.utcnow() - timedelta(days=days)
     
     # Get sessions grouped by date
@@ -181,16 +249,21 @@ def get_session_activity(
         )
     ).group_by(func.date(DBSession.created_at)).order_by(func.date(DBSession.created_at)).all()
     
-    return [
+    activity = [
         {
             "date": str(entry.date),
             "sessions_count": entry.count
         }
         for entry in session_data
     ]
+    
+    response_cache.set(cache_key, activity)
+    return activity
 
 @router.get("/wellness/progress")
 def get_wellness_progress(
+    request: Request,
+    response: Response,
     days: int = 30,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
@@ -202,46 +275,41 @@ def get_wellness_progress(
             detail="Authentication required"
         )
     
+    etag = user_etag(db, current_user.id, "analytics.wellness_progress", days=days)
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    cache_key = response_cache.key(current_user.id, "analytics.wellness_progress", days=days)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_day = datetime.utcnow().date() - timedelta(days=days)
         
-        # Get all wellness activities for the user
-        activities = db.query(WellnessActivity).filter(
-            and_(
-                WellnessActivity.user_id == current_user.id,
-                WellnessActivity.created_at >= start_date
-            )
-        ).all()
-        
-        # Group by activity type and calculate stats
-        activity_stats = {}
-        for activity in activities:
-            if activity.activity_type not in activity_stats:
-                activity_stats[activity.activity_type] = {"total": 0, "completed": 0}
-            
-            activity_stats[activity.activity_type]["total"] += 1
-            if activity.completed:
-                activity_stats[activity.activity_type]["completed"] += 1
+        # Totals per activity type, aggregated in the database
+        activity_stats = analytics_rollups.get_activity_breakdown(db, current_user.id, start_day)
         
         # Format response
         result = []
-        for activity_type, stats in activity_stats.items():
+        for activity_type, total, completed in activity_stats:
             completion_rate = 0.0
-            if stats["total"] > 0:
-                completion_rate = (stats["completed"] / stats["total"]) * 100
+            if total > 0:
+                completion_rate = (completed / total) * 100
             
             result.append({
                 "activity_type": activity_type,
-                "total": stats["total"],
-                "completed": stats["completed"],
+                "total": total,
+                "completed": completed,
                 "completion_rate": round(completion_rate, 1)
             })
         
+        response_cache.set(cache_key, result)
         return result
         
     except Exception as e:
-        # Log the error for debugging
-        print(f"Error in wellness progress: {str(e)}")
+        logger.exception("❌ Error in wellness progress: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -249,6 +317,8 @@ def get_wellness_progress(
 
 @router.get("/emotions/summary")
 def get_emotion_summary(
+    request: Request,
+    response: Response,
     days: int = 30,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
@@ -260,6 +330,16 @@ def get_emotion_summary(
             detail="Authentication required"
         )
     
+    etag = user_etag(db, current_user.id, "analytics.emotion_summary", days=days)
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    cache_key = response_cache.key(current_user.id, "analytics.emotion_summary", days=days)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     start_date = datetime.utcnow() - timedelta(days=days)
     
     # Get emotion counts
@@ -274,7 +354,7 @@ def get_emotion_summary(
         )
     ).group_by(MoodEntry.emotion).order_by(func.count(MoodEntry.id).desc()).all()
     
-    return [
+    summary = [
         {
             "emotion": entry.emotion,
             "count": entry.count,
@@ -282,6 +362,9 @@ def get_emotion_summary(
         }
         for entry in emotion_data
     ]
+    
+    response_cache.set(cache_key, summary)
+    return summary
 
 @router.post("/track")
 def track_analytics_event(
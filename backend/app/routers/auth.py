@@ -40,12 +40,12 @@ class AnonymousUserCreate(BaseModel):
 @router.post("/register", response_model=Token)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user with email and password"""
-    logger.info(f"🔐 Registration attempt for email: {user_data.email}")
+    logger.info("🔐 Registration attempt for email: %s", user_data.email)
     
     # Check if user already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
     if existing_user:
-        logger.warning(f"❌ Registration failed - Email already exists: {user_data.email}")
+        logger.warning("❌ Registration failed - Email already exists: %s", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -64,7 +64,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
     
-    logger.info(f"✅ User registered successfully: {user.id} ({user_data.email})")
+    logger.info("✅ User registered successfully: %s (%s)", user.id, user_data.email)
     
     return Token(
         access_token=access_token,
@@ -75,18 +75,18 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 def login(user_data: UserLogin, db: Session = Depends(get_db)):
     """Login with email and password"""
-    logger.info(f"🔑 Login attempt for email: {user_data.email}")
+    logger.info("🔑 Login attempt for email: %s", user_data.email)
     
     user = db.query(User).filter(User.email == user_data.email).first()
     if not user or not verify_password(user_data.password, str(user.hashed_password)):
-        logger.warning(f"❌ Login failed - Invalid credentials for: {user_data.email}")
+        logger.warning("❌ Login failed - Invalid credentials for: %s", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
     if not bool(user.is_active):
-        logger.warning(f"❌ Login failed - Inactive user: {user_data.email}")
+        logger.warning("❌ Login failed - Inactive user: %s", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
@@ -95,7 +95,7 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
     
-    logger.info(f"✅ User logged in successfully: {user.id} ({user_data.email})")
+    logger.info("✅ User logged in successfully: %s (%s)", user.id, user_data.email)
     
     return Token(
         access_token=access_token,
@@ -107,23 +107,23 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
 @router.post("/anonymous", response_model=Token)
 def create_anonymous_session(user_data: AnonymousUserCreate, db: Session = Depends(get_db)):
     """Create or retrieve anonymous user session"""
-    logger.info(f"👤 Anonymous session creation - ID: {user_data.anonymous_id or 'new'}")
+    logger.info("👤 Anonymous session creation - ID: %s", user_data.anonymous_id or 'new')
     
     if user_data.anonymous_id:
         # Try to get existing anonymous user
-        logger.debug(f"🔍 Looking for existing anonymous user: {user_data.anonymous_id}")
+        logger.debug("🔍 Looking for existing anonymous user: %s", user_data.anonymous_id)
         user = get_or_create_anonymous_user(user_data.anonymous_id, db)
-        logger.info(f"✅ Retrieved existing anonymous user: {user.id}")
+        logger.info("✅ Retrieved existing anonymous user: %s", user.id)
     else:
         # Create new anonymous user
         logger.debug("🆕 Creating new anonymous user")
         user = create_anonymous_user(db)
-        logger.info(f"✅ Created new anonymous user: {user.id}")
+        logger.info("✅ Created new anonymous user: %s", user.id)
     
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
     
-    logger.info(f"🎫 Anonymous session token created for user: {user.id}")
+    logger.info("🎫 Anonymous session token created for user: %s", user.id)
     
     return Token(
         access_token=access_token,
@@ -135,7 +135,7 @@ def create_anonymous_session(user_data: AnonymousUserCreate, db: Session = Depen
 @router.get("/me")
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
-    logger.info(f"👤 User info requested for: {current_user.id}")
+    logger.info("👤 User info requested for: %s", current_user.id)
     return {
         "id": current_user.id,
         "email": current_user.email,
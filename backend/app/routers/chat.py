@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
-import openai
-import anthropic
 from datetime import datetime
 import logging
 
 from app.database import get_db, User, Session as DBSession, Message
 from app.core.security import get_current_user_optional
 from app.core.config import settings
-from app.services.ai_service import AIService
-from app.services.crisis_detection import CrisisDetectionService
+from app.core.cache import response_cache
+from app.core.drain import track_generation
+from app.core.metrics import crisis_detections
+from app.core.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.core.responses import rows_response
+from app.core.rate_limit import enforce_chat_rate_limit, consume_llm_budget
+from app.services.ai_service import get_ai_service
+from app.services.crisis_detection import get_crisis_service
+from app.services.analytics_rollup import analytics_rollups
+from app.services.pending_generations import pending_generations
+from app.services.activity_calendar import activity_calendar
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -42,9 +49,8 @@ class SessionResponse(BaseModel):
     topic_id: Optional[str] = None
     created_at: datetime
 
-# Initialize services
-ai_service = AIService()
-crisis_service = CrisisDetectionService()
+# Fields of a message in the session history
+MESSAGE_FIELDS = ("id", "content", "role", "timestamp", "crisis_detected")
 
 @router.post("/session", response_model=SessionResponse)
 def create_chat_session(
@@ -53,14 +59,14 @@ def create_chat_session(
     db: Session = Depends(get_db)
 ):
     """Create a new chat session"""
-    logger.info(f"💬 Creating chat session - Type: {session_data.session_type}")
+    logger.info("💬 Creating chat session - Type: %s", session_data.session_type)
     
     if not current_user:
         # Create anonymous user if no authenticated user
         logger.info("👤 No authenticated user, creating anonymous user")
         from app.core.security import create_anonymous_user
         current_user = create_anonymous_user(db)
-        logger.info(f"✅ Created anonymous user: {current_user.id}")
+        logger.info("✅ Created anonymous user: %s", current_user.id)
     
     # Create new session
     db_session = DBSession(
@@ -70,10 +76,12 @@ def create_chat_session(
         topic_id=session_data.topic_id
     )
     db.add(db_session)
+    analytics_rollups.record_session(db, current_user.id)
     db.commit()
+    response_cache.invalidate_user(current_user.id)
     db.refresh(db_session)
     
-    logger.info(f"✅ Chat session created: {db_session.id} for user: {current_user.id}")
+    logger.info("✅ Chat session created: %s for user: %s", db_session.id, current_user.id)
     
     return SessionResponse(
         session_id=str(db_session.id),
@@ -83,28 +91,36 @@ def create_chat_session(
         created_at=db_session.created_at
     )
 
-@router.post("/message", response_model=ChatResponse)
+@router.post(
+    "/message",
+    response_model=ChatResponse,
+    dependencies=[Depends(enforce_chat_rate_limit), Depends(track_generation)]
+)
 async def send_message(
     message_data: ChatMessage,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
     """Send a message and get AI response"""
-    logger.info(f"💬 Processing message for session: {message_data.session_id}")
-    logger.debug(f"📝 Message content: {message_data.content[:100]}...")
+    logger.info("💬 Processing message for session: %s", message_data.session_id)
+    logger.debug("📝 Message content: %.100s...", message_data.content)
     
     if not current_user:
         # Create anonymous user if no authenticated user
         logger.info("👤 No authenticated user, creating anonymous user")
         from app.core.security import create_anonymous_user
         current_user = create_anonymous_user(db)
-        logger.info(f"✅ Created anonymous user: {current_user.id}")
+        logger.info("✅ Created anonymous user: %s", current_user.id)
+    
+    # Reject before saving anything if the user's generation budget is spent
+    consume_llm_budget(current_user)
     
     # Check for crisis indicators
     logger.debug("🔍 Checking for crisis indicators...")
-    crisis_detected = crisis_service.detect_crisis(message_data.content)
+    crisis_detected = get_crisis_service().detect_crisis(message_data.content)
     if crisis_detected:
-        logger.warning(f"🚨 Crisis detected in message from user: {current_user.id}")
+        logger.warning("🚨 Crisis detected in message from user: %s", current_user.id)
+        crisis_detections.inc()
     
     # Save user message
     logger.debug("💾 Saving user message to database...")
@@ -115,13 +131,21 @@ async def send_message(
         crisis_detected=crisis_detected
     )
     db.add(user_message)
+    # Marks the turn as awaiting a reply until the reply is saved
+    pending_generations.record(
+        db, user_message, current_user.id, message_data.session_type,
+        message_data.emotion_context, message_data.topic_id
+    )
+    analytics_rollups.record_messages(db, current_user.id, crisis_count=1 if crisis_detected else 0)
+    activity_calendar.mark(db, current_user.id, "chatted")
     db.commit()
-    logger.debug(f"✅ User message saved with ID: {user_message.id}")
+    response_cache.invalidate_user(current_user.id)
+    logger.debug("✅ User message saved with ID: %s", user_message.id)
     
     # Get AI response
     logger.info("🤖 Generating AI response...")
     try:
-        ai_response = await ai_service.generate_response(
+        ai_response = await get_ai_service().generate_response(
             message=message_data.content,
             session_type=message_data.session_type,
             emotion_context=message_data.emotion_context,
@@ -129,25 +153,31 @@ async def send_message(
             user_id=str(current_user.id)
         )
         logger.info("✅ AI response generated successfully")
-        logger.debug(f"🤖 AI response: {ai_response[:100]}...")
+        logger.debug("🤖 AI response: %.100s...", ai_response)
     except Exception as e:
-        logger.error(f"❌ Error generating AI response: {str(e)}")
+        logger.error("❌ Error generating AI response: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating AI response: {str(e)}"
         )
     
-    # Save AI response
-    logger.debug("💾 Saving AI response to database...")
-    ai_message = Message(
-        session_id=message_data.session_id,
-        content=ai_response,
-        role="assistant",
-        crisis_detected=crisis_detected
-    )
-    db.add(ai_message)
-    db.commit()
-    logger.debug(f"✅ AI message saved with ID: {ai_message.id}")
+    # Save AI response, unless the turn went stale and a retry took it over
+    if pending_generations.complete(db, user_message.id):
+        logger.debug("💾 Saving AI response to database...")
+        ai_message = Message(
+            session_id=message_data.session_id,
+            content=ai_response,
+            role="assistant",
+            crisis_detected=crisis_detected
+        )
+        db.add(ai_message)
+        analytics_rollups.record_messages(db, current_user.id, crisis_count=1 if crisis_detected else 0)
+        db.commit()
+        response_cache.invalidate_user(current_user.id)
+        logger.debug("✅ AI message saved with ID: %s", ai_message.id)
+    else:
+        db.rollback()
+        logger.warning("⚠️  Reply for message %s not saved: a retry has claimed it", user_message.id)
     
     response_data = {
         "message": ai_response,
@@ -164,18 +194,25 @@ async def send_message(
             "message": "If you're having thoughts of self-harm, please reach out for help immediately."
         }
     
-    logger.info(f"✅ Message processing completed for session: {message_data.session_id}")
+    logger.info("✅ Message processing completed for session: %s", message_data.session_id)
     
     return ChatResponse(**response_data)
 
 @router.get("/session/{session_id}/messages")
 def get_session_messages(
     session_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
-    """Get all messages for a specific session"""
-    logger.info(f"📋 Retrieving messages for session: {session_id}")
+    """Get a page of messages for a specific session, oldest first.
+
+    Without a cursor this is the newest page; X-Prev-Cursor leads to
+    earlier messages.
+    """
+    logger.info("📋 Retrieving messages for session: %s", session_id)
     
     if not current_user:
         logger.warning("❌ Unauthorized access attempt to session messages")
@@ -191,28 +228,28 @@ def get_session_messages(
     ).first()
     
     if not session:
-        logger.warning(f"❌ Session not found or unauthorized: {session_id}")
+        logger.warning("❌ Session not found or unauthorized: %s", session_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
     
-    messages = db.query(Message).filter(
-        Message.session_id == session_id
-    ).order_by(Message.timestamp).all()
+    page = paginate(
+        db.query(
+            Message.id, Message.content, Message.role, Message.timestamp, Message.crisis_detected
+        ).filter(Message.session_id == session_id),
+        Message.timestamp,
+        Message.id,
+        cursor=cursor,
+        limit=limit,
+        timestamp_attr="timestamp",
+        from_end=True
+    )
+    page.apply_headers(response)
     
-    logger.info(f"✅ Retrieved {len(messages)} messages for session: {session_id}")
+    logger.info("✅ Retrieved %d messages for session: %s", len(page.items), session_id)
     
-    return [
-        {
-            "id": msg.id,
-            "content": msg.content,
-            "role": msg.role,
-            "timestamp": msg.timestamp,
-            "crisis_detected": msg.crisis_detected
-        }
-        for msg in messages
-    ]
+    return rows_response(page.items, MESSAGE_FIELDS, response)
 
 @router.post("/session/{session_id}/end")
 def end_session(
@@ -221,7 +258,7 @@ def end_session(
     db: Session = Depends(get_db)
 ):
     """End a chat session"""
-    logger.info(f"🔚 Ending session: {session_id}")
+    logger.info("🔚 Ending session: %s", session_id)
     
     if not current_user:
         logger.warning("❌ Unauthorized attempt to end session")
@@ -236,13 +273,13 @@ def end_session(
     ).first()
     
     if not session:
-        logger.warning(f"❌ Session not found or unauthorized: {session_id}")
+        logger.warning("❌ Session not found or unauthorized: %s", session_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
     
     # Mark session as ended (you might want to add an 'ended_at' field to your model)
-    logger.info(f"✅ Session ended: {session_id}")
+    logger.info("✅ Session ended: %s", session_id)
     
     return {"message": "Session ended successfully"} 
\ No newline at end of file
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import logging
+
+from app.core.security import has_debug_access
+from app.core.tracing import tracer, render_waterfall
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def require_debug_access(x_debug_token: Optional[str] = Header(None)):
+    """Requires X-Debug-Token to match TRACE_DEBUG_TOKEN; 404 when no token is configured"""
+    # Not relaxed in DEBUG mode: DEBUG defaults on, and traces carry SQL and paths
+    if not has_debug_access(x_debug_token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+@router.get("/traces", dependencies=[Depends(require_debug_access)])
+def get_slowest_traces(limit: int = 10, min_ms: float = 0, format: str = "text"):
+    """Slowest recent traces handled by this worker, as waterfalls"""
+    traces = [trace.to_dict() for trace in tracer.recent(limit=max(1, min(limit, 100)), min_ms=min_ms)]
+    if format == "json":
+        return traces
+    return PlainTextResponse("\n\n".join(render_waterfall(trace) for trace in traces) + "\n")
+
+@router.get("/traces/{trace_id}", dependencies=[Depends(require_debug_access)])
+def get_trace(trace_id: str, format: str = "text"):
+    """One trace by the id from a response's X-Trace-Id header"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trace not found (it may have been evicted or handled by another worker)"
+        )
+    if format == "json":
+        return trace.to_dict()
+    return PlainTextResponse(render_waterfall(trace.to_dict()) + "\n")
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+import logging
+
+from app.database import User
+from app.core.security import get_current_user_optional
+from app.services.data_export import data_exporter, RECORD_TYPES, EXPORT_FORMATS
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+@router.get("")
+def export_user_data(
+    format: str = "ndjson",
+    types: Optional[str] = None,
+    gzip: bool = False,
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """Stream the user's full history (sessions, messages, mood entries, wellness activities)"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {EXPORT_FORMATS}"
+        )
+    
+    record_types = RECORD_TYPES
+    if types:
+        record_types = [t.strip() for t in types.split(",") if t.strip()]
+        invalid = [t for t in record_types if t not in RECORD_TYPES]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Types must be among: {RECORD_TYPES}"
+            )
+    
+    logger.info("📦 Exporting data for user %s as %s (gzip=%s)", current_user.id, format, gzip)
+    
+    filename = f"mindease-export-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        data_exporter.stream(str(current_user.id), format, record_types, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, Optional
+import logging
+import time
+
+from app.core.config import settings
+from app.core.drain import generation_drain
+from app.core.security import has_debug_access
+from app.database import engine
+from app.services.ai_service import get_ai_service
+from app.services.warmup import warmup
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/live")
+async def liveness():
+    """The process is up and serving; says nothing about its dependencies"""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness():
+    """503 until this worker's warm-up has finished, and again once it starts draining"""
+    if generation_drain.draining:
+        return JSONResponse(status_code=503, content={"status": "draining"})
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup.to_dict()})
+    return {"status": "ready"}
+
+@router.get("/deep")
+def deep_health(x_debug_token: Optional[str] = Header(None)):
+    """Database latency, pool saturation, provider circuits and warm-up, for this worker.
+
+    503 if the database cannot be queried; "degraded" (still 200) when the
+    pool is nearly exhausted, warm-up is unfinished or replies are coming
+    from the canned fallback. Which providers are configured and how their
+    circuits stand is only shown with the debug token (as for /debug).
+    """
+    detailed = has_debug_access(x_debug_token)
+    problems = []
+    pool = _pool_status()
+    if pool.get("saturation", 0) >= settings.HEALTH_POOL_SATURATION_WARN:
+        problems.append("db pool saturated")
+
+    database: Dict[str, Any] = {"pool": pool}
+    if pool.get("saturation", 0) >= 1:
+        # Checking out a connection would wait for one to be returned
+        database["status"] = "skipped"
+    else:
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+            database["status"] = "ok"
+            database["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        except Exception as e:
+            logger.error("❌ Deep health check: database unavailable: %s", e)
+            database["status"] = "error"
+            database["error"] = type(e).__name__
+
+    providers = get_ai_service().provider_status()
+    ai_problems = []
+    if not any(provider["configured"] for provider in providers.values()):
+        ai_problems.append("no AI provider configured")
+    for name, provider in providers.items():
+        if provider["configured"] and provider["circuit"]["state"] != "closed":
+            ai_problems.append(f"{name} circuit {provider['circuit']['state']}")
+    if ai_problems:
+        problems.extend(ai_problems if detailed else ["AI provider degraded"])
+    if not warmup.ready:
+        problems.append("warm-up not finished")
+
+    if database["status"] == "error":
+        status = "unhealthy"
+    else:
+        status = "degraded" if problems else "healthy"
+    body = {
+        "status": status,
+        "problems": problems,
+        "database": database,
+        "warmup": warmup.to_dict()
+    }
+    if detailed:
+        body["ai"] = {"provider": settings.AI_PROVIDER, "providers": providers}
+    return JSONResponse(status_code=503 if status == "unhealthy" else 200, content=body)
+
+def _pool_status() -> Dict[str, Any]:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"class": type(pool).__name__}
+    # QueuePool can open max_overflow connections beyond its size
+    capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+    checked_out = pool.checkedout()
+    return {
+        "class": type(pool).__name__,
+        "checked_out": checked_out,
+        "size": pool.size(),
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 0
+    }
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+from app.database import get_db, User
+from app.core.security import get_current_user_optional
+from app.core.pagination import DEFAULT_PAGE_SIZE
+from app.core.responses import rows_response
+from app.services.history_search import history_search, SEARCH_KINDS
+
+router = APIRouter()
+
+# Pydantic models
+class SearchResult(BaseModel):
+    kind: str  # "message" or "mood"
+    id: str
+    session_id: Optional[str] = None
+    created_at: datetime
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+
+SEARCH_RESULT_FIELDS = tuple(SearchResult.model_fields)
+
+@router.get("", response_model=List[SearchResult])
+def search_history(
+    q: str,
+    response: Response,
+    types: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Search the user's own chat messages and mood notes, newest first"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    
+    kinds = SEARCH_KINDS
+    if types:
+        kinds = [t.strip() for t in types.split(",") if t.strip()]
+        if any(t not in SEARCH_KINDS for t in kinds):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Types must be among: {SEARCH_KINDS}"
+            )
+    
+    page = history_search.search(db, current_user.id, q, kinds=kinds, cursor=cursor, limit=limit)
+    page.apply_headers(response)
+    response.headers["Cache-Control"] = "private, no-store"
+    
+    return rows_response(page.items, SEARCH_RESULT_FIELDS, response)
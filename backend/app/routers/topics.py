@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime, date
+from datetime import datetime
 
 from app.database import get_db, User, Topic
 from app.core.security import get_current_user_optional
+from app.core.config import settings
+from app.core.responses import rows_response
+from app.core.http_cache import conditional_get, make_etag, PUBLIC_SHORT, PUBLIC_LONG, PRIVATE_REVALIDATE
+from app.services.topic_catalog import topic_catalog
+from app.services.topic_recommendations import topic_recommender
 
 router = APIRouter()
 
@@ -19,99 +24,69 @@ class TopicResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
+class TopicSearchResult(TopicResponse):
+    score: float
+
+# Fields of the list endpoints, which skip response-model validation
+TOPIC_RESPONSE_FIELDS = tuple(TopicResponse.model_fields)
+TOPIC_SEARCH_FIELDS = tuple(TopicSearchResult.model_fields)
+
 class TopicCreate(BaseModel):
     title: str
     subtitle: str
     description: str
     category: str
 
-# Sample daily topics (in production, these would come from a database or external API)
-SAMPLE_TOPICS = [
-    {
-        "id": "topic_1",
-        "title": "Monday Motivation",
-        "subtitle": "How are you starting your week?",
-        "description": "Share your thoughts on starting a new week and any goals or challenges you're facing.",
-        "category": "workplace",
-        "is_active": True
-    },
-    {
-        "id": "topic_2", 
-        "title": "Workplace Stress",
-        "subtitle": "Dealing with deadline pressure",
-        "description": "Let's talk about managing stress and pressure in the workplace.",
-        "category": "workplace",
-        "is_active": True
-    },
-    {
-        "id": "topic_3",
-        "title": "Social Connections", 
-        "subtitle": "Feeling isolated lately?",
-        "description": "Discuss the importance of social connections and how to maintain them.",
-        "category": "social",
-        "is_active": True
-    },
-    {
-        "id": "topic_4",
-        "title": "Self-Care Sunday",
-        "subtitle": "What does self-care mean to you?",
-        "description": "Explore different ways to practice self-care and prioritize your well-being.",
-        "category": "personal",
-        "is_active": True
-    },
-    {
-        "id": "topic_5",
-        "title": "Digital Wellness",
-        "subtitle": "Balancing screen time and mental health",
-        "description": "How do you manage your relationship with technology and social media?",
-        "category": "personal",
-        "is_active": True
-    }
-]
-
 @router.get("/daily", response_model=List[TopicResponse])
 def get_daily_topics(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
-    """Get daily conversation topics"""
-    # In a real implementation, you might:
-    # 1. Get topics from database
-    # 2. Rotate topics based on date
-    # 3. Personalize based on user preferences
-    
-    topics = SAMPLE_TOPICS
-    
-    if category:
-        topics = [t for t in topics if t["category"] == category]
-    
-    return [
-        TopicResponse(
-            id=topic["id"],
-            title=topic["title"],
-            subtitle=topic["subtitle"],
-            description=topic["description"],
-            category=topic["category"],
-            is_active=topic["is_active"],
-            created_at=datetime.utcnow()
-        )
-        for topic in topics
-    ]
+    """Get daily conversation topics, personalized when recommendations exist"""
+    catalog = topic_catalog.get(db)
+    today = datetime.utcnow().date()
+    
+    # Precomputed by recommend_topics.py; no scoring happens here
+    recommended = topic_recommender.get_topic_ids(db, current_user.id) if current_user else []
+    # The body depends on who asks, so shared caches must key on Authorization either way
+    if recommended:
+        etag = make_etag(catalog.version, "daily", today, category, *recommended)
+        not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    else:
+        etag = make_etag(catalog.version, "daily", today, category)
+        not_modified = conditional_get(request, response, etag, PUBLIC_SHORT, vary="Authorization")
+    if not_modified:
+        return not_modified
+    
+    # Recommendations first, then today's rotation (precomputed per category)
+    topics = [
+        catalog.by_id[topic_id] for topic_id in recommended
+        if topic_id in catalog.by_id and (not category or catalog.by_id[topic_id]["category"] == category)
+    ][:settings.DAILY_TOPIC_COUNT]
+    for topic in catalog.daily(today, category):
+        if len(topics) >= settings.DAILY_TOPIC_COUNT:
+            break
+        if topic not in topics:
+            topics.append(topic)
+    
+    # Catalog entries are already plain dicts
+    return rows_response(topics, TOPIC_RESPONSE_FIELDS, response)
 
 @router.get("/daily/random", response_model=TopicResponse)
 def get_random_daily_topic(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
-    """Get a random daily topic"""
-    import random
-    
-    topics = SAMPLE_TOPICS
-    
-    if category:
-        topics = [t for t in topics if t["category"] == category]
+    """Get the topic of the day"""
+    catalog = topic_catalog.get(db)
+    today = datetime.utcnow().date()
+    topics = catalog.daily(today, category)
     
     if not topics:
         raise HTTPException(
@@ -119,35 +94,65 @@ def get_random_daily_topic(
             detail="No topics found for the specified category"
         )
     
-    topic = random.choice(topics)
+    not_modified = conditional_get(request, response, make_etag(catalog.version, "random", today, category), PUBLIC_SHORT)
+    if not_modified:
+        return not_modified
     
-    return TopicResponse(
-        id=topic["id"],
-        title=topic["title"],
-        subtitle=topic["subtitle"],
-        description=topic["description"],
-        category=topic["category"],
-        is_active=topic["is_active"],
-        created_at=datetime.utcnow()
-    )
+    # Same pick for everyone all day, so it can be cached like the rest
+    return TopicResponse(**topics[0])
 
 @router.get("/categories")
 def get_topic_categories(
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    request: Request,
+    response: Response,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
 ):
     """Get available topic categories"""
-    categories = list(set(topic["category"] for topic in SAMPLE_TOPICS))
-    return {"categories": categories}
+    catalog = topic_catalog.get(db)
+    
+    not_modified = conditional_get(request, response, make_etag(catalog.version, "categories"), PUBLIC_LONG)
+    if not_modified:
+        return not_modified
+    
+    return {"categories": catalog.categories}
+
+@router.get("/search", response_model=List[TopicSearchResult])
+def search_topics(
+    q: str,
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    limit: int = 10,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Search topic titles, subtitles and descriptions"""
+    catalog = topic_catalog.get(db)
+    limit = max(1, min(limit, 50))
+    
+    not_modified = conditional_get(
+        request, response, make_etag(catalog.version, "search", q, category, limit), PUBLIC_SHORT
+    )
+    if not_modified:
+        return not_modified
+    
+    results = catalog.search_index.search(q, limit=limit, category=category)
+    return rows_response(
+        [{**topic, "score": score} for topic, score in results], TOPIC_SEARCH_FIELDS, response
+    )
 
 @router.get("/{topic_id}", response_model=TopicResponse)
 def get_topic_by_id(
     topic_id: str,
+    request: Request,
+    response: Response,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
     """Get a specific topic by ID"""
-    # In a real implementation, this would query the database
-    topic = next((t for t in SAMPLE_TOPICS if t["id"] == topic_id), None)
+    catalog = topic_catalog.get(db)
+    topic = catalog.by_id.get(topic_id)
     
     if not topic:
         raise HTTPException(
@@ -155,15 +160,11 @@ def get_topic_by_id(
             detail="Topic not found"
         )
     
-    return TopicResponse(
-        id=topic["id"],
-        title=topic["title"],
-        subtitle=topic["subtitle"],
-        description=topic["description"],
-        category=topic["category"],
-        is_active=topic["is_active"],
-        created_at=datetime.utcnow()
-    )
+    not_modified = conditional_get(request, response, make_etag(catalog.version, "topic", topic_id), PUBLIC_LONG)
+    if not_modified:
+        return not_modified
+    
+    return TopicResponse(**topic)
 
 # Admin endpoints (for managing topics)
 @router.post("/", response_model=TopicResponse)
@@ -191,6 +192,8 @@ def create_topic(
     db.add(topic)
     db.commit()
     db.refresh(topic)
+    # Serve the new topic from this worker right away; others reload within the TTL
+    topic_catalog.refresh(db)
     
     return TopicResponse(
         id=topic.id,
@@ -214,17 +217,8 @@ def get_all_topics(
             detail="Admin access required"
         )
     
-    topics = db.query(Topic).filter(Topic.is_active == True).all()
-    
-    return [
-        TopicResponse(
-            id=topic.id,
-            title=topic.title,
-            subtitle=topic.subtitle,
-            description=topic.description,
-            category=topic.category,
-            is_active=topic.is_active,
-            created_at=topic.created_at
-        )
-        for topic in topics
-    ] 
\ No newline at end of file
+    topics = db.query(
+        Topic.id, Topic.title, Topic.subtitle, Topic.description, Topic.category, Topic.is_active, Topic.created_at
+    ).filter(Topic.is_active == True).all()
+    
+    return rows_response(topics, TOPIC_RESPONSE_FIELDS) 
\ No newline at end of file
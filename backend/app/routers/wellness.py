@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from datetime import datetime, timedelta
 
 from app.database import get_db, User, MoodEntry, WellnessActivity
 from app.core.security import get_current_user_optional
+from app.core.cache import response_cache
+from app.core.http_cache import conditional_get, user_etag, PRIVATE_REVALIDATE
+from app.core.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.core.responses import rows_response
+from app.services.analytics_rollup import analytics_rollups
+from app.services.mood_stats import mood_stats
+from app.services.activity_calendar import activity_calendar
+from app.services.wellness_sync import wellness_sync, VALID_ACTIVITIES
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -34,9 +44,50 @@ class WellnessActivityResponse(BaseModel):
     feedback_rating: Optional[int] = None
     created_at: datetime
 
+# Fields of the list endpoints, which skip response-model validation
+MOOD_ENTRY_FIELDS = tuple(MoodEntryResponse.model_fields)
+WELLNESS_ACTIVITY_FIELDS = tuple(WellnessActivityResponse.model_fields)
+
 class WellnessActivityComplete(BaseModel):
     feedback_rating: Optional[int] = None  # 1-5 scale
 
+class SyncMoodEntry(BaseModel):
+    client_id: str  # idempotency key generated by the client
+    emotion: str
+    intensity: int  # 1-10 scale
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None  # when it was logged offline
+
+class SyncWellnessActivity(BaseModel):
+    client_id: str
+    activity_type: str
+    duration: int
+    created_at: Optional[datetime] = None
+
+class SyncActivityCompletion(BaseModel):
+    client_id: str
+    activity_id: Optional[str] = None  # server id of an already synced activity
+    activity_client_id: Optional[str] = None  # or the client_id it was synced with
+    feedback_rating: Optional[int] = None
+
+class WellnessSyncRequest(BaseModel):
+    moods: List[SyncMoodEntry] = []
+    activities: List[SyncWellnessActivity] = []
+    completions: List[SyncActivityCompletion] = []
+
+class SyncItemResult(BaseModel):
+    client_id: str
+    kind: str  # "mood", "activity", "completion"
+    status: str  # "applied", "duplicate", "rejected"
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class WellnessSyncResponse(BaseModel):
+    applied: int
+    duplicates: int
+    rejected: int
+    results: List[SyncItemResult]
+
 @router.post("/mood", response_model=MoodEntryResponse)
 def create_mood_entry(
     mood_data: MoodEntryCreate,
@@ -63,7 +114,11 @@ def create_mood_entry(
         notes=mood_data.notes
     )
     db.add(mood_entry)
+    analytics_rollups.record_mood(db, current_user.id, mood_data.emotion, mood_data.intensity)
+    mood_stats.record(db, current_user.id, mood_data.emotion, mood_data.intensity)
+    activity_calendar.mark(db, current_user.id, "mood_logged")
     db.commit()
+    response_cache.invalidate_user(current_user.id)
     db.refresh(mood_entry)
     
     return MoodEntryResponse(
@@ -76,11 +131,14 @@ def create_mood_entry(
 
 @router.get("/mood", response_model=List[MoodEntryResponse])
 def get_mood_entries(
+    response: Response,
     days: int = 7,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
-    """Get mood entries for the specified number of days"""
+    """Get a page of mood entries for the specified number of days, newest first"""
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,21 +147,23 @@ def get_mood_entries(
     
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    entries = db.query(MoodEntry).filter(
-        MoodEntry.user_id == current_user.id,
-        MoodEntry.created_at >= start_date
-    ).order_by(MoodEntry.created_at.desc()).all()
+    # Only the response columns, as plain rows encoded straight to JSON
+    page = paginate(
+        db.query(
+            MoodEntry.id, MoodEntry.emotion, MoodEntry.intensity, MoodEntry.notes, MoodEntry.created_at
+        ).filter(
+            MoodEntry.user_id == current_user.id,
+            MoodEntry.created_at >= start_date
+        ),
+        MoodEntry.created_at,
+        MoodEntry.id,
+        cursor=cursor,
+        limit=limit,
+        descending=True
+    )
+    page.apply_headers(response)
     
-    return [
-        MoodEntryResponse(
-            id=entry.id,
-            emotion=entry.emotion,
-            intensity=entry.intensity,
-            notes=entry.notes,
-            created_at=entry.created_at
-        )
-        for entry in entries
-    ]
+    return rows_response(page.items, MOOD_ENTRY_FIELDS, response)
 
 @router.post("/activity", response_model=WellnessActivityResponse)
 def create_wellness_activity(
@@ -118,11 +178,10 @@ def create_wellness_activity(
             detail="Authentication required for wellness activities"
         )
     
-    valid_activities = ["breathing", "affirmations", "reframing"]
-    if activity_data.activity_type not in valid_activities:
+    if activity_data.activity_type not in VALID_ACTIVITIES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Activity type must be one of: {valid_activities}"
+            detail=f"Activity type must be one of: {VALID_ACTIVITIES}"
         )
     
     activity = WellnessActivity(
@@ -131,7 +190,9 @@ def create_wellness_activity(
         duration=activity_data.duration
     )
     db.add(activity)
+    analytics_rollups.record_activity(db, current_user.id, activity_data.activity_type)
     db.commit()
+    response_cache.invalidate_user(current_user.id)
     db.refresh(activity)
     
     return WellnessActivityResponse(
@@ -168,6 +229,7 @@ def complete_wellness_activity(
             detail="Activity not found"
         )
     
+    was_completed = bool(activity.completed)
     activity.completed = True
     if completion_data.feedback_rating:
         if not 1 <= completion_data.feedback_rating <= 5:
@@ -177,7 +239,13 @@ def complete_wellness_activity(
             )
         activity.feedback_rating = completion_data.feedback_rating
     
+    if not was_completed:
+        analytics_rollups.record_activity_completion(
+            db, current_user.id, activity.activity_type, activity.created_at
+        )
+        activity_calendar.mark(db, current_user.id, f"{activity.activity_type}_completed")
     db.commit()
+    response_cache.invalidate_user(current_user.id)
     db.refresh(activity)
     
     return WellnessActivityResponse(
@@ -191,11 +259,14 @@ def complete_wellness_activity(
 
 @router.get("/activity", response_model=List[WellnessActivityResponse])
 def get_wellness_activities(
+    response: Response,
     days: int = 30,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
-    """Get wellness activities for the specified number of days"""
+    """Get a page of wellness activities for the specified number of days, newest first"""
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -204,25 +275,73 @@ def get_wellness_activities(
     
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    activities = db.query(WellnessActivity).filter(
-        WellnessActivity.user_id == current_user.id,
-        WellnessActivity.created_at >= start_date
-    ).order_by(WellnessActivity.created_at.desc()).all()
+    page = paginate(
+        db.query(
+            WellnessActivity.id, WellnessActivity.activity_type, WellnessActivity.duration,
+            WellnessActivity.completed, WellnessActivity.feedback_rating, WellnessActivity.created_at
+        ).filter(
+            WellnessActivity.user_id == current_user.id,
+            WellnessActivity.created_at >= start_date
+        ),
+        WellnessActivity.created_at,
+        WellnessActivity.id,
+        cursor=cursor,
+        limit=limit,
+        descending=True
+    )
+    page.apply_headers(response)
+    
+    return rows_response(page.items, WELLNESS_ACTIVITY_FIELDS, response)
+
+@router.post("/sync", response_model=WellnessSyncResponse)
+def sync_wellness_data(
+    sync_data: WellnessSyncRequest,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Apply a batch of offline mood entries, activities and completions"""
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
     
-    return [
-        WellnessActivityResponse(
-            id=activity.id,
-            activity_type=activity.activity_type,
-            duration=activity.duration,
-            completed=activity.completed,
-            feedback_rating=activity.feedback_rating,
-            created_at=activity.created_at
+    item_count = len(sync_data.moods) + len(sync_data.activities) + len(sync_data.completions)
+    if item_count > settings.WELLNESS_SYNC_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.WELLNESS_SYNC_MAX_ITEMS} items per sync"
         )
-        for activity in activities
-    ]
+    
+    # A concurrent replay of the same queue can win the race for a key;
+    # the retry then sees its receipts and reports those items as duplicates
+    for attempt in range(2):
+        try:
+            results = wellness_sync.apply(
+                db, current_user.id, sync_data.moods, sync_data.activities, sync_data.completions
+            )
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+    
+    counts = {name: sum(1 for r in results if r["status"] == name) for name in ("applied", "duplicate", "rejected")}
+    if counts["applied"]:
+        response_cache.invalidate_user(current_user.id)
+    
+    return WellnessSyncResponse(
+        applied=counts["applied"],
+        duplicates=counts["duplicate"],
+        rejected=counts["rejected"],
+        results=results
+    )
 
 @router.get("/stats")
 def get_wellness_stats(
+    request: Request,
+    response: Response,
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
@@ -233,37 +352,34 @@ def get_wellness_stats(
             detail="Authentication required"
         )
     
-    # Get last 30 days
-    start_date = datetime.utcnow() - timedelta(days=30)
+    etag = user_etag(db, current_user.id, "wellness.stats")
+    not_modified = conditional_get(request, response, etag, PRIVATE_REVALIDATE, vary="Authorization")
+    if not_modified:
+        return not_modified
     
-    # Mood stats
-    mood_entries = db.query(MoodEntry).filter(
-        MoodEntry.user_id == current_user.id,
-        MoodEntry.created_at >= start_date
-    ).all()
+    cache_key = response_cache.key(current_user.id, "wellness.stats")
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Wellness activity stats
-    wellness_activities = db.query(WellnessActivity).filter(
-        WellnessActivity.user_id == current_user.id,
-        WellnessActivity.created_at >= start_date
-    ).all()
+    # Get last 30 days
+    start_day = datetime.utcnow().date() - timedelta(days=30)
+    
+    # Aggregated from the daily rollups rather than raw mood and activity rows
+    totals = analytics_rollups.get_totals(db, current_user.id, start_day)
     
     # Calculate stats
-    total_mood_entries = len(mood_entries)
-    avg_mood_intensity = sum(entry.intensity for entry in mood_entries) / total_mood_entries if total_mood_entries > 0 else 0
+    total_mood_entries = totals["mood_count"]
+    avg_mood_intensity = totals["mood_intensity_sum"] / total_mood_entries if total_mood_entries > 0 else 0
     
-    total_activities = len(wellness_activities)
-    completed_activities = len([a for a in wellness_activities if a.completed])
+    total_activities = totals["activity_count"]
+    completed_activities = totals["activity_completed"]
     completion_rate = (completed_activities / total_activities * 100) if total_activities > 0 else 0
     
-    # Most common emotions
-    emotion_counts = {}
-    for entry in mood_entries:
-        emotion_counts[entry.emotion] = emotion_counts.get(entry.emotion, 0) + 1
+    # Most common emotion
+    most_common_emotion = analytics_rollups.get_top_emotion(db, current_user.id, start_day)
     
-    most_common_emotion = max(emotion_counts.items(), key=lambda x: x[1])[0] if emotion_counts else None
-    
-    return {
+    stats = {
         "mood_stats": {
             "total_entries": total_mood_entries,
             "average_intensity": round(avg_mood_intensity, 1),
@@ -274,4 +390,7 @@ def get_wellness_stats(
             "completed_activities": completed_activities,
             "completion_rate": round(completion_rate, 1)
         }
-    } 
\ No newline at end of file
+    }
+    
+    response_cache.set(cache_key, stats)
+    return stats
@@ -0,0 +1,162 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable
+from sqlalchemy import func, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import sqlite, postgresql
+
+from app.database import Session as DBSession, Message, MoodEntry, WellnessActivity, UserActivityCalendar
+
+CALENDAR_KINDS = [
+    "chatted",
+    "mood_logged",
+    "breathing_completed",
+    "affirmations_completed",
+    "reframing_completed"
+]
+YEAR_BYTES = 46  # 366 bits
+
+def _year_mask(day: date) -> int:
+    return 1 << (day.timetuple().tm_yday - 1)
+
+def _run_ending_at(bits: int, index: int) -> int:
+    """Length of the run of set bits ending at ``index``"""
+    if index < 0 or not (bits >> index) & 1:
+        return 0
+    # The highest clear bit at or below index marks where the run starts
+    clear_below = ~bits & ((1 << (index + 1)) - 1)
+    return index + 1 - clear_below.bit_length()
+
+def _longest_run(bits: int) -> int:
+    """Length of the longest run of set bits; one shift per day of that run"""
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+class ActivityCalendarService:
+    """One bit per user, activity kind and UTC day.
+
+    Each (user, year, kind) row is a 46-byte bitset, so a user's whole
+    history is a handful of rows and streaks and heatmaps are computed with
+    shifts and masks instead of scanning sessions, moods and activities.
+    """
+
+    def mark(self, db: Session, user_id: str, kind: str, when: Optional[datetime] = None):
+        """Set the bit for the day of ``when`` (default today); caller commits"""
+        self.mark_days(db, user_id, kind, [when.date() if when else datetime.utcnow().date()])
+
+    def mark_days(self, db: Session, user_id: str, kind: str, days: Iterable[date]):
+        masks: Dict[int, int] = defaultdict(int)
+        for day in days:
+            masks[day.year] |= _year_mask(day)
+
+        for year, mask in masks.items():
+            # Most writes land on a day that is already set: check without locking first
+            current = db.query(UserActivityCalendar.bits).filter(
+                UserActivityCalendar.user_id == user_id,
+                UserActivityCalendar.year == year,
+                UserActivityCalendar.kind == kind
+            ).scalar()
+            if current is not None and int.from_bytes(current, "little") & mask == mask:
+                continue
+
+            row = self._get_for_update(db, user_id, year, kind)
+            row.bits = (int.from_bytes(row.bits, "little") | mask).to_bytes(YEAR_BYTES, "little")
+
+    def get_summary(
+        self,
+        db: Session,
+        user_id: str,
+        kind: Optional[str] = None,
+        days: int = 365,
+        today: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """Streaks and a ``days``-long heatmap ending today, for one kind or any"""
+        today = today or datetime.utcnow().date()
+        start = today - timedelta(days=days - 1)
+
+        query = db.query(UserActivityCalendar).filter(UserActivityCalendar.user_id == user_id)
+        if kind:
+            query = query.filter(UserActivityCalendar.kind == kind)
+        rows = query.all()
+
+        # Lay every year end to end: bit i is day base + i
+        base = date(min([row.year for row in rows] + [start.year]), 1, 1)
+        timelines: Dict[str, int] = defaultdict(int)
+        for row in rows:
+            timelines[row.kind] |= int.from_bytes(row.bits, "little") << (date(row.year, 1, 1) - base).days
+        combined = 0
+        for bits in timelines.values():
+            combined |= bits
+
+        today_index = (today - base).days
+        start_index = (start - base).days
+        window_mask = (1 << days) - 1
+
+        # Per-day count of active kinds (0/1 when a single kind is asked for)
+        heatmap = [0] * days
+        for bits in timelines.values():
+            window = (bits >> start_index) & window_mask
+            while window:
+                low = window & -window
+                heatmap[low.bit_length() - 1] += 1
+                window ^= low
+
+        # A streak is still current if the user was active today or yesterday
+        current_streak = _run_ending_at(combined, today_index) or _run_ending_at(combined, today_index - 1)
+
+        return {
+            "kind": kind or "any",
+            "current_streak": current_streak,
+            "longest_streak": _longest_run(combined),
+            "active_days": bin((combined >> start_index) & window_mask).count("1"),
+            "start": start.isoformat(),
+            "end": today.isoformat(),
+            "heatmap": heatmap
+        }
+
+    def rebuild(self, db: Session, user_id: str):
+        """Recompute a user's calendars from sessions, mood entries and activities"""
+        def days_of(column, *filters) -> List[date]:
+            return [
+                value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+                for (value,) in db.query(func.date(column)).filter(*filters).distinct()
+            ]
+
+        db.execute(delete(UserActivityCalendar).where(UserActivityCalendar.user_id == user_id))
+        self.mark_days(db, user_id, "chatted", days_of(
+            Message.timestamp,
+            Message.session_id.in_(db.query(DBSession.id).filter(DBSession.user_id == user_id)),
+            Message.role == "user"
+        ))
+        self.mark_days(db, user_id, "mood_logged", days_of(MoodEntry.created_at, MoodEntry.user_id == user_id))
+        for kind in CALENDAR_KINDS:
+            if kind.endswith("_completed"):
+                # There is no completion timestamp; the start day stands in for it
+                self.mark_days(db, user_id, kind, days_of(
+                    WellnessActivity.created_at,
+                    WellnessActivity.user_id == user_id,
+                    WellnessActivity.activity_type == kind[:-len("_completed")],
+                    WellnessActivity.completed == True
+                ))
+        db.commit()
+
+    def _get_for_update(self, db: Session, user_id: str, year: int, kind: str) -> UserActivityCalendar:
+        """Load (creating if needed) a calendar row, locked until commit where supported"""
+        keys = {"user_id": user_id, "year": year, "kind": kind}
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            db.execute(insert(UserActivityCalendar).values(**keys, bits=bytes(YEAR_BYTES)).on_conflict_do_nothing(
+                index_elements=list(keys)
+            ))
+
+        row = db.query(UserActivityCalendar).filter_by(**keys).with_for_update().first()
+        if row is None:
+            row = UserActivityCalendar(**keys, bits=bytes(YEAR_BYTES))
+            db.add(row)
+        return row
+
+activity_calendar = ActivityCalendarService()
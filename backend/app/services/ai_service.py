@@ -1,36 +1,88 @@
-import openai
-import anthropic
+import asyncio
 from typing import Optional, List, Dict, Any
+from functools import lru_cache
 from sqlalchemy.orm import Session
 import json
 
+from app.core.circuit_breaker import CircuitBreaker, CLOSED
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import traced
 from app.database import get_db, Message, Session as DBSession
 
+PROVIDERS = ("openai", "anthropic")
+
+# Shared by every request in this worker: a provider that keeps failing is
+# skipped (canned fallback replies) until its circuit half-opens again
+provider_circuits: Dict[str, CircuitBreaker] = {
+    provider: CircuitBreaker(provider, settings.AI_CIRCUIT_FAILURE_THRESHOLD, settings.AI_CIRCUIT_RESET_SECONDS)
+    for provider in PROVIDERS
+}
+
+metrics.gauge_callback(
+    "mindease_ai_circuit_open", "1 while a provider's circuit is open or half-open", ("provider",),
+    lambda: [((provider,), int(circuit.state != CLOSED)) for provider, circuit in provider_circuits.items()]
+)
+
 class AIService:
+    """Chat replies from the configured provider, with canned fallbacks.
+
+    Provider SDKs are heavy to import, so each client (and its SDK) is
+    only loaded the first time that provider is used, or by ``warm_up``.
+    """
+
     def __init__(self):
-        self.openai_client = None
-        self.anthropic_client = None
-        
-        if settings.OPENAI_API_KEY:
+        self._clients: Dict[str, Any] = {}
+    
+    @property
+    def openai_client(self):
+        return self._get_client("openai")
+    
+    @property
+    def anthropic_client(self):
+        return self._get_client("anthropic")
+    
+    def _get_client(self, provider: str):
+        if provider not in self._clients:
+            self._clients[provider] = self._create_client(provider)
+        return self._clients[provider]
+    
+    def _create_client(self, provider: str):
+        if provider == "openai":
+            if not settings.OPENAI_API_KEY:
+                print("⚠️  OPENAI_API_KEY not set - using fallback responses")
+                return None
             try:
-                self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+                import openai
+                client = openai.OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+                    max_retries=settings.AI_REQUEST_MAX_RETRIES
+                )
                 print("✅ OpenAI client initialized successfully")
+                return client
             except Exception as e:
                 print(f"❌ Error initializing OpenAI client: {e}")
-        else:
-            print("⚠️  OPENAI_API_KEY not set - using fallback responses")
+                return None
         
         # Initialize Anthropic client
-        if settings.ANTHROPIC_API_KEY:
-            try:
-                self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-                print("✅ Anthropic client initialized successfully")
-            except Exception as e:
-                print(f"❌ Error initializing Anthropic client: {e}")
-        else:
+        if not settings.ANTHROPIC_API_KEY:
             print("⚠️  ANTHROPIC_API_KEY not set - using fallback responses")
+            return None
+        try:
+            import anthropic
+            client = anthropic.Anthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+                max_retries=settings.AI_REQUEST_MAX_RETRIES
+            )
+            print("✅ Anthropic client initialized successfully")
+            return client
+        except Exception as e:
+            print(f"❌ Error initializing Anthropic client: {e}")
+            return None
     
+    @traced("llm.generate")
     async def generate_response(
         self,
         message: str,
@@ -56,16 +108,51 @@ class AIService:
         # Prepare messages for AI
         messages = self._prepare_messages(system_prompt, conversation_history, message)
         
+        provider = self._active_provider()
+        if provider is None or not provider_circuits[provider].allow():
+            return self._generate_fallback_response(message)
+        
+        circuit = provider_circuits[provider]
         try:
-            if settings.AI_PROVIDER == "anthropic" and self.anthropic_client:
-                return await self._generate_anthropic_response(messages)
-            elif self.openai_client:
-                return await self._generate_openai_response(messages)
+            if provider == "anthropic":
+                response = await self._generate_anthropic_response(messages)
             else:
-                return self._generate_fallback_response(message)
+                response = await self._generate_openai_response(messages)
         except Exception as e:
             print(f"Error generating AI response: {e}")
+            circuit.record_failure()
             return self._generate_fallback_response(message)
+        except BaseException:
+            # Cancelled (client gone, shutdown): no verdict, but a half-open
+            # trial must not stay reserved forever
+            circuit.release()
+            raise
+        circuit.record_success()
+        return response
+    
+    def _active_provider(self) -> Optional[str]:
+        """AI_PROVIDER if its client is available, else OpenAI if available"""
+        if settings.AI_PROVIDER == "anthropic" and self.anthropic_client:
+            return "anthropic"
+        if self.openai_client:
+            return "openai"
+        return None
+    
+    def warm_up(self) -> Optional[str]:
+        """Load the provider client (and SDK) requests will use; returns its name"""
+        return self._active_provider()
+    
+    def provider_status(self) -> Dict[str, Any]:
+        """Per provider: key configured, client loaded in this worker, circuit state"""
+        keys = {"openai": settings.OPENAI_API_KEY, "anthropic": settings.ANTHROPIC_API_KEY}
+        return {
+            provider: {
+                "configured": bool(keys[provider]),
+                "loaded": self._clients.get(provider) is not None,
+                "circuit": provider_circuits[provider].to_dict()
+            }
+            for provider in PROVIDERS
+        }
     
     def _build_system_prompt(
         self,
@@ -94,27 +181,30 @@ Guidelines:
         
         return base_prompt
     
+    @traced("llm.history")
     async def _get_conversation_history(self, user_id: str) -> List[Dict[str, str]]:
         """Get recent conversation history for context"""
         db = next(get_db())
         try:
             # Get recent sessions and messages
-            recent_sessions = db.query(DBSession).filter(
+            recent_sessions = db.query(DBSession.id).filter(
                 DBSession.user_id == user_id
             ).order_by(DBSession.created_at.desc()).limit(3).all()
             
-            history = []
-            for session in recent_sessions:
-                messages = db.query(Message).filter(
-                    Message.session_id == session.id
+            # One query for all three sessions' messages, regrouped by session below
+            session_ids = [session.id for session in recent_sessions]
+            by_session: Dict[str, List[Dict[str, str]]] = {session_id: [] for session_id in session_ids}
+            if session_ids:
+                messages = db.query(Message.session_id, Message.role, Message.content).filter(
+                    Message.session_id.in_(session_ids)
                 ).order_by(Message.timestamp).all()
-                
                 for msg in messages:
-                    history.append({
+                    by_session[msg.session_id].append({
                         "role": msg.role,
                         "content": msg.content
                     })
             
+            history = [msg for session_id in session_ids for msg in by_session[session_id]]
             return history[-10:]  # Keep last 10 messages for context
         finally:
             db.close()
@@ -143,9 +233,12 @@ Guidelines:
         
         return messages
     
+    @traced("llm.openai")
     async def _generate_openai_response(self, messages: List[Dict[str, str]]) -> str:
         """Generate response using OpenAI API"""
-        response = self.openai_client.chat.completions.create(
+        # The SDK client is blocking; keep the event loop free while it waits
+        response = await asyncio.to_thread(
+            self.openai_client.chat.completions.create,
             model="gpt-4o-mini",
             messages=messages,
             max_tokens=300,
@@ -153,6 +246,7 @@ Guidelines:
         )
         return response.choices[0].message.content.strip()
     
+    @traced("llm.anthropic")
     async def _generate_anthropic_response(self, messages: List[Dict[str, str]]) -> str:
         """Generate response using Anthropic API"""
         # Convert messages to Anthropic format
@@ -167,7 +261,8 @@ Guidelines:
         
         prompt += "Assistant:"
         
-        response = self.anthropic_client.messages.create(
+        response = await asyncio.to_thread(
+            self.anthropic_client.messages.create,
             model="claude-3-haiku-20240307",
             max_tokens=300,
             temperature=0.7,
@@ -186,4 +281,9 @@ Guidelines:
         ]
         
         import random
-        return random.choice(fallback_responses) 
\ No newline at end of file
+        return random.choice(fallback_responses) 
+
+@lru_cache(maxsize=None)
+def get_ai_service() -> AIService:
+    """Shared AIService, built on first use"""
+    return AIService()
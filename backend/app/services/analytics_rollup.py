@@ -0,0 +1,342 @@
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any
+from sqlalchemy import Integer, func, case, cast, extract, update, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import sqlite, postgresql
+
+from app.database import (
+    Session as DBSession,
+    Message,
+    MoodEntry,
+    WellnessActivity,
+    UserDailyRollup,
+    UserDailyEmotionRollup,
+    UserDailyActivityRollup
+)
+
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+def _as_date(value: Any) -> date:
+    """Normalise a DATE() result (a string on SQLite) or timestamp to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def _day(when: Optional[datetime]) -> date:
+    return when.date() if when is not None else datetime.utcnow().date()
+
+class AnalyticsRollupService:
+    """Per-user, per-day counters kept next to the raw tables.
+
+    Writers call the ``record_*`` methods inside the same transaction as the
+    row they insert, so the rollups commit (or roll back) with it. ``backfill``
+    recomputes a user's rows from the raw tables to reconcile any drift.
+    """
+
+    def record_session(self, db: Session, user_id: str, when: Optional[datetime] = None):
+        self._increment(db, UserDailyRollup, {"user_id": user_id, "day": _day(when)}, {"session_count": 1})
+
+    def record_messages(
+        self,
+        db: Session,
+        user_id: str,
+        count: int = 1,
+        crisis_count: int = 0,
+        when: Optional[datetime] = None
+    ):
+        self._increment(
+            db,
+            UserDailyRollup,
+            {"user_id": user_id, "day": _day(when)},
+            {"message_count": count, "crisis_count": crisis_count}
+        )
+
+    def record_mood(self, db: Session, user_id: str, emotion: str, intensity: int, when: Optional[datetime] = None):
+        day = _day(when)
+        self._increment(
+            db,
+            UserDailyRollup,
+            {"user_id": user_id, "day": day},
+            {"mood_count": 1, "mood_intensity_sum": intensity}
+        )
+        self._increment(
+            db,
+            UserDailyEmotionRollup,
+            {"user_id": user_id, "day": day, "emotion": emotion},
+            {"mood_count": 1, "mood_intensity_sum": intensity}
+        )
+
+    def record_activity(
+        self,
+        db: Session,
+        user_id: str,
+        activity_type: str,
+        when: Optional[datetime] = None,
+        completed: bool = False
+    ):
+        deltas = {"activity_count": 1, "activity_completed": 1 if completed else 0}
+        day = _day(when)
+        self._increment(db, UserDailyRollup, {"user_id": user_id, "day": day}, deltas)
+        self._increment(
+            db,
+            UserDailyActivityRollup,
+            {"user_id": user_id, "day": day, "activity_type": activity_type},
+            deltas
+        )
+
+    def record_activity_completion(
+        self,
+        db: Session,
+        user_id: str,
+        activity_type: str,
+        created_at: Optional[datetime] = None
+    ):
+        """Count a completion against the day the activity was started"""
+        day = _day(created_at)
+        self._increment(db, UserDailyRollup, {"user_id": user_id, "day": day}, {"activity_completed": 1})
+        self._increment(
+            db,
+            UserDailyActivityRollup,
+            {"user_id": user_id, "day": day, "activity_type": activity_type},
+            {"activity_completed": 1}
+        )
+
+    def record_batch(
+        self,
+        db: Session,
+        user_id: str,
+        moods: List[tuple] = (),
+        activities: List[tuple] = (),
+        completions: List[tuple] = ()
+    ):
+        """Fold many writes into one upsert per touched rollup row.
+
+        ``moods`` holds (emotion, intensity, when), ``activities`` holds
+        (activity_type, when, completed) and ``completions`` holds
+        (activity_type, created_at) tuples.
+        """
+        daily: Dict[date, Dict[str, int]] = {}
+        by_emotion: Dict[tuple, Dict[str, int]] = {}
+        by_activity: Dict[tuple, Dict[str, int]] = {}
+
+        def add(target: Dict[Any, Dict[str, int]], key: Any, deltas: Dict[str, int]):
+            row = target.setdefault(key, {})
+            for column, delta in deltas.items():
+                row[column] = row.get(column, 0) + delta
+
+        for emotion, intensity, when in moods:
+            deltas = {"mood_count": 1, "mood_intensity_sum": intensity}
+            add(daily, _day(when), deltas)
+            add(by_emotion, (_day(when), emotion), deltas)
+        for activity_type, when, completed in activities:
+            deltas = {"activity_count": 1, "activity_completed": 1 if completed else 0}
+            add(daily, _day(when), deltas)
+            add(by_activity, (_day(when), activity_type), deltas)
+        for activity_type, created_at in completions:
+            add(daily, _day(created_at), {"activity_completed": 1})
+            add(by_activity, (_day(created_at), activity_type), {"activity_completed": 1})
+
+        for day, deltas in daily.items():
+            self._increment(db, UserDailyRollup, {"user_id": user_id, "day": day}, deltas)
+        for (day, emotion), deltas in by_emotion.items():
+            self._increment(db, UserDailyEmotionRollup, {"user_id": user_id, "day": day, "emotion": emotion}, deltas)
+        for (day, activity_type), deltas in by_activity.items():
+            self._increment(
+                db,
+                UserDailyActivityRollup,
+                {"user_id": user_id, "day": day, "activity_type": activity_type},
+                deltas
+            )
+
+    def get_totals(self, db: Session, user_id: str, start_day: date) -> Dict[str, int]:
+        """Sum every daily counter over the window in a single aggregate query"""
+        columns = [
+            "session_count", "message_count", "crisis_count",
+            "mood_count", "mood_intensity_sum",
+            "activity_count", "activity_completed"
+        ]
+        row = db.query(
+            *[func.coalesce(func.sum(getattr(UserDailyRollup, column)), 0) for column in columns]
+        ).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= start_day
+        ).one()
+        return {column: int(value) for column, value in zip(columns, row)}
+
+    def data_version(self, db: Session, user_id: str) -> str:
+        """Fingerprint of everything the user has written, for HTTP validators.
+
+        Every session, message, mood entry, activity and completion adds to
+        a counter here in the same commit, so the sums change with each
+        write and read the same from every worker.
+        """
+        columns = [
+            "session_count", "message_count", "crisis_count",
+            "mood_count", "mood_intensity_sum",
+            "activity_count", "activity_completed"
+        ]
+        row = db.query(
+            func.count(),
+            *[func.coalesce(func.sum(getattr(UserDailyRollup, column)), 0) for column in columns]
+        ).filter(UserDailyRollup.user_id == user_id).one()
+        return "-".join(str(int(value)) for value in row)
+
+    def get_most_active_weekday(self, db: Session, user_id: str, start_day: date) -> Optional[str]:
+        """Weekday name with the most sessions in the window, or None"""
+        if db.get_bind().dialect.name == "sqlite":
+            weekday = cast(func.strftime("%w", UserDailyRollup.day), Integer)
+        else:
+            weekday = cast(extract("dow", UserDailyRollup.day), Integer)
+        sessions = func.sum(UserDailyRollup.session_count)
+
+        row = db.query(weekday, sessions).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= start_day,
+            UserDailyRollup.session_count > 0
+        ).group_by(weekday).order_by(sessions.desc()).first()
+
+        # SQL weekday numbering starts at Sunday = 0
+        return WEEKDAYS[int(row[0])] if row else None
+
+    def get_daily_mood(self, db: Session, user_id: str, start_day: date) -> List[Any]:
+        """(day, mood_count, mood_intensity_sum) for days with mood entries, newest first"""
+        return db.query(
+            UserDailyRollup.day,
+            UserDailyRollup.mood_count,
+            UserDailyRollup.mood_intensity_sum
+        ).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= start_day,
+            UserDailyRollup.mood_count > 0
+        ).order_by(UserDailyRollup.day.desc()).all()
+
+    def get_top_emotion(self, db: Session, user_id: str, start_day: date) -> Optional[str]:
+        count = func.sum(UserDailyEmotionRollup.mood_count)
+        row = db.query(UserDailyEmotionRollup.emotion, count).filter(
+            UserDailyEmotionRollup.user_id == user_id,
+            UserDailyEmotionRollup.day >= start_day
+        ).group_by(UserDailyEmotionRollup.emotion).order_by(count.desc()).first()
+        return row[0] if row else None
+
+    def get_activity_breakdown(self, db: Session, user_id: str, start_day: date) -> List[Any]:
+        """(activity_type, total, completed) per activity type in the window"""
+        return db.query(
+            UserDailyActivityRollup.activity_type,
+            func.sum(UserDailyActivityRollup.activity_count).label("total"),
+            func.sum(UserDailyActivityRollup.activity_completed).label("completed")
+        ).filter(
+            UserDailyActivityRollup.user_id == user_id,
+            UserDailyActivityRollup.day >= start_day
+        ).group_by(UserDailyActivityRollup.activity_type).all()
+
+    def backfill(self, db: Session, user_id: str, start_day: Optional[date] = None) -> int:
+        """Rebuild a user's rollups from the raw tables; returns the number of days written"""
+        daily: Dict[date, Dict[str, int]] = {}
+        emotions: Dict[tuple, Dict[str, int]] = {}
+        activities: Dict[tuple, Dict[str, int]] = {}
+
+        def day_row(day: date) -> Dict[str, int]:
+            return daily.setdefault(day, {
+                "session_count": 0, "message_count": 0, "crisis_count": 0,
+                "mood_count": 0, "mood_intensity_sum": 0,
+                "activity_count": 0, "activity_completed": 0
+            })
+
+        session_day = func.date(DBSession.created_at)
+        sessions = db.query(session_day, func.count(DBSession.id)).filter(DBSession.user_id == user_id)
+        if start_day:
+            sessions = sessions.filter(DBSession.created_at >= start_day)
+        for day, count in sessions.group_by(session_day):
+            day_row(_as_date(day))["session_count"] = count
+
+        message_day = func.date(Message.timestamp)
+        messages = db.query(
+            message_day,
+            func.count(Message.id),
+            func.sum(case((Message.crisis_detected == True, 1), else_=0))
+        ).join(DBSession, Message.session_id == DBSession.id).filter(DBSession.user_id == user_id)
+        if start_day:
+            messages = messages.filter(Message.timestamp >= start_day)
+        for day, count, crisis in messages.group_by(message_day):
+            row = day_row(_as_date(day))
+            row["message_count"] = count
+            row["crisis_count"] = int(crisis or 0)
+
+        mood_day = func.date(MoodEntry.created_at)
+        moods = db.query(
+            mood_day,
+            MoodEntry.emotion,
+            func.count(MoodEntry.id),
+            func.sum(MoodEntry.intensity)
+        ).filter(MoodEntry.user_id == user_id)
+        if start_day:
+            moods = moods.filter(MoodEntry.created_at >= start_day)
+        for day, emotion, count, intensity_sum in moods.group_by(mood_day, MoodEntry.emotion):
+            day = _as_date(day)
+            row = day_row(day)
+            row["mood_count"] += count
+            row["mood_intensity_sum"] += int(intensity_sum or 0)
+            emotions[(day, emotion)] = {"mood_count": count, "mood_intensity_sum": int(intensity_sum or 0)}
+
+        activity_day = func.date(WellnessActivity.created_at)
+        wellness = db.query(
+            activity_day,
+            WellnessActivity.activity_type,
+            func.count(WellnessActivity.id),
+            func.sum(case((WellnessActivity.completed == True, 1), else_=0))
+        ).filter(WellnessActivity.user_id == user_id)
+        if start_day:
+            wellness = wellness.filter(WellnessActivity.created_at >= start_day)
+        for day, activity_type, count, completed in wellness.group_by(activity_day, WellnessActivity.activity_type):
+            day = _as_date(day)
+            row = day_row(day)
+            row["activity_count"] += count
+            row["activity_completed"] += int(completed or 0)
+            activities[(day, activity_type)] = {"activity_count": count, "activity_completed": int(completed or 0)}
+
+        for model in (UserDailyRollup, UserDailyEmotionRollup, UserDailyActivityRollup):
+            stmt = delete(model).where(model.user_id == user_id)
+            if start_day:
+                stmt = stmt.where(model.day >= start_day)
+            db.execute(stmt)
+
+        db.add_all(UserDailyRollup(user_id=user_id, day=day, **values) for day, values in daily.items())
+        db.add_all(
+            UserDailyEmotionRollup(user_id=user_id, day=day, emotion=emotion, **values)
+            for (day, emotion), values in emotions.items()
+        )
+        db.add_all(
+            UserDailyActivityRollup(user_id=user_id, day=day, activity_type=activity_type, **values)
+            for (day, activity_type), values in activities.items()
+        )
+        db.commit()
+
+        return len(daily)
+
+    def _increment(self, db: Session, model, keys: Dict[str, Any], deltas: Dict[str, int]):
+        """Add ``deltas`` to the row identified by ``keys``, creating it if needed"""
+        dialect = db.get_bind().dialect.name
+
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            stmt = insert(model).values(**keys, **deltas)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={column: getattr(model, column) + stmt.excluded[column] for column in deltas}
+            )
+            db.execute(stmt)
+            return
+
+        filters = [getattr(model, column) == value for column, value in keys.items()]
+        result = db.execute(
+            update(model).where(*filters).values(
+                {column: getattr(model, column) + delta for column, delta in deltas.items()}
+            )
+        )
+        if result.rowcount == 0:
+            db.add(model(**keys, **deltas))
+            db.flush()
+
+analytics_rollups = AnalyticsRollupService()
@@ -0,0 +1,162 @@
+import glob
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+
+DAY = 86400
+WEEK = 7 * DAY
+# 1970-01-01 was a Thursday; shift so weeks start on Monday
+WEEK_OFFSET = 3 * DAY
+
+# Column kinds written by ColumnarExporter
+DTYPES = {"code": np.int32, "int": np.int32, "float": np.float64, "bool": np.bool_, "time": np.int64}
+
+class CohortDataset:
+    """Columnar export loaded into NumPy arrays, one dict of columns per table"""
+
+    def __init__(self, tables: Dict[str, Dict[str, np.ndarray]], dictionaries: Dict[str, List[str]]):
+        self.tables = tables
+        self.dictionaries = dictionaries
+
+    @classmethod
+    def load(cls, data_dir: str) -> "CohortDataset":
+        with open(os.path.join(data_dir, "dictionaries.json")) as f:
+            dictionaries = json.load(f)
+        with open(os.path.join(data_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        tables = {}
+        for table, columns in manifest["columns"].items():
+            parts = [np.load(path) for path in sorted(glob.glob(os.path.join(data_dir, table, "part-*.npz")))]
+            tables[table] = {
+                column: np.concatenate([part[column] for part in parts]) if parts else np.empty(0, dtype=DTYPES[kind])
+                for column, kind in columns.items()
+            }
+        return cls(tables, dictionaries)
+
+    def code(self, dictionary: str, value: str) -> int:
+        """Code of a dictionary-encoded value, or -1 if it never occurs"""
+        try:
+            return self.dictionaries.get(dictionary, []).index(value)
+        except ValueError:
+            return -1
+
+    @property
+    def user_count(self) -> int:
+        return len(self.dictionaries.get("user", []))
+
+class CohortEngine:
+    """Population-level metrics computed with vectorised NumPy operations"""
+
+    def __init__(self, dataset: CohortDataset):
+        self.data = dataset
+
+    def crisis_rate_by_week(self) -> List[Dict[str, Any]]:
+        """Share of user messages flagged as crisis, per ISO-style week"""
+        messages = self.data.tables["messages"]
+        user_role = (messages["role"] == self.data.code("role", "user")) & (messages["user"] >= 0)
+        timestamps = messages["timestamp"][user_role]
+        crisis = messages["crisis_detected"][user_role]
+        if timestamps.size == 0:
+            return []
+
+        weeks = (timestamps + WEEK_OFFSET) // WEEK
+        first = weeks.min()
+        index = weeks - first
+        totals = np.bincount(index)
+        crises = np.bincount(index, weights=crisis.astype(np.float64), minlength=totals.size)
+        users = self._distinct_per_bucket(index, messages["user"][user_role], totals.size)
+
+        return [
+            {
+                "week_start": _format_day((first + i) * WEEK - WEEK_OFFSET),
+                "messages": int(totals[i]),
+                "crisis_messages": int(crises[i]),
+                "crisis_rate": round(float(crises[i] / totals[i]), 4),
+                "active_users": int(users[i])
+            }
+            for i in np.flatnonzero(totals)
+        ]
+
+    def mood_after_activities(
+        self,
+        activity_type: str = "breathing",
+        sessions: int = 5,
+        days_before: int = 14,
+        days_after: int = 28
+    ) -> Dict[str, Any]:
+        """Average mood intensity by day relative to each user's Nth completed activity"""
+        activities = self.data.tables["wellness_activities"]
+        moods = self.data.tables["mood_entries"]
+
+        mask = activities["completed"] & (activities["activity_type"] == self.data.code("activity_type", activity_type))
+        users = activities["user"][mask]
+        times = activities["timestamp"][mask]
+
+        # Rank each completion within its user, then keep the Nth one
+        order = np.lexsort((times, users))
+        users, times = users[order], times[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(users)) + 1]
+        run_lengths = np.diff(np.r_[starts, users.size])
+        rank = np.arange(users.size) - np.repeat(starts, run_lengths)
+        nth = rank == sessions - 1
+
+        anchor = np.full(max(self.data.user_count, 1), -1, dtype=np.int64)
+        anchor[users[nth]] = times[nth]
+
+        mood_users = moods["user"]
+        mood_anchor = anchor[np.clip(mood_users, 0, None)]
+        relative_day = (moods["timestamp"] - mood_anchor) // DAY
+        in_window = (mood_users >= 0) & (mood_anchor >= 0) & (relative_day >= -days_before) & (relative_day <= days_after)
+
+        index = relative_day[in_window] + days_before
+        width = days_before + days_after + 1
+        counts = np.bincount(index, minlength=width)
+        sums = np.bincount(index, weights=moods["intensity"][in_window].astype(np.float64), minlength=width)
+
+        return {
+            "activity_type": activity_type,
+            "sessions": sessions,
+            "cohort_size": int(nth.sum()),
+            "trajectory": [
+                {
+                    "day": int(i - days_before),
+                    "entries": int(counts[i]),
+                    "average_intensity": round(float(sums[i] / counts[i]), 2)
+                }
+                for i in np.flatnonzero(counts)
+            ]
+        }
+
+    def emotion_mix(self) -> List[Dict[str, Any]]:
+        """Population share and average intensity per emotion"""
+        moods = self.data.tables["mood_entries"]
+        emotions = self.data.dictionaries.get("emotion", [])
+        valid = moods["emotion"] >= 0
+        codes = moods["emotion"][valid]
+        if codes.size == 0:
+            return []
+
+        counts = np.bincount(codes, minlength=len(emotions))
+        sums = np.bincount(codes, weights=moods["intensity"][valid].astype(np.float64), minlength=len(emotions))
+        return [
+            {
+                "emotion": emotions[i],
+                "entries": int(counts[i]),
+                "share": round(float(counts[i] / codes.size), 4),
+                "average_intensity": round(float(sums[i] / counts[i]), 2)
+            }
+            for i in np.argsort(-counts)
+            if counts[i]
+        ]
+
+    def _distinct_per_bucket(self, bucket: np.ndarray, users: np.ndarray, size: int) -> np.ndarray:
+        """Number of distinct users in each bucket"""
+        pairs = np.unique(bucket.astype(np.int64) * max(self.data.user_count, 1) + users)
+        return np.bincount(pairs // max(self.data.user_count, 1), minlength=size)
+
+def _format_day(epoch_seconds: int) -> str:
+    return datetime.fromtimestamp(int(epoch_seconds), tz=timezone.utc).strftime("%Y-%m-%d")
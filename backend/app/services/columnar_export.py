@@ -0,0 +1,142 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.engine import Engine
+
+from app.database import Session as DBSession, Message, MoodEntry, WellnessActivity, Analytics
+
+# Columns are stored as NumPy arrays in compressed .npz parts, one directory
+# per table. Low-cardinality strings are dictionary-encoded into int32 codes
+# (dictionaries.json maps them back); free text is never exported.
+#
+# column name -> (kind, SQL expression); kinds: "code", "int", "float", "bool", "time"
+TABLES: Dict[str, Dict[str, Any]] = {
+    "messages": {
+        "from": Message.__table__.join(DBSession.__table__, Message.session_id == DBSession.id),
+        "columns": {
+            "user": ("code", DBSession.user_id),
+            "session_type": ("code", DBSession.session_type),
+            "role": ("code", Message.role),
+            "timestamp": ("time", Message.timestamp),
+            "crisis_detected": ("bool", Message.crisis_detected),
+            "length": ("int", func.length(Message.content)),
+        },
+    },
+    "mood_entries": {
+        "from": MoodEntry.__table__,
+        "columns": {
+            "user": ("code", MoodEntry.user_id),
+            "emotion": ("code", MoodEntry.emotion),
+            "intensity": ("int", MoodEntry.intensity),
+            "timestamp": ("time", MoodEntry.created_at),
+        },
+    },
+    "wellness_activities": {
+        "from": WellnessActivity.__table__,
+        "columns": {
+            "user": ("code", WellnessActivity.user_id),
+            "activity_type": ("code", WellnessActivity.activity_type),
+            "duration": ("int", WellnessActivity.duration),
+            "completed": ("bool", WellnessActivity.completed),
+            "feedback_rating": ("int", WellnessActivity.feedback_rating),
+            "timestamp": ("time", WellnessActivity.created_at),
+        },
+    },
+    "analytics": {
+        "from": Analytics.__table__,
+        "columns": {
+            "user": ("code", Analytics.user_id),
+            "metric_type": ("code", Analytics.metric_type),
+            "value": ("float", Analytics.value),
+            "timestamp": ("time", Analytics.date),
+        },
+    },
+}
+
+def _epoch(value: Optional[datetime]) -> int:
+    if value is None:
+        return -1
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+class ColumnarExporter:
+    """Streams OLTP tables into chunked, compressed columnar files"""
+
+    def __init__(self, engine: Engine, output_dir: str, chunk_size: int = 100_000):
+        self.engine = engine
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        # dictionary name -> {value: code}; shared by every table so codes line up
+        self.dictionaries: Dict[str, Dict[str, int]] = {}
+
+    def export(self, tables: Optional[List[str]] = None, progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """Export the given tables (all by default); returns rows written per table"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        counts = {}
+        for table in tables or list(TABLES):
+            counts[table] = self._export_table(table, progress)
+
+        with open(os.path.join(self.output_dir, "dictionaries.json"), "w") as f:
+            json.dump({name: list(codes) for name, codes in self.dictionaries.items()}, f)
+        with open(os.path.join(self.output_dir, "manifest.json"), "w") as f:
+            json.dump({
+                "exported_at": datetime.utcnow().isoformat(),
+                "rows": counts,
+                "columns": {table: {c: kind for c, (kind, _) in TABLES[table]["columns"].items()} for table in counts}
+            }, f, indent=2)
+
+        return counts
+
+    def _export_table(self, table: str, progress: Optional[Callable[[str, int], None]]) -> int:
+        import numpy as np
+
+        spec = TABLES[table]
+        names = list(spec["columns"])
+        kinds = [spec["columns"][name][0] for name in names]
+        stmt = select(*[expr.label(name) for name, (_, expr) in spec["columns"].items()]).select_from(spec["from"])
+
+        table_dir = os.path.join(self.output_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        for stale in os.listdir(table_dir):
+            os.remove(os.path.join(table_dir, stale))
+
+        total = 0
+        part = 0
+        with self.engine.connect() as conn:
+            # Server-side cursor on PostgreSQL; rows arrive in chunk_size batches
+            result = conn.execution_options(stream_results=True, yield_per=self.chunk_size).execute(stmt)
+            for rows in result.partitions(self.chunk_size):
+                columns = list(zip(*rows))
+                arrays = {
+                    name: self._encode(name, kind, values, np)
+                    for name, kind, values in zip(names, kinds, columns)
+                }
+                np.savez_compressed(os.path.join(table_dir, f"part-{part:05d}.npz"), **arrays)
+                total += len(rows)
+                part += 1
+                if progress:
+                    progress(table, total)
+
+        return total
+
+    def _encode(self, name: str, kind: str, values: tuple, np):
+        if kind == "code":
+            codes = self.dictionaries.setdefault(name, {})
+            return np.fromiter(
+                (codes.setdefault(value, len(codes)) if value is not None else -1 for value in values),
+                dtype=np.int32,
+                count=len(values)
+            )
+        if kind == "time":
+            return np.fromiter((_epoch(v) for v in values), dtype=np.int64, count=len(values))
+        if kind == "bool":
+            return np.fromiter((bool(v) for v in values), dtype=np.bool_, count=len(values))
+        if kind == "int":
+            return np.fromiter((v if v is not None else -1 for v in values), dtype=np.int32, count=len(values))
+        return np.fromiter((v if v is not None else np.nan for v in values), dtype=np.float64, count=len(values))
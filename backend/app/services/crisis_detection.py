@@ -1,18 +1,48 @@
 import re
+from functools import lru_cache
 from typing import List, Dict, Any
 from app.core.config import settings
+from app.core.tracing import traced
+
+CRISIS_PATTERNS = [
+    r'\b(kill\s+myself|end\s+it\s+all|want\s+to\s+die)\b',
+    r'\b(suicide|self\s*[-]?\s*harm)\b',
+    r'\b(cut\s+myself|hurt\s+myself)\b',
+    r'\b(no\s+reason\s+to\s+live|better\s+off\s+dead)\b',
+    r'\b(can\'t\s+take\s+it\s+anymore|give\s+up)\b'
+]
+
+# High distress indicators
+DISTRESS_PATTERNS = [
+    r'\b(hopeless|helpless|worthless)\b',
+    r'\b(can\'t\s+go\s+on|can\'t\s+handle\s+this)\b',
+    r'\b(everyone\s+would\s+be\s+better\s+off)\b'
+]
+
+HIGH_SEVERITY_PATTERNS = [
+    r'\b(kill\s+myself|suicide|end\s+it\s+all)\b',
+    r'\b(plan\s+to\s+die|going\s+to\s+end\s+it)\b'
+]
+
+MEDIUM_SEVERITY_PATTERNS = [
+    r'\b(want\s+to\s+die|better\s+off\s+dead)\b',
+    r'\b(self\s*[-]?\s*harm|cut\s+myself)\b'
+]
+
+def _compile_any(patterns: List[str]) -> re.Pattern:
+    """One regex matching wherever any of the patterns would"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
 
 class CrisisDetectionService:
     def __init__(self):
-        self.crisis_keywords = settings.CRISIS_KEYWORDS
-        self.crisis_patterns = [
-            r'\b(kill\s+myself|end\s+it\s+all|want\s+to\s+die)\b',
-            r'\b(suicide|self\s*[-]?\s*harm)\b',
-            r'\b(cut\s+myself|hurt\s+myself)\b',
-            r'\b(no\s+reason\s+to\s+live|better\s+off\s+dead)\b',
-            r'\b(can\'t\s+take\s+it\s+anymore|give\s+up)\b'
-        ]
+        # Compiled once per service; each group is searched in a single pass
+        self.crisis_keywords = [keyword.lower() for keyword in settings.CRISIS_KEYWORDS]
+        self.crisis_pattern = _compile_any(CRISIS_PATTERNS)
+        self.distress_pattern = _compile_any(DISTRESS_PATTERNS)
+        self.high_severity_pattern = _compile_any(HIGH_SEVERITY_PATTERNS)
+        self.medium_severity_pattern = _compile_any(MEDIUM_SEVERITY_PATTERNS)
     
+    @traced("crisis.detect")
     def detect_crisis(self, message: str) -> bool:
         """Detect crisis indicators in a message"""
         if not message:
@@ -22,26 +52,11 @@ class CrisisDetectionService:
         
         # Check for crisis keywords
         for keyword in self.crisis_keywords:
-            if keyword.lower() in message_lower:
-                return True
-        
-        # Check for crisis patterns
-        for pattern in self.crisis_patterns:
-            if re.search(pattern, message_lower, re.IGNORECASE):
+            if keyword in message_lower:
                 return True
         
-        # Check for high distress indicators
-        distress_indicators = [
-            r'\b(hopeless|helpless|worthless)\b',
-            r'\b(can\'t\s+go\s+on|can\'t\s+handle\s+this)\b',
-            r'\b(everyone\s+would\s+be\s+better\s+off)\b'
-        ]
-        
-        for pattern in distress_indicators:
-            if re.search(pattern, message_lower, re.IGNORECASE):
-                return True
-        
-        return False
+        # Check for crisis patterns, then high distress indicators
+        return bool(self.crisis_pattern.search(message_lower) or self.distress_pattern.search(message_lower))
     
     def get_crisis_severity(self, message: str) -> str:
         """Get crisis severity level"""
@@ -50,25 +65,10 @@ class CrisisDetectionService:
         
         message_lower = message.lower()
         
-        # High severity indicators
-        high_severity = [
-            r'\b(kill\s+myself|suicide|end\s+it\s+all)\b',
-            r'\b(plan\s+to\s+die|going\s+to\s+end\s+it)\b'
-        ]
-        
-        for pattern in high_severity:
-            if re.search(pattern, message_lower, re.IGNORECASE):
-                return "high"
-        
-        # Medium severity indicators
-        medium_severity = [
-            r'\b(want\s+to\s+die|better\s+off\s+dead)\b',
-            r'\b(self\s*[-]?\s*harm|cut\s+myself)\b'
-        ]
-        
-        for pattern in medium_severity:
-            if re.search(pattern, message_lower, re.IGNORECASE):
-                return "medium"
+        if self.high_severity_pattern.search(message_lower):
+            return "high"
+        if self.medium_severity_pattern.search(message_lower):
+            return "medium"
         
         return "low"
     
@@ -90,4 +90,9 @@ class CrisisDetectionService:
             resources["message"] = "It sounds like you're going through a difficult time. Remember that help is available if you need it. You can call 988 or text HOME to 741741 anytime."
             resources["urgent"] = False
         
-        return resources 
\ No newline at end of file
+        return resources 
+
+@lru_cache(maxsize=None)
+def get_crisis_service() -> CrisisDetectionService:
+    """Shared CrisisDetectionService, built on first use"""
+    return CrisisDetectionService()
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterator, List, Dict, Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, Session as DBSession, Message, MoodEntry, WellnessActivity
+
+RECORD_TYPES = ["sessions", "messages", "mood_entries", "wellness_activities"]
+EXPORT_FORMATS = ["ndjson", "csv"]
+
+# Union of every record type's fields; CSV rows leave the others blank
+CSV_COLUMNS = [
+    "record_type", "id", "created_at",
+    "session_id", "session_type", "emotion_context", "topic_id", "ended_at",
+    "role", "content", "crisis_detected",
+    "emotion", "intensity", "notes",
+    "activity_type", "duration", "completed", "feedback_rating"
+]
+
+def _queries(user_id: str) -> Dict[str, Any]:
+    """Column-only selects per record type, each in a stable order"""
+    return {
+        "sessions": select(
+            DBSession.id, DBSession.created_at, DBSession.session_type,
+            DBSession.emotion_context, DBSession.topic_id, DBSession.ended_at
+        ).where(DBSession.user_id == user_id).order_by(DBSession.created_at, DBSession.id),
+        "messages": select(
+            Message.id, Message.timestamp.label("created_at"), Message.session_id,
+            Message.role, Message.content, Message.crisis_detected
+        ).join(DBSession, Message.session_id == DBSession.id).where(
+            DBSession.user_id == user_id
+        ).order_by(Message.timestamp, Message.id),
+        "mood_entries": select(
+            MoodEntry.id, MoodEntry.created_at, MoodEntry.emotion,
+            MoodEntry.intensity, MoodEntry.notes
+        ).where(MoodEntry.user_id == user_id).order_by(MoodEntry.created_at, MoodEntry.id),
+        "wellness_activities": select(
+            WellnessActivity.id, WellnessActivity.created_at, WellnessActivity.activity_type,
+            WellnessActivity.duration, WellnessActivity.completed, WellnessActivity.feedback_rating
+        ).where(WellnessActivity.user_id == user_id).order_by(WellnessActivity.created_at, WellnessActivity.id),
+    }
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+class UserDataExporter:
+    """Streams a user's full history as NDJSON or CSV in constant memory"""
+
+    def __init__(self, chunk_size: int = 500, flush_bytes: int = 64 * 1024):
+        self.chunk_size = chunk_size
+        self.flush_bytes = flush_bytes
+
+    def stream(self, user_id: str, fmt: str = "ndjson", record_types: List[str] = RECORD_TYPES, compress: bool = False) -> Iterator[bytes]:
+        """Yield the encoded export in ~flush_bytes pieces, gzipped on the fly if asked"""
+        # The request's session may already be closed while the body streams,
+        # so the export owns its own
+        db = SessionLocal()
+        try:
+            lines = self._iter_lines(db, user_id, fmt, record_types)
+            chunks = self._batch(lines)
+            yield from self._gzip(chunks) if compress else chunks
+        finally:
+            db.close()
+
+    def iter_records(self, db: Session, user_id: str, record_types: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        queries = _queries(user_id)
+        for record_type in record_types:
+            # yield_per streams through a server-side cursor where the driver has one
+            result = db.execute(queries[record_type].execution_options(yield_per=self.chunk_size))
+            for row in result.mappings():
+                yield {"record_type": record_type, **row}
+
+    def _iter_lines(self, db: Session, user_id: str, fmt: str, record_types: List[str]) -> Iterator[str]:
+        records = self.iter_records(db, user_id, record_types)
+        if fmt == "ndjson":
+            for record in records:
+                yield json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            writer.writerow({key: _json_default(value) if isinstance(value, (datetime, date)) else value
+                             for key, value in record.items()})
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def _batch(self, lines: Iterator[str]) -> Iterator[bytes]:
+        pending: List[str] = []
+        size = 0
+        for line in lines:
+            pending.append(line)
+            size += len(line)
+            if size >= self.flush_bytes:
+                yield "".join(pending).encode("utf-8")
+                pending = []
+                size = 0
+        if pending:
+            yield "".join(pending).encode("utf-8")
+
+    def _gzip(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+data_exporter = UserDataExporter()
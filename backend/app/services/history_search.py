@@ -0,0 +1,330 @@
+import html
+import logging
+import re
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import text, bindparam, select, literal, union_all, func, or_, and_, null
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.pagination import KeysetPage, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.database import Session as DBSession, Message, MoodEntry
+
+logger = logging.getLogger(__name__)
+
+SEARCH_KINDS = ["message", "mood"]
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+# Private-use characters mark matches until the snippet has been HTML-escaped
+MARK_START, MARK_END = "\ue000", "\ue001"
+SNIPPET_WORDS = 12
+PG_TEXT_CONFIG = "english"
+
+# SQLite: one FTS5 table per source. Rows are tied to their source by the
+# string primary key (source_id): the implicit rowid of a table with a
+# string key may be renumbered by VACUUM, so it can't be joined on.
+# user_id is indexed so the owner filter is applied inside the full-text
+# index rather than after it.
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE message_fts USING fts5(content, user_id, source_id UNINDEXED, tokenize = 'porter unicode61')",
+    "CREATE VIRTUAL TABLE mood_note_fts USING fts5(content, user_id, source_id UNINDEXED, tokenize = 'porter unicode61')",
+    """CREATE TRIGGER message_fts_ai AFTER INSERT ON messages WHEN NEW.content IS NOT NULL BEGIN
+        INSERT INTO message_fts(content, user_id, source_id)
+        SELECT NEW.content, user_id, NEW.id FROM sessions WHERE id = NEW.session_id;
+    END""",
+    """CREATE TRIGGER message_fts_au AFTER UPDATE OF content ON messages BEGIN
+        DELETE FROM message_fts WHERE source_id = OLD.id;
+        INSERT INTO message_fts(content, user_id, source_id)
+        SELECT NEW.content, user_id, NEW.id FROM sessions WHERE id = NEW.session_id AND NEW.content IS NOT NULL;
+    END""",
+    """CREATE TRIGGER message_fts_ad AFTER DELETE ON messages BEGIN
+        DELETE FROM message_fts WHERE source_id = OLD.id;
+    END""",
+    """CREATE TRIGGER mood_note_fts_ai AFTER INSERT ON mood_entries WHEN NEW.notes IS NOT NULL BEGIN
+        INSERT INTO mood_note_fts(content, user_id, source_id) VALUES (NEW.notes, NEW.user_id, NEW.id);
+    END""",
+    """CREATE TRIGGER mood_note_fts_au AFTER UPDATE OF notes ON mood_entries BEGIN
+        DELETE FROM mood_note_fts WHERE source_id = OLD.id;
+        INSERT INTO mood_note_fts(content, user_id, source_id)
+        SELECT NEW.notes, NEW.user_id, NEW.id WHERE NEW.notes IS NOT NULL;
+    END""",
+    """CREATE TRIGGER mood_note_fts_ad AFTER DELETE ON mood_entries BEGIN
+        DELETE FROM mood_note_fts WHERE source_id = OLD.id;
+    END""",
+    # Index whatever was written before the search tables existed
+    """INSERT INTO message_fts(content, user_id, source_id)
+        SELECT m.content, s.user_id, m.id FROM messages m JOIN sessions s ON s.id = m.session_id
+        WHERE m.content IS NOT NULL""",
+    """INSERT INTO mood_note_fts(content, user_id, source_id)
+        SELECT notes, user_id, id FROM mood_entries WHERE notes IS NOT NULL""",
+]
+# Tables from before source_id was added are keyed by rowid; they are rebuilt
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS message_fts_ai",
+    "DROP TRIGGER IF EXISTS message_fts_au",
+    "DROP TRIGGER IF EXISTS message_fts_ad",
+    "DROP TRIGGER IF EXISTS mood_note_fts_ai",
+    "DROP TRIGGER IF EXISTS mood_note_fts_au",
+    "DROP TRIGGER IF EXISTS mood_note_fts_ad",
+    "DROP TABLE IF EXISTS message_fts",
+    "DROP TABLE IF EXISTS mood_note_fts",
+]
+
+# PostgreSQL: expression GIN indexes, maintained by the database on every write
+POSTGRES_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_messages_content_fts ON messages "
+    f"USING gin (to_tsvector('{PG_TEXT_CONFIG}', coalesce(content, '')))",
+    f"CREATE INDEX IF NOT EXISTS ix_mood_entries_notes_fts ON mood_entries "
+    f"USING gin (to_tsvector('{PG_TEXT_CONFIG}', coalesce(notes, '')))",
+]
+
+# Newest first. Only keys are selected here: FTS5 snippet() would run for every
+# match before the LIMIT, so page rows get their snippets built afterwards.
+SQLITE_SEARCH = """
+SELECT kind, id, session_id, ts FROM (
+    SELECT 'message' AS kind, m.id AS id, m.session_id AS session_id, m.timestamp AS ts
+    FROM message_fts
+    JOIN messages m ON m.id = message_fts.source_id
+    JOIN sessions s ON s.id = m.session_id AND s.user_id = :user_id
+    WHERE message_fts MATCH :match AND :messages
+    UNION ALL
+    SELECT 'mood', e.id, NULL, e.created_at
+    FROM mood_note_fts
+    JOIN mood_entries e ON e.id = mood_note_fts.source_id AND e.user_id = :user_id
+    WHERE mood_note_fts MATCH :match AND :moods
+)
+WHERE {keyset}
+ORDER BY ts DESC, id DESC
+LIMIT :limit
+"""
+# The owner is checked on the source rows too, not only in the index
+SQLITE_CONTENT = {
+    "message": text(
+        "SELECT m.id, m.content FROM messages m JOIN sessions s ON s.id = m.session_id "
+        "WHERE s.user_id = :user_id AND m.id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True)),
+    "mood": text(
+        "SELECT id, notes FROM mood_entries WHERE user_id = :user_id AND id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True)),
+}
+SUFFIX_RE = re.compile(r"(ing|ed|es|s)$")
+
+def _terms(query: str) -> List[str]:
+    return TERM_RE.findall(query.lower())[:16]
+
+def _highlight(snippet: str) -> str:
+    """HTML-escape a snippet and turn the match markers into <mark> tags"""
+    return html.escape(snippet or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+def _stem(word: str) -> str:
+    """Rough suffix stripping so highlights follow the stemmed match"""
+    return SUFFIX_RE.sub("", word) if len(word) > 4 else word
+
+def _fallback_snippet(content: str, terms: List[str]) -> str:
+    """Window of words around the first matching term, with matches marked"""
+    words = (content or "").split()
+    stems = [_stem(term) for term in terms]
+
+    def matches(word: str) -> bool:
+        word = word.lower()
+        return any(stem in word for stem in stems)
+
+    hit = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, hit - SNIPPET_WORDS // 2)
+    window = words[start:start + SNIPPET_WORDS]
+    marked = [f"{MARK_START}{word}{MARK_END}" if matches(word) else word for word in window]
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if start + SNIPPET_WORDS < len(words) else ""
+    return prefix + " ".join(marked) + suffix
+
+class HistorySearchService:
+    """Full-text search over one user's chat messages and mood notes.
+
+    SQLite uses FTS5 tables kept current by triggers, PostgreSQL uses GIN
+    expression indexes over ``to_tsvector``, and any other database falls
+    back to ILIKE. Results are newest first and keyset-paginated.
+    """
+
+    def install(self, engine: Engine):
+        """Create the full-text structures for the engine's dialect (idempotent)"""
+        dialect = engine.dialect.name
+        with engine.begin() as connection:
+            if dialect == "sqlite":
+                columns = {row[1] for row in connection.execute(text("PRAGMA table_info(message_fts)"))}
+                if "source_id" in columns:
+                    return
+                try:
+                    for statement in SQLITE_DROP:
+                        connection.execute(text(statement))
+                    for statement in SQLITE_DDL:
+                        connection.execute(text(statement))
+                except Exception as e:
+                    # SQLite built without FTS5: searches use the LIKE fallback
+                    logger.warning("⚠️  FTS5 unavailable, history search will use LIKE: %s", e)
+                    return
+                logger.info("🔎 Created history search index (FTS5)")
+            elif dialect == "postgresql":
+                for statement in POSTGRES_DDL:
+                    connection.execute(text(statement))
+
+    def search(
+        self,
+        db: Session,
+        user_id: str,
+        query: str,
+        kinds: List[str] = SEARCH_KINDS,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> KeysetPage:
+        terms = _terms(query)
+        if not terms:
+            return KeysetPage([], None, None)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor_ts, cursor_id = (None, None)
+        if cursor:
+            cursor_ts, cursor_id, _ = decode_cursor(cursor)
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite" and self._has_fts(db):
+            rows = self._search_sqlite(db, user_id, terms, kinds, cursor_ts, cursor_id, limit + 1)
+        elif dialect == "postgresql":
+            rows = self._search_postgres(db, user_id, query, kinds, cursor_ts, cursor_id, limit + 1)
+        else:
+            rows = self._search_fallback(db, user_id, terms, kinds, cursor_ts, cursor_id, limit + 1)
+
+        items = [
+            {
+                "kind": row["kind"],
+                "id": row["id"],
+                "session_id": row["session_id"],
+                "created_at": row["created_at"],
+                "snippet": _highlight(row["snippet"])
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["created_at"], last["id"], "next")
+        return KeysetPage(items, next_cursor, None)
+
+    def _has_fts(self, db: Session) -> bool:
+        return db.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_fts'"
+        )).first() is not None
+
+    def _search_sqlite(self, db, user_id, terms, kinds, cursor_ts, cursor_id, limit) -> List[Dict[str, Any]]:
+        # Every term must match the content (the last one as a prefix) and the owner must match user_id
+        content = " AND ".join(f'"{term}"' for term in terms[:-1])
+        content = f'{content} AND "{terms[-1]}"*' if content else f'"{terms[-1]}"*'
+        owner = user_id.replace('"', '""')
+        params = {
+            "match": f'user_id : "{owner}" AND content : ({content})',
+            "user_id": user_id,
+            "messages": "message" in kinds,
+            "moods": "mood" in kinds,
+            "limit": limit
+        }
+
+        keyset = "1"
+        if cursor_ts is not None:
+            # Timestamps are text: server defaults have no fractional part while
+            # SQLAlchemy writes ".000000", so a whole-second cursor matches both
+            params["cursor_id"] = cursor_id
+            params["cursor_ts"] = cursor_ts.strftime("%Y-%m-%d %H:%M:%S.%f")
+            if cursor_ts.microsecond == 0:
+                params["cursor_whole"] = cursor_ts.strftime("%Y-%m-%d %H:%M:%S")
+                keyset = "ts < :cursor_whole OR (ts IN (:cursor_whole, :cursor_ts) AND id < :cursor_id)"
+            else:
+                keyset = "ts < :cursor_ts OR (ts = :cursor_ts AND id < :cursor_id)"
+
+        rows = [dict(row) for row in db.execute(text(SQLITE_SEARCH.format(keyset=keyset)), params).mappings()]
+
+        # Page rows only, by id
+        contents: Dict[tuple, str] = {}
+        for kind in kinds:
+            ids = [row["id"] for row in rows if row["kind"] == kind]
+            if ids:
+                result = db.execute(SQLITE_CONTENT[kind], {"user_id": user_id, "ids": ids})
+                contents.update({(kind, row_id): content for row_id, content in result})
+
+        for row in rows:
+            ts = row.pop("ts")
+            row["created_at"] = ts if isinstance(ts, datetime) else datetime.fromisoformat(ts)
+            row["snippet"] = _fallback_snippet(contents.get((row["kind"], row["id"]), ""), terms)
+        return rows
+
+    def _search_postgres(self, db, user_id, query, kinds, cursor_ts, cursor_id, limit) -> List[Dict[str, Any]]:
+        tsquery = func.websearch_to_tsquery(PG_TEXT_CONFIG, query)
+        parts = []
+        if "message" in kinds:
+            parts.append(
+                select(
+                    literal("message").label("kind"), Message.id.label("id"), Message.session_id.label("session_id"),
+                    Message.timestamp.label("created_at"), Message.content.label("content")
+                ).join(DBSession, DBSession.id == Message.session_id).where(
+                    DBSession.user_id == user_id,
+                    func.to_tsvector(PG_TEXT_CONFIG, func.coalesce(Message.content, "")).op("@@")(tsquery)
+                )
+            )
+        if "mood" in kinds:
+            parts.append(
+                select(
+                    literal("mood").label("kind"), MoodEntry.id.label("id"), null().label("session_id"),
+                    MoodEntry.created_at.label("created_at"), MoodEntry.notes.label("content")
+                ).where(
+                    MoodEntry.user_id == user_id,
+                    func.to_tsvector(PG_TEXT_CONFIG, func.coalesce(MoodEntry.notes, "")).op("@@")(tsquery)
+                )
+            )
+        if not parts:
+            return []
+
+        matches = union_all(*parts).subquery()
+        page = select(matches)
+        if cursor_ts is not None:
+            page = page.where(or_(
+                matches.c.created_at < cursor_ts,
+                and_(matches.c.created_at == cursor_ts, matches.c.id < cursor_id)
+            ))
+        page = page.order_by(matches.c.created_at.desc(), matches.c.id.desc()).limit(limit).subquery()
+
+        # Headlines only for the rows on the page
+        options = f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS + 8}, MinWords={SNIPPET_WORDS // 2}"
+        result = db.execute(
+            select(
+                page.c.kind, page.c.id, page.c.session_id, page.c.created_at,
+                func.ts_headline(PG_TEXT_CONFIG, page.c.content, tsquery, options).label("snippet")
+            ).order_by(page.c.created_at.desc(), page.c.id.desc())
+        )
+        return [dict(row) for row in result.mappings()]
+
+    def _search_fallback(self, db, user_id, terms, kinds, cursor_ts, cursor_id, limit) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        if "message" in kinds:
+            messages = db.query(Message.id, Message.session_id, Message.timestamp, Message.content).join(
+                DBSession, DBSession.id == Message.session_id
+            ).filter(DBSession.user_id == user_id, *[Message.content.ilike(f"%{term}%") for term in terms])
+            if cursor_ts is not None:
+                messages = messages.filter(or_(
+                    Message.timestamp < cursor_ts, and_(Message.timestamp == cursor_ts, Message.id < cursor_id)
+                ))
+            for row in messages.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit):
+                rows.append({"kind": "message", "id": row.id, "session_id": row.session_id,
+                             "created_at": row.timestamp, "snippet": _fallback_snippet(row.content, terms)})
+        if "mood" in kinds:
+            moods = db.query(MoodEntry.id, MoodEntry.created_at, MoodEntry.notes).filter(
+                MoodEntry.user_id == user_id, *[MoodEntry.notes.ilike(f"%{term}%") for term in terms]
+            )
+            if cursor_ts is not None:
+                moods = moods.filter(or_(
+                    MoodEntry.created_at < cursor_ts, and_(MoodEntry.created_at == cursor_ts, MoodEntry.id < cursor_id)
+                ))
+            for row in moods.order_by(MoodEntry.created_at.desc(), MoodEntry.id.desc()).limit(limit):
+                rows.append({"kind": "mood", "id": row.id, "session_id": None,
+                             "created_at": row.created_at, "snippet": _fallback_snippet(row.notes, terms)})
+
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        return rows[:limit]
+
+history_search = HistorySearchService()
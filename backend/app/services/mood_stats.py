@@ -0,0 +1,172 @@
+import json
+import math
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import sqlite, postgresql
+
+from app.core.config import settings
+from app.database import MoodEntry, UserMoodStats
+
+INTENSITY_LEVELS = 10  # intensities are integers 1-10
+QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9}
+
+def _histogram_quantile(counts: List[int], q: float) -> int:
+    """Intensity at quantile ``q`` of a 1-10 histogram"""
+    target = q * sum(counts)
+    running = 0
+    for index, count in enumerate(counts):
+        running += count
+        if count and running >= target:
+            return index + 1
+    return INTENSITY_LEVELS
+
+class MoodStatsService:
+    """Constant-size running mood statistics per user.
+
+    Each new entry updates the row in O(1): an exponentially weighted mean,
+    Welford's mean/variance, logging streaks, and a per-emotion intensity
+    histogram. Intensities are integers from 1 to 10, so a 10-bucket
+    histogram is an exact quantile sketch.
+    """
+
+    def record(self, db: Session, user_id: str, emotion: str, intensity: int, when: Optional[datetime] = None):
+        """Fold one mood entry into the user's statistics (caller commits)"""
+        stats = self._get_for_update(db, user_id)
+        self._apply(stats, emotion, intensity, when.date() if when else datetime.utcnow().date())
+
+    def record_many(self, db: Session, user_id: str, entries: List[tuple]):
+        """Fold (emotion, intensity, when) entries in time order, locking the row once.
+
+        Call it once the entries are written. Synced entries can be older
+        than ones already folded in; the EWMA and streaks depend on order,
+        so the user's entries are replayed from scratch then.
+        """
+        if not entries:
+            return
+        stats = self._get_for_update(db, user_id)
+        entries = sorted(entries, key=lambda entry: entry[2])
+        oldest = entries[0][2]
+        newer_stored = db.query(func.count(MoodEntry.id)).filter(
+            MoodEntry.user_id == user_id,
+            MoodEntry.created_at > oldest
+        ).scalar()
+        if newer_stored > sum(1 for entry in entries if entry[2] > oldest):
+            self._replay(db, stats, user_id)
+            return
+        for emotion, intensity, when in entries:
+            self._apply(stats, emotion, intensity, when.date())
+
+    def rebuild(self, db: Session, user_id: str) -> Optional[UserMoodStats]:
+        """Recompute a user's statistics by replaying their mood entries in order"""
+        stats = self._get_for_update(db, user_id)
+        self._replay(db, stats, user_id)
+        db.commit()
+        return stats
+
+    def _replay(self, db: Session, stats: UserMoodStats, user_id: str):
+        stats.entry_count = 0
+        stats.ewma_intensity = None
+        stats.mean_intensity = 0.0
+        stats.m2 = 0.0
+        stats.last_logged_day = None
+        stats.current_streak = 0
+        stats.longest_streak = 0
+        stats.emotion_histograms = "{}"
+
+        entries = db.query(MoodEntry.emotion, MoodEntry.intensity, MoodEntry.created_at).filter(
+            MoodEntry.user_id == user_id
+        ).order_by(MoodEntry.created_at).yield_per(1000)
+        for emotion, intensity, created_at in entries:
+            self._apply(stats, emotion, intensity, created_at.date())
+
+    def get_stats(self, db: Session, user_id: str) -> Optional[UserMoodStats]:
+        return db.query(UserMoodStats).filter(UserMoodStats.user_id == user_id).first()
+
+    def summarize(self, stats: Optional[UserMoodStats], today: Optional[date] = None) -> Dict[str, Any]:
+        """API view of the running statistics"""
+        today = today or datetime.utcnow().date()
+        if stats is None or not stats.entry_count:
+            return {
+                "total_entries": 0,
+                "ewma_intensity": None,
+                "mean_intensity": None,
+                "variance": None,
+                "std_dev": None,
+                "current_streak": 0,
+                "longest_streak": 0,
+                "last_logged": None,
+                "emotions": {}
+            }
+
+        variance = stats.m2 / (stats.entry_count - 1) if stats.entry_count > 1 else 0.0
+        # A streak is still current if the user logged today or yesterday
+        current_streak = stats.current_streak if stats.last_logged_day >= today - timedelta(days=1) else 0
+
+        emotions = {}
+        for emotion, counts in json.loads(stats.emotion_histograms).items():
+            total = sum(counts)
+            emotions[emotion] = {
+                "count": total,
+                "average_intensity": round(sum((i + 1) * c for i, c in enumerate(counts)) / total, 1),
+                **{name: _histogram_quantile(counts, q) for name, q in QUANTILES.items()}
+            }
+
+        return {
+            "total_entries": stats.entry_count,
+            "ewma_intensity": round(stats.ewma_intensity, 2),
+            "mean_intensity": round(stats.mean_intensity, 2),
+            "variance": round(variance, 2),
+            "std_dev": round(math.sqrt(variance), 2),
+            "current_streak": current_streak,
+            "longest_streak": stats.longest_streak,
+            "last_logged": stats.last_logged_day.isoformat(),
+            "emotions": emotions
+        }
+
+    def _apply(self, stats: UserMoodStats, emotion: str, intensity: int, day: date):
+        count = (stats.entry_count or 0) + 1
+        mean = stats.mean_intensity or 0.0
+        delta = intensity - mean
+        mean += delta / count
+
+        stats.entry_count = count
+        stats.m2 = (stats.m2 or 0.0) + delta * (intensity - mean)
+        stats.mean_intensity = mean
+        if stats.ewma_intensity is None:
+            stats.ewma_intensity = float(intensity)
+        else:
+            alpha = settings.MOOD_EWMA_ALPHA
+            stats.ewma_intensity = alpha * intensity + (1 - alpha) * stats.ewma_intensity
+
+        last_day = stats.last_logged_day
+        if last_day is None or day > last_day:
+            if last_day is not None and day - last_day == timedelta(days=1):
+                stats.current_streak = (stats.current_streak or 0) + 1
+            else:
+                stats.current_streak = 1
+            stats.last_logged_day = day
+            stats.longest_streak = max(stats.longest_streak or 0, stats.current_streak)
+
+        histograms = json.loads(stats.emotion_histograms or "{}")
+        counts = histograms.setdefault(emotion, [0] * INTENSITY_LEVELS)
+        counts[min(max(intensity, 1), INTENSITY_LEVELS) - 1] += 1
+        stats.emotion_histograms = json.dumps(histograms, separators=(",", ":"))
+
+    def _get_for_update(self, db: Session, user_id: str) -> UserMoodStats:
+        """Load (creating if needed) the user's row, locked until commit where supported"""
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            db.execute(insert(UserMoodStats).values(user_id=user_id).on_conflict_do_nothing(index_elements=["user_id"]))
+            return db.query(UserMoodStats).filter(UserMoodStats.user_id == user_id).with_for_update().one()
+
+        stats = db.query(UserMoodStats).filter(UserMoodStats.user_id == user_id).with_for_update().first()
+        if stats is None:
+            stats = UserMoodStats(user_id=user_id, entry_count=0, mean_intensity=0.0, m2=0.0,
+                                  current_streak=0, longest_streak=0, emotion_histograms="{}")
+            db.add(stats)
+        return stats
+
+mood_stats = MoodStatsService()
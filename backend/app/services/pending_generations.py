@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.drain import generation_drain
+from app.core.metrics import metrics
+from app.database import SessionLocal, Message, PendingGeneration
+from app.services.ai_service import get_ai_service
+from app.services.analytics_rollup import analytics_rollups
+
+logger = logging.getLogger(__name__)
+
+RETRY_BATCH = 20
+
+pending_generation_retries = metrics.counter(
+    "mindease_pending_generation_retries_total", "Retried chat replies left unfinished by a request", ["outcome"]
+)
+
+class PendingGenerations:
+    """Chat turns whose assistant reply has not been saved yet.
+
+    A row is added in the same commit as the user's message and deleted in
+    the same commit as the reply, so it outlives anything that stops the
+    request in between: a deploy, a crash or a cancelled task. The request
+    holds the first claim (attempt 0). Once that claim is older than
+    PENDING_GENERATION_STALE_SECONDS, longer than a provider call can take,
+    one worker claims the row and the reply is generated and saved then.
+    Whoever completes the row must still hold the claim, so each turn gets
+    one saved reply.
+    """
+
+    def record(self, db: Session, user_message: Message, user_id: str, session_type: str,
+               emotion_context=None, topic_id=None):
+        """Add the pending row for a user message (commit it together with the message)"""
+        if user_message.id is None:
+            user_message.id = str(uuid.uuid4())
+        db.add(PendingGeneration(
+            user_message_id=user_message.id,
+            session_id=user_message.session_id,
+            user_id=user_id,
+            session_type=session_type,
+            emotion_context=emotion_context,
+            topic_id=topic_id,
+            # Claimed by the live request until it goes stale
+            claimed_at=datetime.utcnow()
+        ))
+
+    def complete(self, db: Session, user_message_id: str, attempt: int = 0) -> bool:
+        """Remove the pending row if ``attempt`` still holds it (commit it together with the reply).
+
+        Returns False when a retry has claimed the row since; the caller
+        must not save its reply then.
+        """
+        deleted = db.query(PendingGeneration).filter(
+            PendingGeneration.user_message_id == user_message_id,
+            PendingGeneration.attempts == attempt
+        ).delete(synchronize_session=False)
+        return deleted == 1
+
+    async def run_forever(self):
+        """Retry stale rows every PENDING_GENERATION_RETRY_SECONDS until cancelled"""
+        longest_call = settings.AI_REQUEST_TIMEOUT_SECONDS * (settings.AI_REQUEST_MAX_RETRIES + 1)
+        if longest_call >= settings.PENDING_GENERATION_STALE_SECONDS:
+            logger.warning(
+                "⚠️  A provider call can take %.0fs, not less than PENDING_GENERATION_STALE_SECONDS (%ss): "
+                "a slow reply may be retried while it is still being generated",
+                longest_call, settings.PENDING_GENERATION_STALE_SECONDS
+            )
+        while True:
+            await asyncio.sleep(settings.PENDING_GENERATION_RETRY_SECONDS)
+            try:
+                await self.retry_stale()
+            except Exception as e:
+                logger.error("❌ Retrying pending generations failed: %s", e)
+
+    async def retry_stale(self) -> int:
+        """Generate and save replies for stale rows this worker manages to claim; returns how many"""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.PENDING_GENERATION_STALE_SECONDS)
+        completed = 0
+        db = SessionLocal()
+        try:
+            # The live request's claim, or an earlier retry's, must have gone stale
+            rows = db.query(PendingGeneration).filter(
+                PendingGeneration.created_at < cutoff,
+                PendingGeneration.attempts < settings.PENDING_GENERATION_MAX_ATTEMPTS,
+                or_(PendingGeneration.claimed_at.is_(None), PendingGeneration.claimed_at < cutoff)
+            ).order_by(PendingGeneration.created_at).limit(RETRY_BATCH).all()
+
+            for row in rows:
+                if generation_drain.draining:
+                    break
+                # Claim it; another worker that read the same row, or a live
+                # request that completes it meanwhile, wins the race
+                attempt = row.attempts + 1
+                claimed = db.query(PendingGeneration).filter(
+                    PendingGeneration.user_message_id == row.user_message_id,
+                    PendingGeneration.attempts == row.attempts,
+                    or_(PendingGeneration.claimed_at.is_(None), PendingGeneration.claimed_at < cutoff)
+                ).update(
+                    {"attempts": attempt, "claimed_at": datetime.utcnow()},
+                    synchronize_session=False
+                )
+                db.commit()
+                if claimed != 1:
+                    continue
+                if await self._retry(db, row.user_message_id, attempt):
+                    completed += 1
+        finally:
+            db.close()
+
+        if completed:
+            logger.info("♻️  Saved %d replies left unfinished by earlier requests", completed)
+        return completed
+
+    async def _retry(self, db: Session, user_message_id: str, attempt: int) -> bool:
+        row = db.get(PendingGeneration, user_message_id)
+        user_message = db.get(Message, user_message_id)
+        if row is None or user_message is None:
+            if row is not None:
+                db.delete(row)
+                db.commit()
+            return False
+
+        try:
+            async with generation_drain.generation():
+                reply = await get_ai_service().generate_response(
+                    message=user_message.content,
+                    session_type=row.session_type,
+                    emotion_context=row.emotion_context,
+                    topic_id=row.topic_id,
+                    user_id=row.user_id
+                )
+        except Exception as e:
+            db.rollback()
+            row.last_error = f"{type(e).__name__}: {e}"
+            db.commit()
+            pending_generation_retries.inc("failed")
+            logger.warning("⚠️  Pending generation %s failed: %s", user_message_id, e)
+            return False
+
+        user_id = row.user_id
+        if not self.complete(db, user_message_id, attempt):
+            # Completed or claimed again while this reply was generated
+            db.rollback()
+            pending_generation_retries.inc("superseded")
+            return False
+        # Keep the reply right after the message it answers
+        when = (user_message.timestamp or datetime.utcnow()) + timedelta(milliseconds=1)
+        db.add(Message(
+            session_id=user_message.session_id,
+            content=reply,
+            role="assistant",
+            crisis_detected=user_message.crisis_detected,
+            timestamp=when
+        ))
+        analytics_rollups.record_messages(
+            db, user_id, crisis_count=1 if user_message.crisis_detected else 0, when=when
+        )
+        db.commit()
+        response_cache.invalidate_user(user_id)
+        pending_generation_retries.inc("completed")
+        return True
+
+pending_generations = PendingGenerations()
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import Topic
+from app.services.topic_search import TopicSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Seeded into an empty topics table so a fresh install has something to serve
+SAMPLE_TOPICS = [
+    {
+        "id": "topic_1",
+        "title": "Monday Motivation",
+        "subtitle": "How are you starting your week?",
+        "description": "Share your thoughts on starting a new week and any goals or challenges you're facing.",
+        "category": "workplace"
+    },
+    {
+        "id": "topic_2",
+        "title": "Workplace Stress",
+        "subtitle": "Dealing with deadline pressure",
+        "description": "Let's talk about managing stress and pressure in the workplace.",
+        "category": "workplace"
+    },
+    {
+        "id": "topic_3",
+        "title": "Social Connections",
+        "subtitle": "Feeling isolated lately?",
+        "description": "Discuss the importance of social connections and how to maintain them.",
+        "category": "social"
+    },
+    {
+        "id": "topic_4",
+        "title": "Self-Care Sunday",
+        "subtitle": "What does self-care mean to you?",
+        "description": "Explore different ways to practice self-care and prioritize your well-being.",
+        "category": "personal"
+    },
+    {
+        "id": "topic_5",
+        "title": "Digital Wellness",
+        "subtitle": "Balancing screen time and mental health",
+        "description": "How do you manage your relationship with technology and social media?",
+        "category": "personal"
+    }
+]
+
+TOPIC_FIELDS = ["id", "title", "subtitle", "description", "category", "is_active", "created_at"]
+
+class CatalogSnapshot:
+    """Immutable view of the active topics, indexed by id, category and text"""
+
+    def __init__(self, topics: List[Dict[str, Any]]):
+        self.topics: Tuple[Dict[str, Any], ...] = tuple(topics)
+        self.by_id: Dict[str, Dict[str, Any]] = {topic["id"]: topic for topic in topics}
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for topic in topics:
+            by_category.setdefault(topic["category"], []).append(topic)
+        self.by_category = {category: tuple(items) for category, items in by_category.items()}
+        self.categories = sorted(self.by_category)
+        self.version = hashlib.blake2b(
+            repr([[topic[field] for field in TOPIC_FIELDS] for topic in topics]).encode(),
+            digest_size=8
+        ).hexdigest()
+        self.search_index = TopicSearchIndex(self.topics)
+        self._daily: Dict[date, Dict[Optional[str], tuple]] = {}
+
+    def daily(self, day: date, category: Optional[str] = None) -> tuple:
+        """The day's rotation, optionally for one category"""
+        rotation = self._daily.get(day)
+        if rotation is None:
+            rotation = self._build_rotation(day)
+        return rotation.get(category, ())
+
+    def _build_rotation(self, day: date) -> Dict[Optional[str], tuple]:
+        # Ordered by a hash of (day, id): the same on every worker, different every day
+        ordered = sorted(
+            self.topics,
+            key=lambda topic: hashlib.blake2b(f"{day}:{topic['id']}".encode(), digest_size=8).digest()
+        )
+        count = settings.DAILY_TOPIC_COUNT
+        rotation: Dict[Optional[str], tuple] = {None: tuple(ordered[:count])}
+        for category in self.categories:
+            rotation[category] = tuple(topic for topic in ordered if topic["category"] == category)[:count]
+
+        if len(self._daily) >= 7:
+            self._daily.clear()
+        self._daily[day] = rotation
+        return rotation
+
+class TopicCatalog:
+    """In-memory catalog of the ``topics`` table.
+
+    Readers get the current snapshot, which is never mutated; a refresh
+    builds a new one and swaps the reference. Admin writes refresh this
+    process immediately and other workers pick them up within the TTL.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._loaded_at > settings.TOPIC_CATALOG_TTL_SECONDS:
+            snapshot = self.refresh(db, if_stale=True)
+        return snapshot
+
+    def refresh(self, db: Session, if_stale: bool = False) -> CatalogSnapshot:
+        """Rebuild the snapshot from the database and swap it in"""
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if if_stale and self._snapshot is not None and \
+                    time.monotonic() - self._loaded_at <= settings.TOPIC_CATALOG_TTL_SECONDS:
+                return self._snapshot
+
+            self._seed_if_empty(db)
+            rows = db.query(Topic).filter(Topic.is_active == True).order_by(Topic.created_at, Topic.id).all()
+            snapshot = CatalogSnapshot([{field: getattr(row, field) for field in TOPIC_FIELDS} for row in rows])
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            logger.info("📚 Topic catalog loaded: %d topics, version %s", len(snapshot.topics), snapshot.version)
+            return snapshot
+
+    def _seed_if_empty(self, db: Session):
+        if db.query(Topic.id).first() is not None:
+            return
+        db.add_all([Topic(**topic, is_active=True) for topic in SAMPLE_TOPICS])
+        try:
+            db.commit()
+            logger.info("🌱 Seeded %d sample topics", len(SAMPLE_TOPICS))
+        except IntegrityError:
+            # Another worker seeded first
+            db.rollback()
+
+topic_catalog = TopicCatalog()
@@ -0,0 +1,181 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Callable
+
+import numpy as np
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.database import Session as DBSession, MoodEntry, UserTopicRecommendation
+from app.services.topic_catalog import CatalogSnapshot
+
+# Mood picker labels (lowercased) and how much each leans towards a topic category
+EMOTIONS = ["happy", "sad", "anxious", "frustrated", "tired", "confused", "calm", "mixed"]
+CATEGORY_AFFINITY = {
+    #              workplace social personal general
+    "happy":      [0.2,      0.4,   0.2,     0.2],
+    "sad":        [0.1,      0.4,   0.4,     0.1],
+    "anxious":    [0.4,      0.1,   0.4,     0.1],
+    "frustrated": [0.6,      0.1,   0.2,     0.1],
+    "tired":      [0.3,      0.1,   0.5,     0.1],
+    "confused":   [0.2,      0.1,   0.3,     0.4],
+    "calm":       [0.1,      0.2,   0.3,     0.4],
+    "mixed":      [0.25,     0.25,  0.25,    0.25],
+}
+AFFINITY_CATEGORIES = ["workplace", "social", "personal", "general"]
+
+MOOD_WEIGHT = 0.7  # vs. categories of past topic-based sessions
+MOOD_HALF_LIFE_DAYS = 7.0
+REPEAT_PENALTY = 0.15  # per earlier session on the same topic
+
+class TopicRecommender:
+    """Batch-scored topic recommendations, served as a stored top-k list.
+
+    ``compute`` scores every active topic for every recently active user in
+    a few matrix products: recency-weighted emotion mix x emotion/category
+    affinity, blended with the categories of the user's topic-based
+    sessions, minus a penalty for topics they already discussed. Requests
+    only read the stored list.
+    """
+
+    def affinity_matrix(self, categories: List[str]) -> np.ndarray:
+        """Emotion x category affinities; categories outside the table get a neutral column"""
+        table = np.array([CATEGORY_AFFINITY[emotion] for emotion in EMOTIONS])
+        neutral = table.mean(axis=1)
+        columns = [
+            table[:, AFFINITY_CATEGORIES.index(category)] if category in AFFINITY_CATEGORIES else neutral
+            for category in categories
+        ]
+        return np.stack(columns, axis=1) if columns else np.zeros((len(EMOTIONS), 0))
+
+    def compute(
+        self,
+        db: Session,
+        catalog: CatalogSnapshot,
+        chunk_size: int = 2000,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """Score and store top-k topics for every user active in the window; returns users written"""
+        topics = catalog.topics
+        if not topics:
+            return 0
+        now = datetime.utcnow()
+        since = now - timedelta(days=settings.RECOMMENDATION_WINDOW_DAYS)
+
+        topic_index = {topic["id"]: index for index, topic in enumerate(topics)}
+        categories = catalog.categories
+        topic_category = np.array([categories.index(topic["category"]) for topic in topics])
+        # Tiny fixed per-topic offsets break ties the same way on every run
+        tie_break = np.array([
+            int.from_bytes(hashlib.blake2b(topic["id"].encode(), digest_size=4).digest(), "little") / 2 ** 32 * 1e-6
+            for topic in topics
+        ])
+
+        user_index: Dict[str, int] = {}
+        emotion_index = {emotion: index for index, emotion in enumerate(EMOTIONS)}
+
+        mood_users, mood_emotions, mood_weights = [], [], []
+        moods = db.query(MoodEntry.user_id, MoodEntry.emotion, MoodEntry.intensity, MoodEntry.created_at).filter(
+            MoodEntry.created_at >= since
+        ).yield_per(5000)
+        for user_id, emotion, intensity, created_at in moods:
+            emotion_code = emotion_index.get((emotion or "").lower())
+            if emotion_code is None:
+                continue
+            mood_users.append(user_index.setdefault(user_id, len(user_index)))
+            mood_emotions.append(emotion_code)
+            age_days = (now - created_at.replace(tzinfo=None)).total_seconds() / 86400
+            mood_weights.append((intensity or 5) / 10 * 0.5 ** (age_days / MOOD_HALF_LIFE_DAYS))
+
+        session_users, session_topics, session_counts = [], [], []
+        topic_sessions = db.query(DBSession.user_id, DBSession.topic_id, func.count(DBSession.id)).filter(
+            DBSession.session_type == "topic_based",
+            DBSession.topic_id.isnot(None)
+        ).group_by(DBSession.user_id, DBSession.topic_id).yield_per(5000)
+        for user_id, topic_id, count in topic_sessions:
+            if topic_id not in topic_index:
+                continue
+            session_users.append(user_index.setdefault(user_id, len(user_index)))
+            session_topics.append(topic_index[topic_id])
+            session_counts.append(count)
+
+        user_ids = list(user_index)
+        if not user_ids:
+            return 0
+
+        emotion_mix = np.zeros((len(user_ids), len(EMOTIONS)))
+        np.add.at(emotion_mix, (np.array(mood_users, dtype=np.int64), np.array(mood_emotions, dtype=np.int64)), mood_weights)
+
+        # Past topic sessions stay sparse (user, topic, count) triples, sorted by user
+        session_users = np.array(session_users, dtype=np.int64)
+        session_topics = np.array(session_topics, dtype=np.int64)
+        session_counts = np.array(session_counts, dtype=np.float64)
+        by_user = np.argsort(session_users, kind="stable")
+        session_users, session_topics, session_counts = session_users[by_user], session_topics[by_user], session_counts[by_user]
+        session_category = np.zeros((len(user_ids), len(categories)))
+        np.add.at(session_category, (session_users, topic_category[session_topics]), session_counts)
+
+        # Rows are distributions, so users with lots of history don't outscore others
+        emotion_mix = emotion_mix / np.maximum(emotion_mix.sum(axis=1, keepdims=True), 1e-12)
+        session_category = session_category / np.maximum(session_category.sum(axis=1, keepdims=True), 1e-12)
+
+        has_mood = emotion_mix.sum(axis=1, keepdims=True) > 0
+        has_sessions = session_category.sum(axis=1, keepdims=True) > 0
+        mood_weight = np.where(has_sessions, MOOD_WEIGHT, 1.0) * has_mood
+        session_weight = np.where(has_mood, 1 - MOOD_WEIGHT, 1.0) * has_sessions
+        preference = mood_weight * (emotion_mix @ self.affinity_matrix(categories)) + session_weight * session_category
+
+        top_k = min(settings.RECOMMENDATION_TOP_K, len(topics))
+        written = 0
+        for start in range(0, len(user_ids), chunk_size):
+            stop = min(start + chunk_size, len(user_ids))
+            scores = preference[start:stop][:, topic_category] + tie_break
+            # Already discussed topics drop a little per earlier session
+            first, last = np.searchsorted(session_users, [start, stop])
+            np.subtract.at(
+                scores,
+                (session_users[first:last] - start, session_topics[first:last]),
+                REPEAT_PENALTY * session_counts[first:last]
+            )
+            best = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind="stable")
+            ranked = np.take_along_axis(best, order, axis=1)
+
+            chunk_users = user_ids[start:stop]
+            db.execute(delete(UserTopicRecommendation).where(UserTopicRecommendation.user_id.in_(chunk_users)))
+            db.execute(insert(UserTopicRecommendation), [
+                {
+                    "user_id": user_id,
+                    "topic_ids": json.dumps([topics[index]["id"] for index in row]),
+                    "catalog_version": catalog.version,
+                    "computed_at": now
+                }
+                for user_id, row in zip(chunk_users, ranked.tolist())
+            ])
+            db.commit()
+            # Drop the cached lists get_topic_ids would otherwise keep serving
+            for user_id in chunk_users:
+                response_cache.invalidate_user(user_id)
+            written += len(chunk_users)
+            if progress:
+                progress(written, len(user_ids))
+        return written
+
+    def get_topic_ids(self, db: Session, user_id: str) -> List[str]:
+        """The user's stored recommendations, best first (empty if none yet)"""
+        cache_key = response_cache.key(user_id, "topics.recommended")
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        row = db.query(UserTopicRecommendation.topic_ids).filter(
+            UserTopicRecommendation.user_id == user_id
+        ).scalar()
+        topic_ids = json.loads(row) if row else []
+        response_cache.set(cache_key, topic_ids)
+        return topic_ids
+
+topic_recommender = TopicRecommender()
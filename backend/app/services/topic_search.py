@@ -0,0 +1,82 @@
+import bisect
+import heapq
+import math
+import re
+from typing import Optional, List, Dict, Any, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "for", "how", "i", "in", "is", "it",
+    "of", "on", "or", "s", "the", "to", "what", "with", "you", "your"
+}
+
+# Matches in the title count more than in the subtitle, and both more than the description
+FIELD_WEIGHTS = {"title": 3.0, "subtitle": 2.0, "description": 1.0}
+K1 = 1.2
+B = 0.75
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+class TopicSearchIndex:
+    """BM25F inverted index over topic titles, subtitles and descriptions.
+
+    Field-weighted, length-normalised term frequencies are folded into the
+    postings when the index is built, so a query is a sum over the postings
+    of its terms plus a top-k heap. The last query term also matches as a
+    prefix, for search-as-you-type.
+    """
+
+    def __init__(self, topics: Tuple[Dict[str, Any], ...]):
+        self.topics = topics
+        count = len(topics)
+        tokens = [{field: tokenize(topic[field] or "") for field in FIELD_WEIGHTS} for topic in topics]
+        average_length = {}
+        for field in FIELD_WEIGHTS:
+            total = sum(len(doc[field]) for doc in tokens)
+            average_length[field] = total / count if total else 1.0
+
+        postings: Dict[str, Dict[int, float]] = {}
+        for doc_id, doc in enumerate(tokens):
+            for field, weight in FIELD_WEIGHTS.items():
+                if not doc[field]:
+                    continue
+                norm = 1 - B + B * len(doc[field]) / average_length[field]
+                for token in doc[field]:
+                    entry = postings.setdefault(token, {})
+                    entry[doc_id] = entry.get(doc_id, 0.0) + weight / norm
+
+        # Saturate once per (term, doc) and scale by idf; queries only add these up
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for token, docs in postings.items():
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[token] = [(doc_id, idf * tf * (K1 + 1) / (tf + K1)) for doc_id, tf in docs.items()]
+        self.vocabulary = sorted(self.postings)
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Top ``limit`` (topic, score) pairs for the query, best first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term in set(terms[:-1]):
+            for doc_id, score in self.postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        # The last term may still be being typed: score its best prefix match per topic
+        prefix_scores: Dict[int, float] = {}
+        start = bisect.bisect_left(self.vocabulary, terms[-1])
+        for token in self.vocabulary[start:]:
+            if not token.startswith(terms[-1]):
+                break
+            for doc_id, score in self.postings[token]:
+                if score > prefix_scores.get(doc_id, 0.0):
+                    prefix_scores[doc_id] = score
+        for doc_id, score in prefix_scores.items():
+            scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        if category:
+            scores = {doc_id: score for doc_id, score in scores.items() if self.topics[doc_id]["category"] == category}
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.topics[doc_id], round(score, 4)) for doc_id, score in best]
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.database import engine, SessionLocal
+from app.services.ai_service import get_ai_service
+from app.services.crisis_detection import get_crisis_service
+from app.services.topic_catalog import topic_catalog
+
+logger = logging.getLogger(__name__)
+
+class WarmUp:
+    """Work each worker does after startup and before it reports ready.
+
+    Runs off the event loop, so liveness checks are answered meanwhile.
+    Until the database steps succeed the worker stays not-ready and the
+    warm-up is retried; failures in the other steps are reported but do
+    not hold readiness back, since requests can still be served.
+    """
+
+    # (step, required for readiness)
+    STEPS = (
+        ("db_pool", True),
+        ("topic_catalog", True),
+        ("crisis_patterns", False),
+        ("ai_provider", False)
+    )
+
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    async def run_until_ready(self):
+        while not await asyncio.to_thread(self.run):
+            await asyncio.sleep(settings.WARMUP_RETRY_SECONDS)
+
+    def run(self) -> bool:
+        """One pass over the steps still to do; returns whether the worker is ready"""
+        self.attempts += 1
+        started = time.perf_counter()
+        for name, required in self.STEPS:
+            if self.steps.get(name, {}).get("ok"):
+                continue
+            step_started = time.perf_counter()
+            try:
+                detail = getattr(self, f"_warm_{name}")()
+                self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - step_started) * 1000, 1), "detail": detail}
+            except Exception as e:
+                self.steps[name] = {"ok": False, "required": required, "error": f"{type(e).__name__}: {e}"}
+                logger.warning("⚠️  Warm-up step %s failed: %s", name, e)
+
+        self.ready = all(self.steps[name]["ok"] for name, required in self.STEPS if required)
+        if self.ready:
+            logger.info("🔥 Warm-up complete in %.0fms (attempt %d)", (time.perf_counter() - started) * 1000, self.attempts)
+        return self.ready
+
+    def _warm_db_pool(self):
+        """Open pool connections now so the first requests don't pay for connecting"""
+        count = settings.WARMUP_DB_CONNECTIONS
+        if hasattr(engine.pool, "size"):
+            count = min(count, engine.pool.size())
+        connections = []
+        try:
+            for _ in range(count):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.exec_driver_sql("SELECT 1")
+        finally:
+            # Closing returns them to the pool, still open
+            for connection in connections:
+                connection.close()
+        return {"connections": len(connections)}
+
+    def _warm_topic_catalog(self):
+        db = SessionLocal()
+        try:
+            snapshot = topic_catalog.refresh(db)
+        finally:
+            db.close()
+        return {"topics": len(snapshot.topics)}
+
+    def _warm_crisis_patterns(self):
+        # Builds the service, compiling its patterns
+        get_crisis_service().detect_crisis("warm-up")
+
+    def _warm_ai_provider(self):
+        # Imports the provider SDK and builds its client
+        return {"provider": get_ai_service().warm_up()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "attempts": self.attempts, "steps": self.steps}
+
+warmup = WarmUp()
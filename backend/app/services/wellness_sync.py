@@ -0,0 +1,219 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.database import MoodEntry, WellnessActivity, SyncReceipt
+from app.services.analytics_rollup import analytics_rollups
+from app.services.mood_stats import mood_stats
+from app.services.activity_calendar import activity_calendar
+
+VALID_ACTIVITIES = ["breathing", "affirmations", "reframing"]
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+def _to_utc(value: Optional[datetime], now: datetime) -> datetime:
+    """Naive UTC timestamp, as the rest of the app stores them"""
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class WellnessSyncService:
+    """Applies a batch of offline mood entries, activities and completions.
+
+    Every item carries a client-generated idempotency key. Keys already seen
+    for the user (in ``sync_receipts``) come back as duplicates with the id
+    of the original row, so replaying a queue after a dropped connection
+    never creates twice. Everything else is validated in one pass and written
+    with bulk statements in the caller's transaction.
+    """
+
+    def apply(self, db: Session, user_id: str, moods: List[Any], activities: List[Any], completions: List[Any]) -> List[Dict[str, Any]]:
+        """Stage the batch and return one result per item, in request order (caller commits)"""
+        now = datetime.utcnow()
+        items = (
+            [("mood", item) for item in moods]
+            + [("activity", item) for item in activities]
+            + [("completion", item) for item in completions]
+        )
+
+        # One lookup for every key the batch uses or refers to
+        lookup_keys = {item.client_id for _, item in items}
+        lookup_keys.update(item.activity_client_id for item in completions if item.activity_client_id)
+        receipts = {
+            receipt.idempotency_key: receipt
+            for receipt in db.query(SyncReceipt).filter(
+                SyncReceipt.user_id == user_id,
+                SyncReceipt.idempotency_key.in_(lookup_keys)
+            )
+        } if lookup_keys else {}
+
+        results: List[Dict[str, Any]] = []
+        seen: Dict[str, Dict[str, Any]] = {}
+        mood_rows, activity_rows, receipt_rows = [], [], []
+        new_activities: Dict[str, Dict[str, Any]] = {}  # client_id -> row, for same-batch completions
+        pending_completions = []
+
+        def result(kind: str, item: Any, status: str, record_id: Optional[str] = None, error: Optional[str] = None):
+            entry = {"client_id": item.client_id, "kind": kind, "status": status, "id": record_id, "error": error}
+            results.append(entry)
+            return entry
+
+        for kind, item in items:
+            previous = receipts.get(item.client_id)
+            if previous is not None:
+                if previous.kind != kind:
+                    result(kind, item, "rejected", error=f"Idempotency key already used for another item ({previous.kind})")
+                else:
+                    result(kind, item, "duplicate", previous.record_id)
+                continue
+            if item.client_id in seen:
+                # Repeated within the same batch: mirror the first occurrence
+                first = seen[item.client_id]
+                if first["kind"] != kind or first["status"] == "rejected":
+                    result(kind, item, "rejected", error="Idempotency key repeated in batch")
+                else:
+                    result(kind, item, "duplicate", first["id"])
+                continue
+
+            created_at = _to_utc(getattr(item, "created_at", None), now)
+            error = self._validate(kind, item, created_at, now)
+            if error:
+                seen[item.client_id] = result(kind, item, "rejected", error=error)
+                continue
+
+            if kind == "mood":
+                row = {"id": str(uuid.uuid4()), "user_id": user_id, "emotion": item.emotion,
+                       "intensity": item.intensity, "notes": item.notes, "created_at": created_at}
+                mood_rows.append(row)
+            elif kind == "activity":
+                row = {"id": str(uuid.uuid4()), "user_id": user_id, "activity_type": item.activity_type,
+                       "duration": item.duration, "completed": False, "feedback_rating": None,
+                       "created_at": created_at}
+                activity_rows.append(row)
+                new_activities[item.client_id] = row
+            else:
+                # Completions are resolved once every activity in the batch is known
+                entry = result(kind, item, "applied")
+                seen[item.client_id] = entry
+                pending_completions.append((item, entry))
+                continue
+
+            seen[item.client_id] = result(kind, item, "applied", row["id"])
+            receipt_rows.append({"user_id": user_id, "idempotency_key": item.client_id,
+                                 "kind": kind, "record_id": row["id"]})
+
+        completed_existing = self._resolve_completions(
+            db, user_id, pending_completions, receipts, new_activities, receipt_rows
+        )
+
+        if mood_rows:
+            db.execute(insert(MoodEntry), mood_rows)
+        if activity_rows:
+            db.execute(insert(WellnessActivity), activity_rows)
+        if receipt_rows:
+            db.execute(insert(SyncReceipt), receipt_rows)
+
+        moods_logged = [(row["emotion"], row["intensity"], row["created_at"]) for row in mood_rows]
+        analytics_rollups.record_batch(
+            db,
+            user_id,
+            moods=moods_logged,
+            activities=[(row["activity_type"], row["created_at"], row["completed"]) for row in activity_rows],
+            completions=[(activity.activity_type, activity.created_at) for activity in completed_existing]
+        )
+        mood_stats.record_many(db, user_id, moods_logged)
+
+        activity_calendar.mark_days(db, user_id, "mood_logged", {row["created_at"].date() for row in mood_rows})
+        completion_days: Dict[str, set] = {}
+        for row in activity_rows:
+            if row["completed"]:
+                # Finished offline: the start day is the best estimate we have
+                completion_days.setdefault(row["activity_type"], set()).add(row["created_at"].date())
+        for activity in completed_existing:
+            completion_days.setdefault(activity.activity_type, set()).add(now.date())
+        for activity_type, days in completion_days.items():
+            activity_calendar.mark_days(db, user_id, f"{activity_type}_completed", days)
+        return results
+
+    def _validate(self, kind: str, item: Any, created_at: datetime, now: datetime) -> Optional[str]:
+        if created_at > now + MAX_CLOCK_SKEW:
+            return "created_at is in the future"
+        if kind == "mood" and not 1 <= item.intensity <= 10:
+            return "Intensity must be between 1 and 10"
+        if kind == "activity":
+            if item.activity_type not in VALID_ACTIVITIES:
+                return f"Activity type must be one of: {VALID_ACTIVITIES}"
+            if item.duration < 0:
+                return "Duration must not be negative"
+        if kind == "completion":
+            if bool(item.activity_id) == bool(item.activity_client_id):
+                return "Exactly one of activity_id or activity_client_id is required"
+            if item.feedback_rating and not 1 <= item.feedback_rating <= 5:
+                return "Feedback rating must be between 1 and 5"
+        return None
+
+    def _resolve_completions(
+        self,
+        db: Session,
+        user_id: str,
+        pending: List[tuple],
+        receipts: Dict[str, SyncReceipt],
+        new_activities: Dict[str, Dict[str, Any]],
+        receipt_rows: List[Dict[str, Any]]
+    ) -> List[WellnessActivity]:
+        """Apply completions; returns the stored activities that became completed"""
+        if not pending:
+            return []
+
+        # Stored activities, by server id or through an earlier sync's receipt
+        stored_ids = set()
+        for item, _ in pending:
+            if item.activity_id:
+                stored_ids.add(item.activity_id)
+            elif item.activity_client_id not in new_activities:
+                receipt = receipts.get(item.activity_client_id)
+                if receipt is not None and receipt.kind == "activity":
+                    stored_ids.add(receipt.record_id)
+        stored = {
+            activity.id: activity
+            for activity in db.query(WellnessActivity).filter(
+                WellnessActivity.user_id == user_id,
+                WellnessActivity.id.in_(stored_ids)
+            )
+        } if stored_ids else {}
+
+        newly_completed = []
+        for item, entry in pending:
+            if item.activity_client_id in new_activities:
+                # Started and finished offline: insert the row already completed
+                row = new_activities[item.activity_client_id]
+                row["completed"] = True
+                if item.feedback_rating:
+                    row["feedback_rating"] = item.feedback_rating
+                record_id = row["id"]
+            else:
+                if item.activity_id:
+                    activity = stored.get(item.activity_id)
+                else:
+                    receipt = receipts.get(item.activity_client_id)
+                    activity = stored.get(receipt.record_id) if receipt is not None and receipt.kind == "activity" else None
+                if activity is None:
+                    entry.update(status="rejected", error="Activity not found")
+                    continue
+                if not activity.completed:
+                    activity.completed = True
+                    newly_completed.append(activity)
+                if item.feedback_rating:
+                    activity.feedback_rating = item.feedback_rating
+                record_id = activity.id
+
+            entry["id"] = record_id
+            receipt_rows.append({"user_id": user_id, "idempotency_key": item.client_id,
+                                 "kind": "completion", "record_id": record_id})
+        return newly_completed
+
+wellness_sync = WellnessSyncService()
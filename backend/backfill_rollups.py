@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Analytics rollup backfill for MindEase
+Recomputes the per-user daily rollup tables (and, for full-history runs, the
+running mood statistics and activity calendars) from the raw tables, for
+every user, a single one, or only users whose data predates the rollups
+(--missing, run by build.sh on every deploy). Safe to re-run: each user's
+rows in the window are replaced, so it also reconciles any drift from the
+incremental updates.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import exists, or_
+
+from app.database import Base, engine, SessionLocal, User, Session as DBSession, MoodEntry, WellnessActivity, UserDailyRollup
+from app.services.analytics_rollup import analytics_rollups
+from app.services.mood_stats import mood_stats
+from app.services.activity_calendar import activity_calendar
+
+def backfill(user_id=None, days=None, missing=False):
+    """Rebuild rollups for one user, all users, or only users who have data but no rollups"""
+    start_day = datetime.utcnow().date() - timedelta(days=days) if days else None
+    window = f"last {days} days" if days else "full history"
+    print(f"📊 Backfilling analytics rollups ({window}{', users without rollups' if missing else ''})...")
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if user_id:
+            user_ids = [user_id]
+        elif missing:
+            # Users from before the rollup tables: they have raw rows but were never rolled up
+            has_data = or_(
+                exists().where(DBSession.user_id == User.id),
+                exists().where(MoodEntry.user_id == User.id),
+                exists().where(WellnessActivity.user_id == User.id)
+            )
+            user_ids = [
+                row.id for row in db.query(User.id).filter(
+                    has_data, ~exists().where(UserDailyRollup.user_id == User.id)
+                ).yield_per(1000)
+            ]
+        else:
+            user_ids = [row.id for row in db.query(User.id).yield_per(1000)]
+
+        total_days = 0
+        for index, uid in enumerate(user_ids, start=1):
+            total_days += analytics_rollups.backfill(db, uid, start_day)
+            if start_day is None:
+                # Running mood statistics and calendars cover all-time history only
+                mood_stats.rebuild(db, uid)
+                activity_calendar.rebuild(db, uid)
+            if index % 100 == 0:
+                print(f"   ... {index}/{len(user_ids)} users")
+
+        print(f"✅ Rebuilt {total_days} user-days for {len(user_ids)} users")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error backfilling rollups: {e}")
+        return False
+    finally:
+        db.close()
+
+    return True
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Rebuild MindEase analytics rollups")
+    parser.add_argument("--user", help="Only rebuild this user id")
+    parser.add_argument("--days", type=int, help="Only rebuild the last N days")
+    parser.add_argument("--missing", action="store_true", help="Only users with data but no rollups (run on deploy)")
+    args = parser.parse_args()
+
+    if not backfill(args.user, args.days, args.missing):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
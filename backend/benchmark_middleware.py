@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Request middleware benchmark for MindEase
+Measures the per-request overhead of the observability middleware by calling
+a small app directly over ASGI (no server or network): once with no
+middleware, once with the same work done in an @app.middleware("http")
+function, and once with the pure ASGI RequestObservabilityMiddleware.
+Tracing and the query profiler are switched off so only the middleware
+itself is measured.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["TRACE_ENABLED"] = "false"
+os.environ["PROFILER_ENABLED"] = "false"
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.metrics import http_requests, http_request_duration, http_requests_in_flight, route_template
+from app.core.middleware import RequestObservabilityMiddleware
+from app.core.request_context import request_id, request_sampled, request_sampler
+
+logger = logging.getLogger("benchmark")
+
+def build_app(middleware: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id, "title": "Breathing exercise", "tags": ["calm", "focus"]}
+
+    @app.get("/api/v1/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(8):
+                yield b"x" * 512
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    if middleware == "decorator":
+        # The previous @app.middleware("http") implementation, minus tracing and profiling
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            start_time = time.perf_counter()
+            current_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+            request_id.set(current_id)
+            sampled = request_sampler.sample(request.url.path)
+            request_sampled.set(sampled)
+            http_requests_in_flight.inc()
+            try:
+                response = await call_next(request)
+            finally:
+                http_requests_in_flight.dec()
+            process_time = time.perf_counter() - start_time
+            route_path = route_template(request.scope)
+            http_requests.inc(request.method, route_path, str(response.status_code))
+            http_request_duration.observe(process_time, request.method, route_path)
+            response.headers["X-Request-ID"] = current_id
+            if sampled:
+                logger.info(
+                    "📤 %s %s - Status: %s - Time: %.1fms",
+                    request.method, request.url.path, response.status_code, process_time * 1000
+                )
+            return response
+    elif middleware == "asgi":
+        app.add_middleware(RequestObservabilityMiddleware)
+    return app
+
+async def run(app: FastAPI, path: str, requests: int) -> float:
+    """Mean microseconds per request over ``requests`` sequential calls"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 8000)
+    }
+
+    async def send(message):
+        pass
+
+    async def call():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                # Streaming responses listen for a disconnect until the body is done
+                await asyncio.Event().wait()
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(min(200, requests)):
+        await call()
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call()
+    return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the request middleware")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per scenario")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds per scenario (best is reported)")
+    args = parser.parse_args()
+
+    # Records are built and filtered as in production, then discarded
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()], force=True)
+
+    print("⏱️  MindEase middleware benchmark")
+    print("=" * 40)
+    for label, path in (("JSON endpoint", "/api/v1/items/42"), ("Streaming endpoint", "/api/v1/stream")):
+        print(f"\n{label} ({args.requests} requests, best of {args.rounds})")
+        results = {}
+        for middleware in ("none", "decorator", "asgi"):
+            app = build_app(middleware)
+            results[middleware] = min(
+                asyncio.run(run(app, path, args.requests)) for _ in range(args.rounds)
+            )
+        for middleware, name in (("none", "no middleware"), ("decorator", "@app.middleware"), ("asgi", "ASGI middleware")):
+            overhead = results[middleware] - results["none"]
+            print(f"   {name:<18} {results[middleware]:8.1f} µs/request  (+{overhead:.1f} µs)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark for MindEase
+Measures a list endpoint over ASGI (no server, network or database) for a
+page of mood entries built two ways: a response model per row, validated
+and encoded by FastAPI, and rows encoded straight to JSON by rows_response.
+Also reports how much the compression middleware shrinks the page.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+
+from app.core.middleware import CompressionMiddleware
+from app.core.responses import orjson, rows_response
+from app.routers.wellness import MoodEntryResponse, MOOD_ENTRY_FIELDS
+
+# Stands in for the Core rows the list endpoints select
+MoodRow = namedtuple("MoodRow", MOOD_ENTRY_FIELDS)
+
+def build_rows(count: int) -> List[MoodRow]:
+    now = datetime.utcnow()
+    return [
+        MoodRow(str(uuid.uuid4()), "anxious", i % 10 + 1, f"Deadline at work, entry {i}", now - timedelta(hours=i))
+        for i in range(count)
+    ]
+
+def build_app(rows: List[MoodRow], compress: bool = False) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/models", response_model=List[MoodEntryResponse])
+    def models():
+        return [
+            MoodEntryResponse(
+                id=row.id,
+                emotion=row.emotion,
+                intensity=row.intensity,
+                notes=row.notes,
+                created_at=row.created_at
+            )
+            for row in rows
+        ]
+
+    @app.get("/rows", response_model=List[MoodEntryResponse])
+    def fast_rows():
+        return rows_response(rows, MOOD_ENTRY_FIELDS)
+
+    if compress:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+async def run(app: FastAPI, path: str, requests: int, accept_encoding: bytes = b"identity"):
+    """Mean microseconds per request and the response body size"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", accept_encoding)],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 8000)
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size = len(message.get("body", b""))
+
+    for _ in range(min(20, requests)):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6, size
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per response (MAX_PAGE_SIZE is 200)")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds per scenario (best is reported)")
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    app = build_app(rows)
+
+    print("⏱️  MindEase serialization benchmark")
+    print("=" * 40)
+    print(f"\n{args.rows} mood entries per response ({args.requests} requests, best of {args.rounds})")
+    print(f"   Encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+    results = {}
+    for path, name in (("/models", "response models"), ("/rows", "rows_response")):
+        results[path] = min(
+            (asyncio.run(run(app, path, args.requests)) for _ in range(args.rounds)), key=lambda result: result[0]
+        )
+        print(f"   {name:<18} {results[path][0]:8.1f} µs/request  ({results[path][1]} bytes)")
+    print(f"   Speed-up: {results['/models'][0] / results['/rows'][0]:.1f}x")
+
+    compressed_app = build_app(rows, compress=True)
+    print("\nCompression of the same response")
+    for encoding in (b"gzip", b"br"):
+        micros, size = min(
+            (asyncio.run(run(compressed_app, "/rows", args.requests, encoding)) for _ in range(args.rounds)),
+            key=lambda result: result[0]
+        )
+        if size == results["/rows"][1]:
+            print(f"   {encoding.decode():<18} not available")
+            continue
+        print(f"   {encoding.decode():<18} {micros:8.1f} µs/request  ({size} bytes)")
+
+if __name__ == "__main__":
+    main()
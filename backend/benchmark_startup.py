@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for MindEase
+Starts the app in fresh interpreters, the way a new worker does: times
+`import main` and the lifespan startup, and checks that modules meant to be
+loaded lazily (the AI provider SDKs) were not imported. Exits with status 1
+if the median cold start is over budget or a lazy module was imported, so
+it can run in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Imported on first use only; importing main must not pull these in
+LAZY_MODULES = ["openai", "anthropic"]
+
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+started = asyncio.run(startup())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "lazy_loaded": [name for name in %r if name in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+def probe(env):
+    """One cold start in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(1)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(env, top):
+    """main's direct imports by cumulative import time (python -X importtime)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown by indentation; main itself is at depth 0
+        if len(name) - len(name.lstrip()) == 3:
+            totals[name.strip()] = int(cumulative) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark cold start time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Maximum median import + startup time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports of main to list")
+    args = parser.parse_args()
+
+    # Keep the probes quiet and off the real log file
+    env = {**os.environ, "LOG_FILE": "", "LOG_LEVEL": "WARNING", "METRICS_DIR": ""}
+
+    print("⏱️  MindEase startup benchmark")
+    print("=" * 40)
+    runs = [probe(env) for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    startup_ms = statistics.median(run["startup_ms"] for run in runs)
+    total_ms = statistics.median(run["import_ms"] + run["startup_ms"] for run in runs)
+    print(f"   import main:   {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"   lifespan:      {startup_ms:8.1f} ms")
+    print(f"   cold start:    {total_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    print("\nSlowest imports:")
+    for name, ms in slowest_imports(env, args.top):
+        print(f"   {name:<28} {ms:8.1f} ms")
+
+    failed = False
+    lazy_loaded = sorted({name for run in runs for name in run["lazy_loaded"]})
+    if lazy_loaded:
+        print(f"\n❌ Imported at startup but should load lazily: {', '.join(lazy_loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\n❌ Cold start {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\n✅ Within budget")
+
+if __name__ == "__main__":
+    main()
@@ -15,4 +15,9 @@ pip install -r requirements.txt --no-cache-dir --prefer-binary
 echo "🗄️  Setting up database..."
 python3 create_tables.py
 
+# Users from before the rollup tables would otherwise show zero totals;
+# a no-op once every user with data has rollups
+echo "📊 Backfilling analytics rollups for users without them..."
+python3 backfill_rollups.py --missing
+
 echo "✅ Build completed successfully!" 
\ No newline at end of file
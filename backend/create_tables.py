@@ -26,6 +26,17 @@ def create_tables():
         Base.metadata.create_all(bind=engine)
         print("✅ All tables created successfully!")
         
+        # create_all only indexes new tables; add indexes introduced since
+        for table in Base.metadata.tables.values():
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        print("✅ All indexes present")
+        
+        # Full-text search over messages and mood notes (FTS5 / GIN)
+        from app.services.history_search import history_search
+        history_search.install(engine)
+        print("✅ History search index present")
+        
         # List created tables
         print("\n📋 Created tables:")
         for table_name in Base.metadata.tables.keys():
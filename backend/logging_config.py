@@ -1,29 +1,133 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.request_context import request_id, request_sampled
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RequestContextFilter(logging.Filter):
+    """Tag records with the request id; drop success-path records of unsampled requests"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and not request_sampled.get():
+            return False
+        current_id = request_id.get()
+        if current_id is not None:
+            record.request_id = current_id
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without formatting them.
+
+    The stock ``prepare`` renders the message on the calling thread; here
+    that is left to the listener, so a request only pays for the enqueue.
+    When the queue is full the record is dropped rather than blocking.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
 
 def setup_logging():
-    """Setup logging configuration for the MindEase backend"""
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),  # Console output
-            logging.FileHandler(f'logs/mindease_{datetime.now().strftime("%Y%m%d")}.log')  # Daily log file
-        ]
-    )
-    
-    # Set specific log levels for different modules
-    logging.getLogger('uvicorn').setLevel(logging.INFO)
-    logging.getLogger('uvicorn.access').setLevel(logging.INFO)
-    
-    # Create logger for the application
+    """Setup logging configuration for the MindEase backend.
+
+    Application threads only put records on a bounded queue; a background
+    listener formats them and writes to the console and a size-rotated file.
+    """
+    global _listener
     logger = logging.getLogger(__name__)
+    if _listener is not None:
+        return logger
+
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    handlers = [logging.StreamHandler()]  # Console output
+    if settings.LOG_FILE:
+        # With several workers, log to the console only (LOG_FILE=""): rotation is per process
+        os.makedirs(os.path.dirname(settings.LOG_FILE) or ".", exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued on exit
+    atexit.register(_stop_listener)
+    # A preloading server forks workers after this runs, and the listener
+    # thread does not survive the fork
+    os.register_at_fork(after_in_child=_restart_listener)
+
+    # Route uvicorn through the queue too; the request middleware's sampled
+    # line replaces its access log
+    for name in ('uvicorn', 'uvicorn.error', 'uvicorn.access'):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    logging.getLogger('uvicorn').setLevel(logging.INFO)
+    logging.getLogger('uvicorn.access').setLevel(logging.WARNING)
+
     logger.info("📝 Logging system initialized")
-    
-    return logger 
\ No newline at end of file
+
+    return logger
+
+def _restart_listener():
+    """Give a forked worker its own queue and listener thread"""
+    global _listener
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
@@ -1,17 +1,27 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, Header, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
 import time
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 
 from app.database import engine, Base
-from app.routers import chat, auth, wellness, topics, analytics
+from app.routers import chat, auth, wellness, topics, analytics, export, search, debug, health
 from app.core.config import settings
-from app.core.security import get_current_user_optional
+from app.core.drain import generation_drain
+from app.core.metrics import metrics, instrument_engine, CONTENT_TYPE
+from app.core.middleware import CompressionMiddleware, RequestObservabilityMiddleware
+from app.core.security import get_current_user_optional, has_metrics_access
+from app.core.tracing import tracer
+from app.core.query_profiler import query_profiler
+from app.services.history_search import history_search
+from app.services.pending_generations import pending_generations
+from app.services.warmup import warmup
 from logging_config import setup_logging
 
 load_dotenv()
@@ -23,13 +33,31 @@ logger = setup_logging()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting MindEase Backend...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("✅ Database tables created successfully")
+    instrument_engine(engine)
+    tracer.instrument(engine)
+    query_profiler.instrument(engine)
+    metrics.start_flusher()
+    if settings.DB_CREATE_ON_STARTUP:
+        Base.metadata.create_all(bind=engine)
+        history_search.install(engine)
+        logger.info("✅ Database tables created successfully")
+    # Readiness waits for this; liveness is answered meanwhile
+    warmup_task = asyncio.create_task(warmup.run_until_ready())
+    retry_task = asyncio.create_task(pending_generations.run_forever())
+    # On SIGTERM, refuse new generations while the server drains
+    generation_drain.install_signal_handlers()
     logger.info("📖 API Documentation: http://localhost:8000/docs")
     logger.info("🔗 Frontend URL: http://localhost:3000")
     yield
     # Shutdown
     logger.info("🛑 Shutting down MindEase Backend...")
+    generation_drain.start_draining()
+    warmup_task.cancel()
+    retry_task.cancel()
+    unfinished = await generation_drain.wait(settings.SHUTDOWN_DRAIN_SECONDS)
+    if unfinished:
+        logger.warning("⏳ %d generations unfinished at shutdown; kept in pending_generations for retry", unfinished)
+    metrics.flush()
 
 app = FastAPI(
     title="MindEase API",
@@ -51,31 +79,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "X-Request-ID", "X-Trace-Id", "Server-Timing"],
 )
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Log incoming request
-    logger.info(f"📥 {request.method} {request.url.path} - Client: {request.client.host if request.client else 'unknown'}")
-    
-    # Log request headers (excluding sensitive ones)
-    headers = dict(request.headers)
-    safe_headers = {k: v for k, v in headers.items() if k.lower() not in ['authorization', 'cookie']}
-    logger.debug(f"📋 Headers: {safe_headers}")
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Calculate processing time
-    process_time = time.time() - start_time
-    
-    # Log response
-    logger.info(f"📤 {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
-    
-    return response
+# Compresses large whole bodies; timed by the observability middleware around it
+app.add_middleware(CompressionMiddleware)
+
+# Request ids, timing, access logs, metrics, traces and query profiles
+app.add_middleware(RequestObservabilityMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -83,6 +94,10 @@ app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
 app.include_router(wellness.router, prefix="/api/v1/wellness", tags=["Wellness"])
 app.include_router(topics.router, prefix="/api/v1/topics", tags=["Topics"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+app.include_router(export.router, prefix="/api/v1/export", tags=["Export"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
+app.include_router(debug.router, prefix="/debug", tags=["Debug"], include_in_schema=False)
 
 @app.get("/")
 async def root():
@@ -100,12 +115,22 @@ async def health_check():
     logger.info("💚 Health check endpoint accessed")
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics, aggregated over workers when METRICS_DIR is set.
+
+    Needs ``Authorization: Bearer <METRICS_TOKEN>``; 404 otherwise, as for /debug.
+    """
+    if not settings.METRICS_ENABLED or not has_metrics_access(authorization):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=settings.DEBUG,
         log_level="info"
     ) 
\ No newline at end of file
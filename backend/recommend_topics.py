@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Topic recommendation job for MindEase
+Scores every active topic for every user with recent mood entries or
+topic-based sessions and stores each user's top-k list, which
+/api/v1/topics/daily then serves as-is. Run it periodically (e.g. nightly).
+"""
+
+import argparse
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base, engine, SessionLocal
+from app.services.topic_catalog import topic_catalog
+from app.services.topic_recommendations import topic_recommender
+
+def recommend(chunk_size=2000):
+    """Recompute stored recommendations for all recently active users"""
+    print("🎯 Computing topic recommendations...")
+    started = time.time()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        catalog = topic_catalog.refresh(db)
+        users = topic_recommender.compute(
+            db,
+            catalog,
+            chunk_size=chunk_size,
+            progress=lambda done, total: print(f"   ... {done}/{total} users")
+        )
+        print(f"✅ Stored recommendations for {users} users over {len(catalog.topics)} topics "
+              f"in {time.time() - started:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error computing recommendations: {e}")
+        return False
+    finally:
+        db.close()
+
+    return True
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Precompute MindEase topic recommendations")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Users scored per batch")
+    args = parser.parse_args()
+
+    if not recommend(args.chunk_size):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
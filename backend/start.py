@@ -1,33 +1,203 @@
 #!/usr/bin/env python3
 """
 Startup script for MindEase Backend
+
+Development (the default while DEBUG is true): one uvicorn process with
+auto-reload. Production (``--production``, or DEBUG=false): several
+workers sized from the available CPUs. Under gunicorn the app is preloaded
+in the master so workers share its memory copy-on-write. Without gunicorn
+(e.g. on Windows), uvicorn runs the workers itself. Either way uvloop and
+httptools are used when installed, and workers are recycled after
+SERVER_MAX_REQUESTS requests.
 """
 
-import uvicorn
+import argparse
+import importlib.util
+import math
 import os
+import uvicorn
 from dotenv import load_dotenv
 
-def main():
-    # Load environment variables
-    load_dotenv()
-    
-    # Get configuration from environment
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8000"))
-    reload = os.getenv("DEBUG", "True").lower() == "true"
-    
+# Load environment variables before the settings are read
+load_dotenv()
+
+from app.core.config import settings
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask and cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Container CPU limits (cgroup v2, then v1)
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+def worker_count(cpus: int) -> int:
+    """WEB_CONCURRENCY if set, else 2 x CPUs + 1 capped at SERVER_MAX_WORKERS"""
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    # Handlers still block on sync DB and provider calls, so more than one per core
+    return max(1, min(2 * cpus + 1, settings.SERVER_MAX_WORKERS))
+
+def shared_state_problems() -> list:
+    """Enabled per-process backends, which several workers would each keep apart"""
+    problems = []
+    if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_BACKEND == "memory":
+        problems.append("RATE_LIMIT_BACKEND=memory: every worker keeps its own buckets, multiplying the limits by the worker count")
+    return problems
+
+def clear_metrics_dir():
+    """Drop worker snapshots left by a previous run of the server"""
+    directory = settings.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.endswith((".json", ".json.tmp")):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+def run_development(host: str, port: int):
     print(f"Starting MindEase Backend on {host}:{port}")
-    print(f"Debug mode: {reload}")
+    print(f"Debug mode: {settings.DEBUG}")
     print(f"API Documentation: http://{host}:{port}/docs")
-    
+
     # Start the server
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=reload,
+        reload=True,
+        log_level="info"
+    )
+
+def run_production(host: str, port: int):
+    cpus = available_cpus()
+    workers = worker_count(cpus)
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    # gunicorn installs on Windows but cannot run there
+    use_gunicorn = os.name == "posix" and importlib.util.find_spec("gunicorn") is not None
+
+    problems = shared_state_problems() if workers > 1 else []
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        print("Set these backends to redis (with REDIS_URL), or run one worker with WEB_CONCURRENCY=1")
+        raise SystemExit(1)
+    if workers > 1 and settings.RESPONSE_CACHE_ENABLED and settings.RESPONSE_CACHE_BACKEND == "memory":
+        print("⚠️  RESPONSE_CACHE_BACKEND=memory: caching is disabled with several workers; set it to redis")
+    # Workers read this to know they are not alone
+    os.environ["SERVER_WORKERS"] = str(workers)
+    settings.SERVER_WORKERS = workers
+
+    print(f"Starting MindEase Backend on {host}:{port} (production)")
+    print(f"Workers: {workers} ({cpus} CPUs available) via {'gunicorn' if use_gunicorn else 'uvicorn'}")
+    print(f"Event loop: {loop}, HTTP parser: {http}")
+    if workers > 1 and settings.LOG_FILE:
+        print("⚠️  LOG_FILE is set: every worker rotates the same file; set LOG_FILE= to log to the console only")
+    if workers > 1 and not settings.METRICS_DIR:
+        print("⚠️  METRICS_DIR is not set: /metrics will only show the worker that answers the scrape")
+    clear_metrics_dir()
+
+    if use_gunicorn:
+        run_gunicorn(host, port, workers)
+        return
+
+    # No preloading here: each worker imports the app itself
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        # Then cancel what is left; unfinished generations stay pending for retry
+        timeout_graceful_shutdown=int(settings.SHUTDOWN_DRAIN_SECONDS),
         log_level="info"
     )
 
+def run_gunicorn(host: str, port: int, workers: int):
+    from gunicorn.app.base import BaseApplication
+
+    # uvicorn-worker is the maintained home of uvicorn's gunicorn worker
+    if importlib.util.find_spec("uvicorn_worker"):
+        worker_class = "uvicorn_worker.UvicornWorker"
+    else:
+        worker_class = "uvicorn.workers.UvicornWorker"
+
+    def post_fork(server, worker):
+        # Connections must not be shared with the master; the pool is
+        # normally still empty here since lifespan runs in each worker
+        from app.database import engine
+        engine.dispose(close=False)
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                # The worker's "auto" loop and parser pick uvloop and httptools when installed
+                "worker_class": worker_class,
+                "preload_app": True,
+                "max_requests": settings.SERVER_MAX_REQUESTS,
+                "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+                "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+                "backlog": settings.SERVER_BACKLOG,
+                # The worker waits this long for in-flight requests on SIGTERM
+                "graceful_timeout": int(settings.SHUTDOWN_DRAIN_SECONDS),
+                "post_fork": post_fork,
+                # The request middleware writes the access log
+                "accesslog": None
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    ProductionServer().run()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the MindEase backend")
+    parser.add_argument(
+        "--production", action="store_true",
+        help="Multi-worker server without reload (the default when DEBUG is false)"
+    )
+    args = parser.parse_args()
+
+    # Get configuration from environment
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8000"))
+
+    if args.production or not settings.DEBUG:
+        run_production(host, port)
+    else:
+        run_development(host, port)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
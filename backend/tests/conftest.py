@@ -0,0 +1,50 @@
+"""
+Shared fixtures for the MindEase backend tests
+The app runs in-process against a throwaway SQLite database, with no AI
+provider configured (replies come from the canned fallback) and no log file.
+"""
+
+import os
+import sys
+import tempfile
+
+# Settings are read at import time, so configure them before importing the app
+_data_dir = tempfile.mkdtemp(prefix="mindease-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'mindease.db')}"
+os.environ["LOG_FILE"] = ""
+os.environ["METRICS_DIR"] = ""
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+# Every test client shares one address and tests send bursts of messages;
+# a test that needs the user bucket to run out lowers it itself
+os.environ["RATE_LIMIT_IP_BURST"] = "100000"
+os.environ["RATE_LIMIT_USER_BURST"] = "100000"
+os.environ["LLM_BUDGET_BURST"] = "100000"
+for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "TRACE_DEBUG_TOKEN"):
+    os.environ.pop(key, None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization header for a fresh anonymous user"""
+    response = client.post("/api/v1/auth/anonymous", json={})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def chat_session(client, auth_headers):
+    """Id of a new free-form chat session owned by ``auth_headers``"""
+    response = client.post("/api/v1/chat/session", json={"session_type": "free_form"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["session_id"]
@@ -0,0 +1,37 @@
+"""
+Users whose data predates the rollup tables are rolled up on deploy
+"""
+
+from app.database import SessionLocal, MoodEntry, UserDailyRollup, UserDailyEmotionRollup, UserDailyActivityRollup, UserMoodStats
+from backfill_rollups import backfill
+
+def forget_rollups(user_id: str):
+    """Leave the user as the code before the rollups would have"""
+    db = SessionLocal()
+    try:
+        for model in (UserDailyRollup, UserDailyEmotionRollup, UserDailyActivityRollup, UserMoodStats):
+            db.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def test_missing_users_are_backfilled(client, auth_headers):
+    for intensity in (4, 6):
+        response = client.post("/api/v1/wellness/mood", json={"emotion": "calm", "intensity": intensity}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    db = SessionLocal()
+    try:
+        user_id = db.query(MoodEntry.user_id).filter(MoodEntry.id == response.json()["id"]).scalar()
+    finally:
+        db.close()
+    forget_rollups(user_id)
+    headers = {**auth_headers, "Cache-Control": "no-cache"}
+    assert client.get("/api/v1/wellness/stats", headers=headers).json()["mood_stats"]["total_entries"] == 0
+
+    assert backfill(missing=True)
+    db = SessionLocal()
+    try:
+        assert db.query(UserDailyRollup).filter(UserDailyRollup.user_id == user_id).count() == 1
+        assert db.query(UserMoodStats).filter(UserMoodStats.user_id == user_id).one().entry_count == 2
+    finally:
+        db.close()
@@ -0,0 +1,29 @@
+"""
+Compressed responses carry their own ETag and keep the app's Vary fields
+"""
+
+PATH = "/api/v1/topics/daily"
+
+def test_compressed_etag_and_vary(client, auth_headers):
+    identity = client.get(PATH, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert identity.status_code == 200
+    assert len(identity.content) >= 1024
+    etag = identity.headers["ETag"]
+
+    compressed = client.get(PATH, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == etag[:-1] + '-gzip"'
+    # Merged into the one Vary header the app and CORS already set
+    vary = compressed.headers.get_list("Vary")
+    assert len(vary) == 1
+    assert {"Authorization", "Accept-Encoding"} <= {field.strip() for field in vary[0].split(",")}
+
+    # Revalidating the compressed copy confirms it under its own tag
+    revalidated = client.get(PATH, headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == compressed.headers["ETag"]
+
+    # Either tag names the same data
+    identity_again = client.get(PATH, headers={**auth_headers, "Accept-Encoding": "identity", "If-None-Match": compressed.headers["ETag"]})
+    assert identity_again.status_code == 304
+    assert identity_again.headers["ETag"] == etag
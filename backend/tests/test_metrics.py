@@ -0,0 +1,68 @@
+"""
+/metrics is closed without its token, and snapshots of exited workers are merged
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics, RETIRED_SNAPSHOT
+
+def exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def write_snapshot(directory, pid, crisis_count):
+    snapshot = {
+        "pid": pid,
+        "time": time.time(),
+        "values": [
+            ["mindease_crisis_detections_total", [], crisis_count],
+            ["mindease_http_requests_in_flight", [], 3],
+        ],
+        "histograms": [],
+    }
+    with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+        json.dump(snapshot, f)
+
+def crisis_total(text: str) -> float:
+    for line in text.splitlines():
+        if line.startswith("mindease_crisis_detections_total "):
+            return float(line.split()[1])
+    return 0.0
+
+def test_metrics_requires_token(client, monkeypatch):
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "mindease_http_requests_total" in response.text
+
+def test_exited_workers_are_merged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+    before = crisis_total(metrics.render())
+    first, second = exited_pid(), exited_pid()
+    write_snapshot(tmp_path, first, 5)
+    write_snapshot(tmp_path, second, 2)
+    assert crisis_total(metrics.render()) == before + 7
+
+    metrics.flush()
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{os.getpid()}.json", RETIRED_SNAPSHOT, "retired.lock"])
+    with open(tmp_path / RETIRED_SNAPSHOT) as f:
+        retired = json.load(f)
+    assert ["mindease_crisis_detections_total", [], 7] in retired["values"]
+    assert not any(name == "mindease_http_requests_in_flight" for name, _, _ in retired["values"])
+
+    # Totals carry on, and a later exit adds to the retired snapshot
+    assert crisis_total(metrics.render()) == before + 7
+    write_snapshot(tmp_path, exited_pid(), 1)
+    metrics.flush()
+    assert crisis_total(metrics.render()) == before + 8
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".json")]) == 2
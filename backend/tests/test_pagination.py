@@ -0,0 +1,74 @@
+"""
+Keyset cursors walk a listing forwards and back without gaps or repeats
+"""
+
+def walk(client, headers, path, limit, cursor=None, header="X-Next-Cursor"):
+    """Ids of every page from ``cursor`` on, following ``header``"""
+    pages = []
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get(header)
+        if not cursor:
+            return pages, response
+
+def test_mood_entries_round_trip(client, auth_headers):
+    for intensity in range(1, 8):
+        response = client.post("/api/v1/wellness/mood", json={"emotion": "calm", "intensity": intensity}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    path = "/api/v1/wellness/mood"
+    everything = [item["id"] for item in client.get(path, params={"limit": 200}, headers=auth_headers).json()]
+    assert len(everything) == 7
+
+    pages, last = walk(client, auth_headers, path, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == everything
+
+    # Back from the last page to the first
+    back, _ = walk(client, auth_headers, path, limit=3, cursor=last.headers["X-Prev-Cursor"], header="X-Prev-Cursor")
+    assert back == pages[-2::-1]
+
+def test_session_messages_round_trip(client, auth_headers, chat_session):
+    for i in range(4):
+        response = client.post(
+            "/api/v1/chat/message", json={"content": f"message {i}", "session_id": chat_session}, headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+    path = f"/api/v1/chat/session/{chat_session}/messages"
+    everything = [item["id"] for item in client.get(path, params={"limit": 200}, headers=auth_headers).json()]
+    assert len(everything) == 8
+
+    # Without a cursor the newest page comes back, still in chronological order
+    pages, oldest = walk(client, auth_headers, path, limit=3, header="X-Prev-Cursor")
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert pages[0] == everything[-3:]
+    assert sum(reversed(pages), []) == everything
+
+    # Forwards again from the oldest page, up to the newest
+    forward, newest = walk(client, auth_headers, path, limit=3, cursor=oldest.headers["X-Next-Cursor"])
+    assert pages[-1] + sum(forward, []) == everything
+    assert "X-Next-Cursor" not in newest.headers
+
+def test_session_messages_keep_conversation_order(client, auth_headers, chat_session):
+    # A turn and its reply are saved within the same second
+    for i in range(6):
+        response = client.post(
+            "/api/v1/chat/message", json={"content": f"turn {i}", "session_id": chat_session}, headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+    path = f"/api/v1/chat/session/{chat_session}/messages"
+
+    messages = client.get(path, headers=auth_headers).json()
+    assert [message["role"] for message in messages] == ["user", "assistant"] * 6
+    assert [message["content"] for message in messages[::2]] == [f"turn {i}" for i in range(6)]
+
+    pages, _ = walk(client, auth_headers, path, limit=4, header="X-Prev-Cursor")
+    assert sum(reversed(pages), []) == [message["id"] for message in messages]
+
+def test_invalid_cursor(client, auth_headers):
+    response = client.get("/api/v1/wellness/mood", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,77 @@
+"""
+Replies left unfinished by a request are generated once the request's claim goes stale
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.database import SessionLocal, Message, PendingGeneration, Session as DBSession
+from app.services.pending_generations import pending_generations
+
+def add_unanswered_message(session_id: str, age_seconds: float) -> str:
+    """A user message whose request went away before the reply was saved"""
+    db = SessionLocal()
+    try:
+        session = db.get(DBSession, session_id)
+        then = datetime.utcnow() - timedelta(seconds=age_seconds)
+        message = Message(session_id=session_id, content="are you still there?", role="user", timestamp=then)
+        db.add(message)
+        pending_generations.record(db, message, session.user_id, "free_form")
+        db.flush()
+        db.query(PendingGeneration).filter(PendingGeneration.user_message_id == message.id).update(
+            {"created_at": then, "claimed_at": then}, synchronize_session=False
+        )
+        db.commit()
+        return message.id
+    finally:
+        db.close()
+
+def replies_after(session_id: str, message_id: str):
+    db = SessionLocal()
+    try:
+        asked = db.get(Message, message_id)
+        return db.query(Message).filter(
+            Message.session_id == session_id,
+            Message.role == "assistant",
+            Message.timestamp > asked.timestamp
+        ).all()
+    finally:
+        db.close()
+
+def pending(message_id: str):
+    db = SessionLocal()
+    try:
+        return db.get(PendingGeneration, message_id)
+    finally:
+        db.close()
+
+def test_stale_generation_is_retried_once(client, chat_session):
+    message_id = add_unanswered_message(chat_session, settings.PENDING_GENERATION_STALE_SECONDS + 60)
+
+    assert asyncio.run(pending_generations.retry_stale()) >= 1
+    assert pending(message_id) is None
+    assert len(replies_after(chat_session, message_id)) == 1
+
+    # Nothing left to do: a second pass saves no second reply
+    asyncio.run(pending_generations.retry_stale())
+    assert len(replies_after(chat_session, message_id)) == 1
+
+def test_live_request_keeps_its_claim(client, chat_session):
+    message_id = add_unanswered_message(chat_session, 1)
+
+    asyncio.run(pending_generations.retry_stale())
+    assert pending(message_id) is not None
+    assert replies_after(chat_session, message_id) == []
+
+def test_request_cannot_complete_after_a_retry_claimed_it(client, chat_session):
+    message_id = add_unanswered_message(chat_session, settings.PENDING_GENERATION_STALE_SECONDS + 60)
+    asyncio.run(pending_generations.retry_stale())
+
+    # The original request finishing late must not save a second reply
+    db = SessionLocal()
+    try:
+        assert pending_generations.complete(db, message_id, attempt=0) is False
+        db.rollback()
+    finally:
+        db.close()
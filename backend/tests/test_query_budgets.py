@@ -0,0 +1,45 @@
+"""
+Query budgets for the chat and analytics endpoints
+A budget that starts growing with history length means an N+1 came back.
+"""
+
+import pytest
+
+from app.core.query_profiler import assert_query_budget
+
+ANALYTICS_BUDGETS = [
+    ("/api/v1/analytics/insights", 6),
+    ("/api/v1/analytics/mood/trend", 4),
+    ("/api/v1/analytics/emotions/summary", 4),
+    ("/api/v1/analytics/wellness/progress", 4),
+    ("/api/v1/analytics/sessions/activity", 4),
+    ("/api/v1/wellness/stats", 5),
+]
+
+def send(client, headers, session_id, content):
+    response = client.post("/api/v1/chat/message", json={"content": content, "session_id": session_id}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_chat_message_budget_does_not_grow_with_history(client, auth_headers, chat_session):
+    send(client, auth_headers, chat_session, "first message")
+    with assert_query_budget(16, max_repeats=2) as short_history:
+        send(client, auth_headers, chat_session, "with a short history")
+
+    for i in range(12):
+        send(client, auth_headers, chat_session, f"filler message {i}")
+    with assert_query_budget(16, max_repeats=2) as long_history:
+        send(client, auth_headers, chat_session, "with a long history")
+
+    assert long_history[0].count == short_history[0].count
+
+@pytest.mark.parametrize("path,budget", ANALYTICS_BUDGETS)
+def test_analytics_budget(client, auth_headers, chat_session, path, budget):
+    send(client, auth_headers, chat_session, "feeling a bit low today")
+    for emotion, intensity in [("happy", 7), ("anxious", 4), ("sad", 3), ("calm", 6)]:
+        response = client.post("/api/v1/wellness/mood", json={"emotion": emotion, "intensity": intensity}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+    with assert_query_budget(budget, max_repeats=1):
+        response = client.get(path, headers=auth_headers)
+    assert response.status_code == 200, response.text
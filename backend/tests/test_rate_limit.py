@@ -0,0 +1,58 @@
+"""
+Chat rate limiting: 429 with a Retry-After once a bucket is empty, and how buckets are keyed and capped
+"""
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.rate_limit import MemoryBucketStore, get_client_ip
+
+def test_chat_rate_limit(client, auth_headers, chat_session, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_BURST", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_PER_MINUTE", 1.0)
+    payload = {"content": "hello", "session_id": chat_session}
+
+    for _ in range(2):
+        assert client.post("/api/v1/chat/message", json=payload, headers=auth_headers).status_code == 200
+
+    response = client.post("/api/v1/chat/message", json=payload, headers=auth_headers)
+    assert response.status_code == 429
+    # One token a minute: close to a minute until the next one
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+
+def test_rate_limit_is_per_user(client, chat_session, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_PER_MINUTE", 1.0)
+    payload = {"content": "hello", "session_id": chat_session}
+    assert client.post("/api/v1/chat/message", json=payload, headers=auth_headers).status_code == 200
+    assert client.post("/api/v1/chat/message", json=payload, headers=auth_headers).status_code == 429
+
+    other = {"Authorization": f"Bearer {client.post('/api/v1/auth/anonymous', json={}).json()['access_token']}"}
+    session_id = client.post("/api/v1/chat/session", json={"session_type": "free_form"}, headers=other).json()["session_id"]
+    response = client.post("/api/v1/chat/message", json={"content": "hello", "session_id": session_id}, headers=other)
+    assert response.status_code == 200
+
+def client_ip(forwarded_for):
+    request = Request({"type": "http", "headers": [(b"x-forwarded-for", forwarded_for.encode())], "client": ("10.0.0.1", 443)})
+    return get_client_ip(request)
+
+def test_client_ip_is_the_right_most_untrusted_hop(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED_FOR", True)
+    # Whatever the client writes to the left is ignored
+    assert client_ip("1.2.3.4, 203.0.113.7") == "203.0.113.7"
+    assert client_ip("203.0.113.7") == "203.0.113.7"
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "10.1.0.0/16, 192.0.2.5")
+    assert client_ip("1.2.3.4, 203.0.113.7, 192.0.2.5, 10.1.2.3") == "203.0.113.7"
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED_FOR", False)
+    assert client_ip("203.0.113.7") == "10.0.0.1"
+
+def test_memory_store_is_capped():
+    store = MemoryBucketStore(max_keys=100)
+    for i in range(1000):
+        # Slow refill: no bucket is full again before the next key arrives
+        store.consume(f"ip:{i}", rate=0.001, capacity=5)
+    assert len(store._buckets) == 100
+    # The most recent keys keep their state
+    assert store._buckets["ip:999"][0] == 4
@@ -0,0 +1,38 @@
+"""
+History search only returns the caller's own messages and mood notes
+"""
+
+import uuid
+
+import pytest
+
+@pytest.fixture
+def unique_word():
+    """A search term no other test has written"""
+    return "w" + uuid.uuid4().hex[:12]
+
+def search(client, headers, term):
+    response = client.get("/api/v1/search", params={"q": term}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_search_is_scoped_to_the_owner(client, auth_headers, chat_session, unique_word):
+    response = client.post(
+        "/api/v1/chat/message", json={"content": f"thinking about {unique_word}", "session_id": chat_session},
+        headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    response = client.post(
+        "/api/v1/wellness/mood", json={"emotion": "calm", "intensity": 6, "notes": f"{unique_word} again"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+
+    own = search(client, auth_headers, unique_word)
+    assert {result["kind"] for result in own} == {"message", "mood"}
+
+    stranger = client.post("/api/v1/auth/anonymous", json={}).json()["access_token"]
+    assert search(client, {"Authorization": f"Bearer {stranger}"}, unique_word) == []
+
+def test_search_requires_authentication(client):
+    assert client.get("/api/v1/search", params={"q": "anything"}).status_code == 401
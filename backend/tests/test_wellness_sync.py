@@ -0,0 +1,63 @@
+"""
+Offline sync folds backdated mood entries into the running statistics correctly
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal, MoodEntry
+from app.services.mood_stats import mood_stats
+
+def sync_moods(client, headers, moods):
+    payload = {"moods": [{"client_id": str(uuid.uuid4()), **mood} for mood in moods]}
+    response = client.post("/api/v1/wellness/sync", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["applied"] == len(moods), body
+    return body["results"]
+
+def test_backdated_entries_match_a_rebuild(client, auth_headers):
+    for intensity in (8, 2):
+        response = client.post("/api/v1/wellness/mood", json={"emotion": "calm", "intensity": intensity}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+    now = datetime.utcnow()
+    results = sync_moods(client, auth_headers, [
+        {"emotion": "sad", "intensity": 3, "created_at": (now - timedelta(days=3)).isoformat()},
+        {"emotion": "sad", "intensity": 4, "created_at": (now - timedelta(days=2)).isoformat()},
+        {"emotion": "anxious", "intensity": 9, "created_at": (now - timedelta(days=1)).isoformat()},
+    ])
+
+    db = SessionLocal()
+    try:
+        user_id = db.get(MoodEntry, results[0]["id"]).user_id
+        synced = mood_stats.summarize(mood_stats.get_stats(db, user_id))
+        rebuilt = mood_stats.summarize(mood_stats.rebuild(db, user_id))
+    finally:
+        db.close()
+
+    assert synced == rebuilt
+    assert synced["total_entries"] == 5
+    assert synced["longest_streak"] == 4
+
+def test_newer_entries_are_folded_in_place(client, auth_headers):
+    response = client.post("/api/v1/wellness/mood", json={"emotion": "calm", "intensity": 5}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    results = sync_moods(client, auth_headers, [
+        {"emotion": "happy", "intensity": 7, "created_at": (datetime.utcnow() + timedelta(minutes=1)).isoformat()},
+    ])
+
+    db = SessionLocal()
+    try:
+        user_id = db.get(MoodEntry, results[0]["id"]).user_id
+        synced = mood_stats.summarize(mood_stats.get_stats(db, user_id))
+        rebuilt = mood_stats.summarize(mood_stats.rebuild(db, user_id))
+    finally:
+        db.close()
+    assert synced == rebuilt
+
+def test_sync_rejects_unknown_activity(client, auth_headers):
+    payload = {"activities": [{"client_id": str(uuid.uuid4()), "activity_type": "juggling", "duration": 5}]}
+    response = client.post("/api/v1/wellness/sync", json=payload, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["results"][0]["status"] == "rejected"